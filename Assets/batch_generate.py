@@ -0,0 +1,266 @@
+"""
+Upwork Proposal Generator - Batch Mode
+Generates proposals for a whole file of saved job posts without prompts.
+
+Input is JSONL (one object per line) or CSV with a header row. Each record
+needs a "job_description" field and may have "id", "past_experience" and
+"your_name". Results are written as JSONL in the same order as the input.
+A line that is not a JSON object, a CSV row that cannot be parsed, or a
+description that is not text gets an {"id": ..., "error": ...} result in
+its place.
+
+Usage:
+python batch_generate.py saved_posts.jsonl proposals.jsonl --workers 8
+python batch_generate.py saved_posts.jsonl proposals.jsonl --profile slow_batch
+python batch_generate.py saved_posts.jsonl proposals.jsonl --classifier job_classifier.bin
+python batch_generate.py saved_posts.jsonl proposals.jsonl --experience-db library.db
+python batch_generate.py saved_posts.jsonl proposals.jsonl --history-db history.db
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+from collections import deque
+from itertools import islice, tee
+
+import metrics
+from feature_extractor import clip
+from profiler import Profiler
+from upwork_proposal_generator import UpworkProposalGenerator
+
+# Largest CSV field read, in characters. Python's default of 131072 would
+# abort the run on one long description; anything past the clip is unused.
+MAX_CSV_FIELD = 64 * 1024 * 1024
+
+_generator = None
+
+
+def _init_worker(classifier_path=None, experience_path=None):
+    global _generator
+    # Batch runs do not report stage metrics, so skip collecting them
+    metrics.set_enabled(False)
+    _generator = _make_generator(classifier_path, experience_path)
+
+
+def _make_generator(classifier_path=None, experience_path=None):
+    classifier = None
+    if classifier_path:
+        # Each worker maps the same model file, so its pages are shared
+        from tfidf_classifier import TfidfClassifier
+        classifier = TfidfClassifier.load(classifier_path)
+    experience_index = None
+    if experience_path:
+        # Opened per worker, the library file is memory mapped by each
+        from experience_index import ExperienceIndex
+        experience_index = ExperienceIndex(experience_path)
+    return UpworkProposalGenerator(classifier, experience_index)
+
+
+class Unreadable(dict):
+    """Stands in for an input line that is not a job post, and becomes its error result"""
+
+
+def read_records(path, file_format="auto"):
+    """Yield one dict per job post from a JSONL or CSV file
+
+    Lines that are not JSON objects and CSV rows that cannot be parsed come
+    out as Unreadable records.
+    """
+    if file_format == "auto":
+        file_format = "csv" if path.lower().endswith(".csv") else "jsonl"
+
+    with open(path, encoding="utf-8", newline="") as f:
+        if file_format == "csv":
+            csv.field_size_limit(max(csv.field_size_limit(), MAX_CSV_FIELD))
+            reader = csv.DictReader(f)
+            while True:
+                try:
+                    yield next(reader)
+                except StopIteration:
+                    return
+                except csv.Error as e:
+                    yield Unreadable(id=None, error=f"line {reader.line_num} is not readable CSV: {e}")
+        else:
+            for number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    yield Unreadable(id=None, error=f"line {number} is not JSON: {e}")
+                    continue
+                if isinstance(record, dict):
+                    yield record
+                else:
+                    yield Unreadable(id=None, error=f"line {number} is not a JSON object")
+
+
+def _description(record):
+    """Clipped job description, "" when missing and None when it is not text"""
+    description = record.get("job_description") or record.get("description") or ""
+    if not isinstance(description, str):
+        return None
+    return clip(description.strip())
+
+
+def process_record(generator, record, analysis=None):
+    """Run one record through detect -> extract -> generate"""
+    if isinstance(record, Unreadable):
+        return dict(record)
+    job_description = _description(record)
+    result = {"id": record.get("id")}
+
+    if job_description is None:
+        result["error"] = "job description is not text"
+        return result
+    for field in ("past_experience", "your_name"):
+        if not isinstance(record.get(field) or "", str):
+            result["error"] = f"{field} is not text"
+            return result
+    if not job_description:
+        result["error"] = "empty job description"
+        return result
+
+    job_type, info = analysis or generator.analyze(job_description)
+    past_experience = record.get("past_experience") or generator.suggest_experience(job_description)
+    result["job_type"] = job_type
+    result["info"] = info
+    result["proposal"] = generator.build_proposal(
+        job_type,
+        info,
+        past_experience,
+        record.get("your_name") or None
+    )
+    return result
+
+
+def _process_chunk(records):
+    # Analyze the whole chunk first so a classifier scores it in one pass
+    descriptions = [_description(record) for record in records]
+    analyses = iter(_generator.analyze_many([d for d in descriptions if d]))
+    return [
+        process_record(_generator, record, next(analyses) if description else None)
+        for record, description in zip(records, descriptions)
+    ]
+
+
+def chunked(records, size):
+    """Group an iterable into lists of at most size items"""
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def generate_batch(records, workers=None, chunk_size=64, max_pending=None, classifier_path=None,
+                   experience_path=None):
+    """Yield results in input order, keeping at most max_pending chunks in flight"""
+    workers = workers or os.cpu_count() or 1
+    chunks = chunked(records, chunk_size)
+
+    if workers == 1:
+        _init_worker(classifier_path, experience_path)
+        for chunk in chunks:
+            yield from _process_chunk(chunk)
+        return
+
+    # Imported here: multiprocessing costs a single process run ~30 ms of startup
+    from concurrent.futures import ProcessPoolExecutor
+
+    max_pending = max_pending or workers * 2
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(classifier_path, experience_path)) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(_process_chunk, chunk))
+            if len(pending) >= max_pending:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def profile_batch(records, profiler, classifier_path=None, experience_path=None):
+    """Yield results from this process with every generator call profiled"""
+    metrics.set_enabled(False)
+    generator = profiler.instrument(_make_generator(classifier_path, experience_path))
+    for record in records:
+        description = _description(record) or ""
+        yield profiler.run(description, process_record, generator, record, input_id=record.get("id"))
+
+
+def record_history(records, results, history):
+    """Pass results through, keeping each generated proposal in history"""
+    for record, result in zip(records, results):
+        if "proposal" in result:
+            history.record(_description(record), result["job_type"], result["info"],
+                           [result["proposal"]], source="batch")
+        yield result
+
+
+def write_results(results, path):
+    """Write results as JSONL and return how many were written"""
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for result in results:
+            f.write(json.dumps(result, ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate proposals for a file of job posts")
+    parser.add_argument("input", help="JSONL or CSV file of job descriptions")
+    parser.add_argument("output", help="JSONL file to write proposals to")
+    parser.add_argument("--format", choices=["auto", "jsonl", "csv"], default="auto",
+                        help="input format (default: from the file extension)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: one per CPU)")
+    parser.add_argument("--chunk-size", type=int, default=64,
+                        help="posts sent to a worker at a time")
+    parser.add_argument("--profile", nargs="?", const="batch_profile", metavar="PREFIX",
+                        help="profile in one process and write PREFIX.txt and PREFIX.collapsed")
+    parser.add_argument("--classifier", metavar="MODEL",
+                        help="detect job types with a trained TF-IDF model (needs numpy)")
+    parser.add_argument("--experience-db", metavar="LIBRARY",
+                        help="fill in missing past_experience from this snippet library")
+    parser.add_argument("--history-db", metavar="HISTORY",
+                        help="keep every post and proposal in this SQLite file")
+    args = parser.parse_args(argv)
+
+    records = read_records(args.input, args.format)
+    history = None
+    if args.history_db:
+        from history_store import HistoryStore
+        history = HistoryStore(args.history_db)
+        # Workers do not return the post text, so keep it here while its
+        # chunk is in flight
+        records, history_records = tee(records)
+    profiler = None
+    if args.profile:
+        # Stacks can only be traced in this process, so workers are not used
+        profiler = Profiler()
+        results = profile_batch(records, profiler, args.classifier, args.experience_db)
+    else:
+        results = generate_batch(records, workers=args.workers, chunk_size=args.chunk_size,
+                                 classifier_path=args.classifier, experience_path=args.experience_db)
+    if history:
+        # Written from this process, the worker processes exit without
+        # running exit handlers
+        results = record_history(history_records, results, history)
+    count = write_results(results, args.output)
+    if history:
+        history.close()
+
+    print(f"Wrote {count} proposals to {args.output}", file=sys.stderr)
+    if profiler:
+        report_path, stacks_path = profiler.write(args.profile)
+        print(f"Profile written to {report_path} and {stacks_path}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+"""
+Batch Render
+Many versions for many posts in one call, from the web templates. Calling
+generate_multiple in a loop pays Python overhead for every version: a
+random draw, a render per template, a join and a split to count words.
+Here that per version work is done per group of posts that share a job
+type:
+
+- template indices for every version are drawn at once from a seeded
+  NumPy generator, distinct within each post like generate_variants
+- each template is rendered once per post (once per batch when it has no
+  fields) and its words counted then, so a version's word count is a sum
+  of fragment counts instead of another split
+- results come back as columns (post id, version, job type, word count,
+  text), one row per version
+
+Only the versions get faster: each post is still analyzed once through
+the web app's analysis cache, which costs the same as in
+generate_multiple. Callers that already hold the analyses can pass them to
+render_analyzed() and skip it.
+
+The same seed gives the same versions for the same posts and templates,
+but not the versions generate_multiple would pick. Rendered batches are
+not written to the history store.
+
+Needs NumPy (pip install numpy).
+
+Usage:
+python batch_render.py saved_posts.jsonl versions.jsonl --count 20 --seed 7
+python batch_render.py saved_posts.jsonl versions.jsonl --count 20 --max-words 200
+"""
+
+import argparse
+import json
+import sys
+
+import numpy as np
+
+import proposal_generator_web as web
+from compact_variants import clean_value, experience_section
+
+# Random keys drawn per block of posts, bounding memory for big batches
+_DRAW_BLOCK = 1 << 20
+
+
+class RenderedBatch:
+    """Columns of a rendered batch, one row per version."""
+
+    __slots__ = ("post", "ids", "version", "job_type", "word_count", "text")
+
+    def __init__(self, post, ids, version, job_type, word_count, text):
+        # Index of the row's post in the input, and the post's "id" (or that index)
+        self.post = post
+        self.ids = ids
+        self.version = version
+        self.job_type = job_type
+        self.word_count = word_count
+        self.text = text
+
+    def __len__(self):
+        return len(self.text)
+
+    def records(self):
+        """Yield one API shaped dict per post, with its versions in order"""
+        current = None
+        post = None
+        for row in range(len(self.text)):
+            if self.post[row] != post:
+                if current is not None:
+                    yield current
+                post = self.post[row]
+                current = {"id": self.ids[row], "job_type": self.job_type[row], "variants": []}
+            current["variants"].append({
+                "version": int(self.version[row]),
+                "text": self.text[row],
+                "word_count": int(self.word_count[row])
+            })
+        if current is not None:
+            yield current
+
+
+def _field(post, *keys):
+    for key in keys:
+        value = post.get(key)
+        if value is not None:
+            return value
+    return None
+
+
+def draw_distinct(rng, rows, total, count, allowed=None):
+    """(rows, count) array of integers below total, distinct within each row
+
+    With an allowed mask of shape (rows, total) only allowed integers are
+    drawn, and a row with fewer than count of them ends in -1s.
+    """
+    draws = np.empty((rows, count), dtype=np.int64)
+    block = max(_DRAW_BLOCK // total, 1)
+    for start in range(0, rows, block):
+        keys = rng.random((min(block, rows - start), total))
+        if allowed is not None:
+            keys[~allowed[start:start + len(keys)]] = np.inf
+        # The count smallest keys pick a uniform subset, sorting them a uniform order
+        picked = np.argpartition(keys, count - 1, axis=1)[:, :count] if count < total else np.argsort(keys, axis=1)
+        order = np.argsort(np.take_along_axis(keys, picked, axis=1), axis=1)
+        picked = np.take_along_axis(picked, order, axis=1)
+        if allowed is not None:
+            picked[np.isinf(np.take_along_axis(keys, picked, axis=1))] = -1
+        draws[start:start + len(keys)] = picked
+    return draws
+
+
+def _render_group(templates, job_type, section, members, count, rng, columns, max_words=None, max_chars=None):
+    """Render count versions for every post of one (job type, experience section)"""
+    sections = [templates.get(job_type, name) for name in ("openers", section, "questions", "closings")]
+    sizes = [len(fragments) for fragments in sections]
+    total = int(np.prod(sizes))
+    count = min(count, total)
+    # Fragment number of each section's first template in the flat list
+    offsets = np.cumsum([0] + sizes[:-1])
+    fragments = [template for fragments in sections for template in fragments]
+
+    # Templates without fields read the same for every post, so only the
+    # others are rendered and counted per post
+    base_texts = []
+    base_words = []
+    base_chars = []
+    dynamic = []
+    for index, template in enumerate(fragments):
+        if template.slots:
+            dynamic.append((index, template))
+            base_texts.append(None)
+            base_words.append(0)
+            base_chars.append(0)
+        else:
+            base_texts.append(template.parts[0])
+            base_words.append(len(template.parts[0].split()))
+            base_chars.append(len(template.parts[0]))
+
+    post_texts = []
+    word_counts = []
+    char_counts = []
+    name_words = np.zeros(len(members), dtype=np.int32)
+    name_chars = np.zeros(len(members), dtype=np.int32)
+    for row, (post, post_id, main_task, experience, name) in enumerate(members):
+        values = {"main_task": main_task, "experience": experience, "name": name}
+        texts = base_texts[:]
+        words = base_words[:]
+        chars = base_chars[:]
+        for index, template in dynamic:
+            text = template.render(values)
+            texts[index] = text
+            words[index] = len(text.split())
+            chars[index] = len(text)
+        post_texts.append(texts)
+        word_counts.append(words)
+        char_counts.append(chars)
+        if name:
+            name_words[row] = len(name.split())
+            # The name line and the blank line before it
+            name_chars[row] = len(name) + 2
+    word_counts = np.array(word_counts, dtype=np.int32)
+
+    allowed = None
+    if max_words is not None or max_chars is not None:
+        # Size of every combination for every post, from the fragment counts
+        every = np.stack(np.unravel_index(np.arange(total), sizes), axis=-1) + offsets
+        combo_words = word_counts[:, every].sum(axis=2) + name_words[:, None]
+        allowed = np.ones(combo_words.shape, dtype=bool)
+        if max_words is not None:
+            allowed &= combo_words <= max_words
+        if max_chars is not None:
+            # Three blank lines between the four paragraphs
+            combo_chars = np.array(char_counts, dtype=np.int32)[:, every].sum(axis=2) + (name_chars + 6)[:, None]
+            allowed &= combo_chars <= max_chars
+        # A post nothing fits still gets its shortest version
+        nothing = ~allowed.any(axis=1)
+        allowed[nothing, combo_words[nothing].argmin(axis=1)] = True
+
+    combos = draw_distinct(rng, len(members), total, count, allowed)
+    drawn = combos >= 0
+    picks = np.stack(np.unravel_index(np.where(drawn, combos, 0), sizes), axis=-1) + offsets
+    drawn_counts = drawn.sum(axis=1).tolist()
+    label = job_type.replace("_", " ").title()
+    versions = list(range(1, count + 1))
+    texts_column = columns["text"]
+    rows = picks.tolist()
+
+    for row, (post, post_id, main_task, experience, name) in enumerate(members):
+        drawn_count = drawn_counts[row]
+        choices = rows[row][:drawn_count]
+        texts = post_texts[row]
+        if name:
+            texts_column.extend([
+                "\n\n".join((texts[opener], texts[experience_i], texts[question], texts[closing], name))
+                for opener, experience_i, question, closing in choices
+            ])
+        else:
+            texts_column.extend([
+                "\n\n".join((texts[opener], texts[experience_i], texts[question], texts[closing]))
+                for opener, experience_i, question, closing in choices
+            ])
+        columns["post"].extend([post] * drawn_count)
+        columns["ids"].extend([post_id] * drawn_count)
+        columns["version"].extend(versions[:drawn_count])
+        columns["job_type"].extend([label] * drawn_count)
+
+    # Every version's words are the sum of its fragments' words, plus the name
+    totals = np.take_along_axis(word_counts, picks.reshape(len(members), -1), axis=1)
+    totals = totals.reshape(len(members), count, len(sections)).sum(axis=2) + name_words[:, None]
+    columns["word_count"].append(totals[drawn])
+
+
+def analyze_posts(posts):
+    """(post id, job type, main task, experience, name) for every post with a description
+
+    posts are dicts with "job_description" and optional "id", "experience"
+    (or "past_experience") and "name" (or "your_name"). A post without a
+    description comes out as None.
+    """
+    analyzed = []
+    for index, post in enumerate(posts):
+        description = (_field(post, "job_description", "description") or "").strip()
+        if not description:
+            analyzed.append(None)
+            continue
+        job_type, main_task = web.analyze_description(description)
+        experience = web.suggest_experience(description, _field(post, "experience", "past_experience"))
+        analyzed.append((post.get("id", index), job_type, main_task, experience, _field(post, "name", "your_name")))
+    return analyzed
+
+
+def render_batch(posts, count=3, seed=None, templates=None, max_words=None, max_chars=None):
+    """Analyze every post and render count versions of each as a RenderedBatch
+
+    See analyze_posts() for the post fields and render_analyzed() for the rows.
+    """
+    return render_analyzed(analyze_posts(posts), count, seed, templates, max_words, max_chars)
+
+
+def render_analyzed(analyzed, count=3, seed=None, templates=None, max_words=None, max_chars=None):
+    """Render count versions for every analyzed post and return them as a RenderedBatch
+
+    analyzed holds (post id, job type, main task, experience, name) tuples,
+    or None for a post that gets no rows. Rows come grouped by job type,
+    and within a post in version order.
+
+    With max_words or max_chars, versions are drawn only from the
+    combinations within them, so a post may get fewer than count; a post
+    that nothing fits gets its shortest version.
+    """
+    templates = templates or web.TEMPLATE_STORE.current()
+    rng = np.random.default_rng(seed)
+
+    # (job type, experience section) -> [(index, post id, main task, experience, name)]
+    groups = {}
+    for index, analysis in enumerate(analyzed):
+        if analysis is None:
+            continue
+        post_id, job_type, main_task, experience, name = analysis
+        experience = clean_value(experience)
+        key = (job_type, experience_section(experience))
+        groups.setdefault(key, []).append((index, post_id, main_task, experience, clean_value(name)))
+
+    columns = {"post": [], "ids": [], "version": [], "job_type": [], "word_count": [], "text": []}
+    for (job_type, section), members in groups.items():
+        _render_group(templates, job_type, section, members, count, rng, columns, max_words, max_chars)
+
+    return RenderedBatch(
+        np.array(columns["post"], dtype=np.int64),
+        columns["ids"],
+        np.array(columns["version"], dtype=np.int32),
+        columns["job_type"],
+        np.concatenate(columns["word_count"]) if columns["word_count"] else np.empty(0, dtype=np.int32),
+        columns["text"]
+    )
+
+
+def main(argv=None):
+    from batch_generate import read_records
+
+    parser = argparse.ArgumentParser(description="Render many versions for a file of job posts")
+    parser.add_argument("input", help="JSONL or CSV file of job descriptions")
+    parser.add_argument("output", help="JSONL file to write one line of versions per post to")
+    parser.add_argument("--count", type=int, default=3, help="versions per post")
+    parser.add_argument("--seed", type=int, default=None, help="seed for repeatable versions")
+    parser.add_argument("--max-words", type=int, default=None, help="only versions with at most this many words")
+    parser.add_argument("--max-chars", type=int, default=None, help="only versions with at most this many characters")
+    args = parser.parse_args(argv)
+
+    batch = render_batch(read_records(args.input), args.count, args.seed,
+                         max_words=args.max_words, max_chars=args.max_chars)
+    posts = 0
+    with open(args.output, "w", encoding="utf-8") as f:
+        for record in batch.records():
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            posts += 1
+    print(f"Wrote {len(batch)} versions for {posts} posts to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
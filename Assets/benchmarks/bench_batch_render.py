@@ -0,0 +1,105 @@
+"""
+Batch Render Benchmark
+Versions per second from rendering already analyzed posts one at a time,
+the way generate_multiple does after its analysis, against one
+render_analyzed call for the same posts, on a seeded synthetic corpus.
+
+Both sides start from the same analyses, so only the per version work
+render_batch speeds up is timed. The "with analysis" row adds the warm
+analysis cache lookup that both generate_multiple and render_batch pay
+once per post, which narrows the gap.
+
+Run from the Assets folder:
+python benchmarks/bench_batch_render.py
+python benchmarks/bench_batch_render.py --posts 10000 --count 20
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from corpus import generate_corpus
+
+import proposal_generator_web as web
+from batch_render import analyze_posts, render_analyzed, render_batch
+from compact_variants import VariantSet
+from result_cache import AnalysisCache
+
+
+def make_posts(count, seed):
+    posts = []
+    for i, post in enumerate(generate_corpus(count, seed=seed)):
+        posts.append({
+            "id": post["id"],
+            "job_description": post["text"],
+            "experience": "built a list of 500 SaaS founders" if i % 3 == 0 else None,
+            "name": "Sam" if i % 2 else None
+        })
+    return posts
+
+
+def loop_analyzed(analyzed, count):
+    """generate_multiple's picking and rendering, one post at a time"""
+    templates = web.TEMPLATE_STORE.current()
+    rng = random.Random(1)
+    versions = 0
+    for post_id, job_type, main_task, experience, name in analyzed:
+        choices = web.sample_choices(web.section_sizes(templates, job_type, experience), count, rng)
+        variants = VariantSet(templates.version, job_type, main_task, choices)
+        versions += len(web.render_variants(variants, templates, experience, name))
+    return versions
+
+
+def loop(posts, count):
+    versions = 0
+    for post in posts:
+        versions += len(web.generate_multiple(post["job_description"], post["experience"], post["name"], count, seed=1))
+    return versions
+
+
+def timed(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        versions = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return versions, best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare render_batch with rendering one post at a time")
+    parser.add_argument("--posts", type=int, default=2000)
+    parser.add_argument("--count", type=int, default=20, help="versions per post")
+    parser.add_argument("--repeat", type=int, default=3, help="best of this many runs")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    posts = make_posts(args.posts, args.seed)
+    # Room for every post, so the timed runs never analyze again
+    web.ANALYSIS_CACHE = AnalysisCache(maxsize=args.posts)
+    analyzed = analyze_posts(posts)
+
+    cases = [
+        ("versions", lambda: loop_analyzed(analyzed, args.count),
+         lambda: len(render_analyzed(analyzed, args.count, 1))),
+        ("with analysis", lambda: loop(posts, args.count), lambda: len(render_batch(posts, args.count, 1))),
+    ]
+
+    print(f"{args.posts} posts x {args.count} versions, best of {args.repeat}")
+    print(f"{'':<14} {'loop v/s':>12} {'batch v/s':>12} {'speedup':>8}")
+    for name, loop_case, batch_case in cases:
+        loop_versions, loop_seconds = timed(loop_case, args.repeat)
+        batch_versions, batch_seconds = timed(batch_case, args.repeat)
+        loop_rate = loop_versions / loop_seconds
+        batch_rate = batch_versions / batch_seconds
+        print(f"{name:<14} {loop_rate:>12,.0f} {batch_rate:>12,.0f} {batch_rate / loop_rate:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Keyword Matcher Benchmark
+Compares the compiled matcher against the old per keyword substring scan
+on descriptions of growing length, of two kinds:
+
+- "corpus": topic, filler and quantity sentences from the synthetic
+  corpus, so keywords come and go the way they do in real posts
+- "spread": filler with every keyword of the table scattered evenly, the
+  worst case for the matcher. The substring scans stop at the first hit
+  of each keyword, and here every keyword hits early; the matcher reads
+  the whole text and also checks word boundaries, which a scan stopping
+  at a substring hit ("va" in "valuable") cannot.
+
+The generators clip descriptions to MAX_CHARS (20,000 characters) before
+matching, so longer rows are marked and only show the trend.
+
+Run from the Assets folder:
+python benchmarks/bench_keyword_matcher.py
+"""
+
+import os
+import random
+import sys
+import timeit
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from corpus import CATEGORIES, make_post
+
+from feature_extractor import MAX_CHARS
+from upwork_proposal_generator import UpworkProposalGenerator
+from proposal_generator_web import JOB_KEYWORDS, KEYWORD_MATCHER
+
+FILLER = (
+    "We are a growing team looking for a reliable freelancer to help us with an "
+    "ongoing project. The work is valuable to us and we expect clear communication, "
+    "attention to detail and on time delivery. Please describe your process."
+).split()
+
+
+def substring_scores(table, text):
+    """The original detection: one substring scan per keyword"""
+    text = text.lower()
+    return {k: sum(1 for word in v if word in text) for k, v in table.items()}
+
+
+def spread_description(table, words, rng):
+    keywords = [k for v in table.values() for k in v]
+    out = []
+    while len(out) < words:
+        out.append(rng.choice(keywords) if rng.random() < 0.005 else rng.choice(FILLER))
+    return " ".join(out)
+
+
+def corpus_description(table, words, rng):
+    # Corpus posts stop at MAX_CHARS, so long descriptions join several
+    parts = []
+    count = 0
+    while count < words:
+        part = make_post(rng, min(words - count, 2000), [rng.choice(CATEGORIES)], 0.3)
+        parts.append(part)
+        count += part.count(" ") + 1
+    return " ".join(parts)
+
+
+def run(name, table, matcher, sizes, rng):
+    print(f"\n{name}")
+    print(f"{'text':>7} {'words':>7} {'chars':>8} {'substring us':>14} {'matcher us':>12} {'speedup':>8}")
+    for kind, make in (("corpus", corpus_description), ("spread", spread_description)):
+        for words in sizes:
+            text = make(table, words, rng)
+            number = max(20, 20000 // words)
+            old = min(timeit.repeat(lambda: substring_scores(table, text), number=number, repeat=3)) / number
+            new = min(timeit.repeat(lambda: matcher.scores(text), number=number, repeat=3)) / number
+            note = "  (longer than MAX_CHARS, clipped in use)" if len(text) > MAX_CHARS else ""
+            print(f"{kind:>7} {len(text.split()):>7} {len(text):>8} {old * 1e6:>14.1f} {new * 1e6:>12.1f} "
+                  f"{old / new:>7.2f}x{note}")
+
+
+def main():
+    rng = random.Random(42)
+    sizes = [50, 500, 3000, 10000]
+
+    generator = UpworkProposalGenerator()
+    run("CLI skills table", generator.skills, generator.skill_matcher, sizes, rng)
+
+    run("Web keywords table", JOB_KEYWORDS, KEYWORD_MATCHER, sizes, rng)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""
+Pipeline Benchmark
+Times every stage of proposal generation for the CLI class and the web
+functions on a seeded synthetic corpus, writes the numbers as JSON and
+fails when a stage got slower than a stored baseline allows.
+
+Run from the Assets folder:
+python benchmarks/bench_pipeline.py                      # compare with baseline.json
+python benchmarks/bench_pipeline.py --save-baseline      # record a new baseline
+python benchmarks/bench_pipeline.py --output results.json --threshold 0.2
+
+Exit code is 1 when any stage regressed. Baselines are machine specific,
+so record one on the machine that runs the comparison.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+from collections import namedtuple
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from corpus import generate_corpus
+
+from upwork_proposal_generator import UpworkProposalGenerator
+import proposal_generator_web as web
+
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+
+# A stage is slower than baseline when its metric grows by more than this share
+DEFAULT_THRESHOLD = 0.25
+
+# prepare(text) runs untimed and returns the arguments for call
+Stage = namedtuple("Stage", ["name", "prepare", "call"])
+
+
+def build_stages():
+    generator = UpworkProposalGenerator()
+    experience = "I entered 5,000 product records for an online store last year."
+
+    def cold(cache):
+        # Empty the analysis cache so every call does the full work
+        def prepare(text):
+            cache.clear()
+            return (text,)
+        return prepare
+
+    def analyzed(text):
+        job_type, info = generator._analyze(text)
+        return job_type, info, experience, "Alex"
+
+    def web_analyzed(text):
+        job_type, main_task = web._analyze(text)
+        return web.TEMPLATE_STORE.current(), job_type, main_task, (0, 0, 0, 0), experience, "Alex"
+
+    def warm(text):
+        web.analyze_description(text)
+        return (text,)
+
+    return [
+        Stage("cli.detect_job_type", lambda text: (text,), generator.detect_job_type),
+        Stage("cli.extract_key_info", lambda text: (text,), generator.extract_key_info),
+        Stage("cli.build_proposal", analyzed, generator.build_proposal),
+        Stage("cli.generate_proposal", cold(generator.analysis_cache),
+              lambda text: generator.generate_proposal(text, experience, "Alex")),
+        Stage("web.detect_job_type", lambda text: (text,), web.detect_job_type),
+        Stage("web.extract_main_task", lambda text: (text,), web.extract_main_task),
+        Stage("web.render_proposal", web_analyzed, web.render_proposal),
+        Stage("web.generate_proposal", cold(web.ANALYSIS_CACHE),
+              lambda text: web.generate_proposal(text, experience, "Alex")),
+        Stage("web.generate_multiple", cold(web.ANALYSIS_CACHE),
+              lambda text: web.generate_multiple(text, experience, "Alex", seed=0)),
+        Stage("web.generate_multiple.cached", warm,
+              lambda text: web.generate_multiple(text, experience, "Alex", seed=0)),
+    ]
+
+
+def percentile(sorted_values, fraction):
+    """Nearest rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(timings, chars):
+    """Latency percentiles in microseconds and throughput for one stage"""
+    timings = sorted(timings)
+    total = sum(timings)
+    return {
+        "calls": len(timings),
+        "total_s": round(total, 6),
+        "ops_per_s": round(len(timings) / total, 1) if total else 0.0,
+        "mb_per_s": round(chars / total / 1e6, 3) if total else 0.0,
+        "mean_us": round(total / len(timings) * 1e6, 2),
+        "p50_us": round(percentile(timings, 0.50) * 1e6, 2),
+        "p95_us": round(percentile(timings, 0.95) * 1e6, 2),
+        "p99_us": round(percentile(timings, 0.99) * 1e6, 2),
+        "max_us": round(timings[-1] * 1e6, 2),
+    }
+
+
+def run_stage(stage, texts, repeat):
+    clock = time.perf_counter
+    timings = []
+    # Warm up imports, caches and branch predictors on a few posts
+    for text in texts[:5]:
+        stage.call(*stage.prepare(text))
+
+    for _ in range(repeat):
+        for text in texts:
+            args = stage.prepare(text)
+            start = clock()
+            stage.call(*args)
+            timings.append(clock() - start)
+    return summarize(timings, sum(len(text) for text in texts) * repeat)
+
+
+def run(posts=300, seed=0, keyword_density=0.3, repeat=3, only=None):
+    random.seed(seed)
+    corpus = generate_corpus(posts, seed=seed, keyword_density=keyword_density)
+    texts = [post["text"] for post in corpus]
+
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "posts": posts,
+            "seed": seed,
+            "keyword_density": keyword_density,
+            "repeat": repeat,
+            "corpus_chars": sum(len(text) for text in texts),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "stages": {},
+    }
+    for stage in build_stages():
+        if only and not any(name in stage.name for name in only):
+            continue
+        results["stages"][stage.name] = run_stage(stage, texts, repeat)
+    return results
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD, metric="p50_us"):
+    """Return (stage, baseline value, current value, change) for every regression"""
+    regressions = []
+    for name, current in results["stages"].items():
+        before = baseline.get("stages", {}).get(name)
+        if not before or not before.get(metric):
+            continue
+        change = current[metric] / before[metric] - 1
+        if change > threshold:
+            regressions.append((name, before[metric], current[metric], change))
+    return regressions
+
+
+def print_report(results, baseline=None, metric="p50_us"):
+    print(f"\n{'stage':<32} {'ops/s':>10} {'MB/s':>8} {'p50 us':>10} {'p95 us':>10} {'p99 us':>10} {'vs base':>9}")
+    for name, stats in results["stages"].items():
+        change = ""
+        before = (baseline or {}).get("stages", {}).get(name)
+        if before and before.get(metric):
+            change = f"{(stats[metric] / before[metric] - 1) * 100:+.1f}%"
+        print(
+            f"{name:<32} {stats['ops_per_s']:>10.1f} {stats['mb_per_s']:>8.2f} {stats['p50_us']:>10.1f} "
+            f"{stats['p95_us']:>10.1f} {stats['p99_us']:>10.1f} {change:>9}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark every proposal generation stage")
+    parser.add_argument("--posts", type=int, default=300, help="posts in the synthetic corpus")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--keyword-density", type=float, default=0.3,
+                        help="share of sentences that name the job's category")
+    parser.add_argument("--repeat", type=int, default=3, help="passes over the corpus per stage")
+    parser.add_argument("--stage", action="append", help="only run stages whose name contains this")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown before failing, 0.25 = 25%%")
+    parser.add_argument("--metric", default="p50_us", choices=["mean_us", "p50_us", "p95_us", "p99_us"])
+    args = parser.parse_args(argv)
+
+    results = run(args.posts, args.seed, args.keyword_density, args.repeat, args.stage)
+
+    baseline = None
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    print(f"{results['meta']['posts']} posts, {results['meta']['corpus_chars']:,} chars, seed {args.seed}")
+    print_report(results, baseline, args.metric)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+        return 0
+
+    if baseline is None:
+        print("\nNo baseline to compare with, run with --save-baseline first")
+        return 0
+    if (baseline["meta"]["posts"], baseline["meta"]["seed"]) != (args.posts, args.seed):
+        print("\nWarning: baseline used a different corpus, comparison is rough")
+
+    regressions = compare(results, baseline, args.threshold, args.metric)
+    if regressions:
+        print(f"\nREGRESSION: {len(regressions)} stage(s) over {args.threshold:.0%} slower ({args.metric})")
+        for name, before, current, change in regressions:
+            print(f"  {name}: {before:.1f} -> {current:.1f} us ({change:+.0%})")
+        return 1
+    print(f"\nNo stage regressed more than {args.threshold:.0%} ({args.metric})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
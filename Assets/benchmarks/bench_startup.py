@@ -0,0 +1,127 @@
+"""
+Startup Benchmark
+Measures what a short run pays before it does any work: import time of
+the entry modules (from python -X importtime) and the wall time of a cold
+one-post CLI run, with the rule snapshot in place and with it turned off.
+Every run is a fresh interpreter, so nothing is shared between samples.
+
+Run from the Assets folder:
+python benchmarks/bench_startup.py
+python benchmarks/bench_startup.py --runs 20 --output startup.json
+python benchmarks/bench_startup.py --budget-ms 100
+
+Exit code is 1 when the median one-post CLI run with the snapshot takes
+longer than --budget-ms.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ASSETS_DIR = os.path.dirname(BENCH_DIR)
+
+ENTRY_MODULES = ["upwork_proposal_generator", "batch_generate", "proposal_generator_web"]
+
+# Post, two blank lines, no experience, no name, no second post
+ONE_POST_INPUT = (
+    "Looking for a virtual assistant to manage my calendar and email inbox.\n"
+    "About 10 hours a week, must know Google Sheets.\n\n\n\n\nn\n"
+)
+
+
+def run(args, env=None, stdin=None):
+    """Wall seconds and stderr of one fresh interpreter"""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable] + args, cwd=ASSETS_DIR, env=env, input=stdin,
+        capture_output=True, text=True
+    )
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"{' '.join(args)} failed:\n{result.stderr}")
+    return elapsed, result.stderr
+
+
+def import_times(module, snapshot_env):
+    """Cumulative import microseconds per module for a fresh import of module"""
+    _, stderr = run(["-X", "importtime", "-c", f"import {module}"], env=snapshot_env)
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def median_ms(samples):
+    return round(statistics.median(samples) * 1000, 1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import and cold start times")
+    parser.add_argument("--runs", type=int, default=10, help="fresh interpreters per measurement")
+    parser.add_argument("--top", type=int, default=8, help="slowest imports listed per module")
+    parser.add_argument("--output", help="write the numbers as JSON here")
+    parser.add_argument("--budget-ms", type=float, help="fail when a one-post run takes longer")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        snapshot_env = dict(os.environ, PROPOSAL_RULE_SNAPSHOT=os.path.join(temp_dir, "rules.marshal"))
+        no_snapshot_env = dict(os.environ, PROPOSAL_RULE_SNAPSHOT="0")
+
+        # The first run writes the snapshot the timed runs load
+        run(["upwork_proposal_generator.py"], env=snapshot_env, stdin=ONE_POST_INPUT)
+        run(["-c", "import proposal_generator_web"], env=snapshot_env)
+
+        report = {"python": sys.version.split()[0], "runs": args.runs, "imports": {}, "cold_start_ms": {}}
+
+        for module in ENTRY_MODULES:
+            times = import_times(module, snapshot_env)
+            slowest = sorted(times.items(), key=lambda item: item[1][0], reverse=True)[:args.top]
+            report["imports"][module] = {
+                "cumulative_ms": round(times[module][1] / 1000, 1),
+                "flask_imported": "flask" in times,
+                "slowest_self_ms": {name: round(self_us / 1000, 1) for name, (self_us, _) in slowest},
+            }
+
+        measurements = {
+            "interpreter": (["-c", "pass"], snapshot_env, None),
+            "cli_one_post": (["upwork_proposal_generator.py"], snapshot_env, ONE_POST_INPUT),
+            "cli_one_post_no_snapshot": (["upwork_proposal_generator.py"], no_snapshot_env, ONE_POST_INPUT),
+            "web_import": (["-c", "import proposal_generator_web"], snapshot_env, None),
+            "web_app": (["-c", "from proposal_generator_web import app"], snapshot_env, None),
+        }
+        for name, (command, env, stdin) in measurements.items():
+            samples = [run(command, env=env, stdin=stdin)[0] for _ in range(args.runs)]
+            report["cold_start_ms"][name] = median_ms(samples)
+
+    print(f"Python {report['python']}, median of {args.runs} fresh interpreters\n")
+    print("Cold start (wall ms)")
+    for name, value in report["cold_start_ms"].items():
+        print(f"  {name:<28} {value:>8.1f}")
+    print("\nImport time (ms)")
+    for module, numbers in report["imports"].items():
+        flask_note = ", imports flask" if numbers["flask_imported"] else ""
+        print(f"  {module:<28} {numbers['cumulative_ms']:>8.1f}{flask_note}")
+        for name, self_ms in numbers["slowest_self_ms"].items():
+            print(f"    {name:<26} {self_ms:>8.1f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.budget_ms and report["cold_start_ms"]["cli_one_post"] > args.budget_ms:
+        print(f"\nOne-post CLI run over budget: {report['cold_start_ms']['cli_one_post']} ms > {args.budget_ms} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
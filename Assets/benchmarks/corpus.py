@@ -0,0 +1,148 @@
+"""
+Synthetic Job Post Corpus
+Seeded generator of realistic looking Upwork job posts for benchmarks and
+load tests. The same seed always gives the same posts.
+
+Posts vary in length (one line up to 20 KB pastes), category mix and
+keyword density.
+"""
+
+import random
+
+CATEGORIES = ["data_entry", "virtual_assistant", "web_research", "data_annotation"]
+
+# Sentences that point at one category
+CATEGORY_SENTENCES = {
+    "data_entry": [
+        "We need someone to handle data entry from scanned invoices into our Excel spreadsheet.",
+        "The job is mostly typing product details into a web form.",
+        "You will copy information from PDF files into a Google Sheets template.",
+        "Transcription of short handwritten notes is also part of the work.",
+        "Accuracy matters more than speed for this data entry project.",
+        "Please migrate our old customer records into the new spreadsheet.",
+    ],
+    "virtual_assistant": [
+        "We are looking for a virtual assistant to manage email and calendar scheduling.",
+        "The assistant will handle administrative tasks for our small team.",
+        "Daily admin work includes answering email and booking meetings.",
+        "You will support the founder with scheduling and travel planning.",
+        "Our last assistant kept the inbox at zero and we want the same.",
+        "Some customer support over email may be needed during busy weeks.",
+    ],
+    "web_research": [
+        "We need B2B lead research for software companies in North America.",
+        "Find email addresses and LinkedIn profiles for each contact.",
+        "List building experience with Apollo or ZoomInfo is a plus.",
+        "The research should cover company size, industry and decision makers.",
+        "Light web scraping is fine as long as every contact is verified.",
+        "Deliver the lead list with one contact per row.",
+    ],
+    "data_annotation": [
+        "We need image annotation for a machine learning dataset.",
+        "Draw a bounding box around every vehicle and label its type.",
+        "Text tagging for AI training data, following our guidelines.",
+        "Annotate customer reviews with sentiment and topic labels.",
+        "Consistency between labels is checked on a sample of every batch.",
+        "Experience with annotation tools for computer vision is preferred.",
+    ],
+}
+
+QUANTITY_SENTENCES = [
+    "There are about {n} records to process.",
+    "We need {n} leads in total.",
+    "The sheet has {n} rows right now.",
+    "Expect around {n}-{m} items per week.",
+    "Target is {k}k contacts by the end of the month.",
+]
+
+URGENCY_SENTENCES = [
+    "This is urgent and needs to start ASAP.",
+    "We need it done quickly, ideally today.",
+    "Please apply only if you can start immediately.",
+]
+
+FILLER_SENTENCES = [
+    "We are a growing company and value clear communication.",
+    "Please describe your process in your proposal.",
+    "Long term work is possible for the right freelancer.",
+    "Attention to detail and on time delivery are important to us.",
+    "We will share detailed instructions after hiring.",
+    "Our team works in US Eastern time but we are flexible.",
+    "Tell us about a similar project you completed before.",
+    "The budget is fixed but we pay bonuses for great work.",
+    "We prefer someone who asks questions when something is unclear.",
+    "Weekly updates on progress are expected.",
+]
+
+# (name, words low, words high, weight)
+LENGTH_BUCKETS = [
+    ("line", 6, 20, 0.15),
+    ("short", 40, 150, 0.40),
+    ("medium", 300, 800, 0.30),
+    ("paste", 1500, 3300, 0.15),
+]
+
+# Posts longer than this are trimmed, matching the biggest pastes we see
+MAX_CHARS = 20000
+
+
+def _pick_category(rng, mix):
+    """None for a post with no clear category, else one or two categories"""
+    roll = rng.random()
+    if roll < mix.get("none", 0.0):
+        return []
+    if roll < mix.get("none", 0.0) + mix.get("mixed", 0.0):
+        return rng.sample(CATEGORIES, 2)
+    return [rng.choice(CATEGORIES)]
+
+
+def make_post(rng, words, categories, keyword_density):
+    """One post of about words words; keyword_density is the share of topic sentences"""
+    sentences = []
+    if categories:
+        sentences.append(rng.choice(CATEGORY_SENTENCES[categories[0]]))
+    count = 0
+    while count < words:
+        roll = rng.random()
+        if categories and roll < keyword_density:
+            sentence = rng.choice(CATEGORY_SENTENCES[rng.choice(categories)])
+        elif roll < keyword_density + 0.05:
+            n = rng.choice([50, 200, 500, 1000, 2500])
+            sentence = rng.choice(QUANTITY_SENTENCES).format(n=n, m=n * 2, k=rng.randint(1, 20))
+        elif roll < keyword_density + 0.08:
+            sentence = rng.choice(URGENCY_SENTENCES)
+        else:
+            sentence = rng.choice(FILLER_SENTENCES)
+        sentences.append(sentence)
+        count += sentence.count(" ") + 1
+
+    text = " ".join(sentences)
+    # Real pastes keep their paragraph breaks
+    if len(sentences) > 6:
+        text = text.replace(". We ", ".\n\nWe ")
+    return text[:MAX_CHARS]
+
+
+def generate_corpus(count, seed=0, keyword_density=0.3, mix=None, buckets=LENGTH_BUCKETS):
+    """Return count post dicts with id, text, categories and length bucket
+
+    mix gives the share of posts with no category ("none") and with two
+    ("mixed"); the rest get one.
+    """
+    rng = random.Random(seed)
+    mix = {"none": 0.1, "mixed": 0.2} if mix is None else mix
+    weights = [bucket[3] for bucket in buckets]
+
+    posts = []
+    for i in range(count):
+        name, low, high, _ = rng.choices(buckets, weights)[0]
+        categories = _pick_category(rng, mix)
+        text = make_post(rng, rng.randint(low, high), categories, keyword_density)
+        posts.append({"id": i, "text": text, "categories": categories, "bucket": name})
+    return posts
+
+
+if __name__ == "__main__":
+    for post in generate_corpus(8, seed=1):
+        print(f"--- {post['bucket']} {post['categories']} {len(post['text'])} chars")
+        print(post["text"][:300])
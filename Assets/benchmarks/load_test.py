@@ -0,0 +1,226 @@
+"""
+Load Test
+Simulates reviewers using the web page: each one loads the form, pastes a
+job post and submits it, over and over. Reports throughput and p50/p95/p99
+latency per request, and splits POST time into near duplicate lookup,
+generation and page rendering using the Server-Timing header.
+
+Run from the Assets folder:
+python benchmarks/load_test.py --reviewers 8 --duration 10
+python benchmarks/load_test.py --url http://127.0.0.1:5000 --reviewers 32
+
+Without --url the app runs in this process through Flask's test client.
+That measures the app alone, and threads share one GIL, so use --url
+against serve.py to size a deployment.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlencode, urlsplit
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from corpus import generate_corpus
+
+EXPERIENCE = "I entered 5,000 product records for an online store last year."
+
+
+class InProcessClient:
+    """Flask test client, one per reviewer thread."""
+
+    def __init__(self):
+        from proposal_generator_web import app
+        self.client = app.test_client()
+
+    def get(self, path):
+        response = self.client.get(path)
+        return response.status_code, response.headers.get("Server-Timing", "")
+
+    def post_form(self, path, form):
+        response = self.client.post(path, data=form)
+        return response.status_code, response.headers.get("Server-Timing", "")
+
+
+class SocketClient:
+    """HTTP over a real socket, reusing the connection when the server allows."""
+
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=60)
+
+    def _request(self, method, path, body=None, headers=None):
+        try:
+            self.connection.request(method, path, body=body, headers=headers or {})
+            response = self.connection.getresponse()
+        except (http.client.HTTPException, ConnectionError):
+            # The server closed a kept alive connection, try once on a new one
+            self.connection.close()
+            self.connection.request(method, path, body=body, headers=headers or {})
+            response = self.connection.getresponse()
+        response.read()
+        return response.status, response.getheader("Server-Timing", "")
+
+    def get(self, path):
+        return self._request("GET", path)
+
+    def post_form(self, path, form):
+        body = urlencode(form)
+        return self._request("POST", path, body, {"Content-Type": "application/x-www-form-urlencoded"})
+
+
+def parse_server_timing(header):
+    """{stage: milliseconds} from a Server-Timing header"""
+    stages = {}
+    for entry in header.split(","):
+        name, _, params = entry.strip().partition(";")
+        if params.startswith("dur="):
+            stages[name] = float(params[4:])
+    return stages
+
+
+class Recorder:
+    """Latencies per request kind and per server stage, shared by all reviewers."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.stages = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.duplicates = 0
+
+    def record(self, kind, seconds, status, timing):
+        stages = parse_server_timing(timing)
+        with self._lock:
+            if status >= 400:
+                self.errors[kind] += 1
+                return
+            self.latencies[kind].append(seconds * 1000)
+            for stage, ms in stages.items():
+                self.stages[f"{kind} {stage}"].append(ms)
+            if kind == "post" and "dedupe" in stages and "generate" not in stages:
+                self.duplicates += 1
+
+
+def reviewer(client, posts, offset, stride, recorder, deadline, think_time, max_iterations):
+    clock = time.perf_counter
+    i = offset
+    iterations = 0
+    while time.monotonic() < deadline and (max_iterations is None or iterations < max_iterations):
+        start = clock()
+        status, timing = client.get("/")
+        recorder.record("get", clock() - start, status, timing)
+
+        form = {"job_description": posts[i % len(posts)], "experience": EXPERIENCE, "name": "Alex"}
+        start = clock()
+        status, timing = client.post_form("/", form)
+        recorder.record("post", clock() - start, status, timing)
+
+        i += stride
+        iterations += 1
+        if think_time:
+            time.sleep(think_time)
+
+
+def summarize(values, elapsed=None):
+    from bench_pipeline import percentile
+    values = sorted(values)
+    summary = {
+        "count": len(values),
+        "p50_ms": round(percentile(values, 0.50), 3),
+        "p95_ms": round(percentile(values, 0.95), 3),
+        "p99_ms": round(percentile(values, 0.99), 3),
+        "max_ms": round(values[-1], 3) if values else 0.0,
+    }
+    if elapsed:
+        summary["per_s"] = round(len(values) / elapsed, 1)
+    return summary
+
+
+def run(reviewers=8, duration=10.0, url=None, posts=500, seed=0, think_time=0.0, iterations=None):
+    texts = [post["text"] for post in generate_corpus(posts, seed=seed)]
+    clients = [SocketClient(url) if url else InProcessClient() for _ in range(reviewers)]
+    recorder = Recorder()
+
+    deadline = time.monotonic() + duration
+    threads = [
+        threading.Thread(
+            target=reviewer,
+            args=(client, texts, n, reviewers, recorder, deadline, think_time, iterations)
+        )
+        for n, client in enumerate(clients)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    return {
+        "meta": {
+            "target": url or "in-process",
+            "reviewers": reviewers,
+            "elapsed_s": round(elapsed, 3),
+            "posts": posts,
+            "seed": seed,
+            "think_time_s": think_time,
+        },
+        "requests": {kind: summarize(values, elapsed) for kind, values in recorder.latencies.items()},
+        "server_stages": {stage: summarize(values) for stage, values in sorted(recorder.stages.items())},
+        "errors": dict(recorder.errors),
+        "duplicate_posts": recorder.duplicates,
+    }
+
+
+def print_report(results):
+    meta = results["meta"]
+    print(f"{meta['reviewers']} reviewers against {meta['target']} for {meta['elapsed_s']:.1f}s")
+    print(f"\n{'request':<20} {'count':>7} {'per s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for kind, stats in results["requests"].items():
+        print(
+            f"{kind:<20} {stats['count']:>7} {stats['per_s']:>8.1f} {stats['p50_ms']:>9.2f} "
+            f"{stats['p95_ms']:>9.2f} {stats['p99_ms']:>9.2f} {stats['max_ms']:>9.2f}"
+        )
+    print(f"\n{'server stage':<20} {'count':>7} {'':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for stage, stats in results["server_stages"].items():
+        print(
+            f"{stage:<20} {stats['count']:>7} {'':>8} {stats['p50_ms']:>9.2f} "
+            f"{stats['p95_ms']:>9.2f} {stats['p99_ms']:>9.2f} {stats['max_ms']:>9.2f}"
+        )
+    if results["duplicate_posts"]:
+        print(f"\n{results['duplicate_posts']} posts were served from the near duplicate index")
+    if results["errors"]:
+        print(f"\nErrors: {results['errors']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the proposal generator web page")
+    parser.add_argument("--url", help="base URL of a running server, default is in process")
+    parser.add_argument("--reviewers", type=int, default=8, help="concurrent simulated reviewers")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to run")
+    parser.add_argument("--iterations", type=int, help="stop each reviewer after this many posts")
+    parser.add_argument("--think-time", type=float, default=0.0, help="seconds a reviewer waits between posts")
+    parser.add_argument("--posts", type=int, default=500,
+                        help="distinct posts, reused once exhausted (reuse hits the near duplicate index)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    results = run(args.reviewers, args.duration, args.url, args.posts, args.seed,
+                  args.think_time, args.iterations)
+    print_report(results)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 1 if results["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
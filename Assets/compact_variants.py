@@ -0,0 +1,192 @@
+"""
+Compact Variants
+The versions generated for one post, kept as the template choices that
+produced them plus the post's job type and main task instead of the full
+text. Three versions take under 200 bytes instead of about 3 KB, and
+render back to exactly the same text from the same template set.
+
+Experience and name belong to whoever asks, not to the post, so they are
+passed in when rendering. A set shared between requests (a repost) thus
+reads right for each of them.
+
+Strings are interned, so the versions of a post, and posts sharing a main
+task, hold one copy of each.
+
+fragment_sizes() and combination_sizes() give the word and character
+counts of every version a post could get without rendering any, so
+versions can be picked to fit a length budget.
+"""
+
+import struct
+import sys
+from array import array
+
+from template_store import text_size
+
+# Template choices per version: opener, experience, question, closing
+CHOICE_WIDTH = 4
+
+# Length prefix of each string in an encoded set
+_LENGTH = struct.Struct("<I")
+
+
+def experience_section(experience):
+    """Template section used for the experience paragraph"""
+    return "experience_with" if experience and experience.strip() else "experience_without"
+
+
+def clean_value(value):
+    """Stripped and interned text, or None for missing or blank values"""
+    if value is None or not value.strip():
+        return None
+    return sys.intern(value.strip())
+
+
+def render_text(templates, job_type, main_task, choice, experience=None, name=None):
+    """Proposal text from (opener, experience, question, closing) indices
+
+    The experience index wraps around, so choices made for a post with (or
+    without) experience still render for a repost filled in the other way.
+    """
+    opener_i, exp_i, question_i, closing_i = choice
+    experience_templates = templates.get(job_type, experience_section(experience))
+    name = clean_value(name)
+    values = {
+        "main_task": main_task,
+        "experience": clean_value(experience),
+        "name": name
+    }
+
+    parts = [
+        templates.get(job_type, "openers")[opener_i].render(values),
+        experience_templates[exp_i % len(experience_templates)].render(values),
+        templates.get(job_type, "questions")[question_i].render(values),
+        templates.get(job_type, "closings")[closing_i].render(values)
+    ]
+    if name:
+        parts.append(name)
+
+    return "\n\n".join(parts)
+
+
+def fragment_sizes(templates, job_type, main_task, experience=None, name=None):
+    """(words, chars) of every opener, experience, question and closing once
+    filled in for this post, and of the name line (None without a name)"""
+    name = clean_value(name)
+    experience = clean_value(experience)
+    value_sizes = {"main_task": text_size(main_task)}
+    if experience:
+        value_sizes["experience"] = text_size(experience)
+    if name:
+        value_sizes["name"] = text_size(name)
+
+    sections = [
+        [template.size(value_sizes) for template in templates.get(job_type, section)]
+        for section in ("openers", experience_section(experience), "questions", "closings")
+    ]
+    return sections, (value_sizes["name"][:2] if name else None)
+
+
+def combination_sizes(sections, name_size=None):
+    """Words and characters of every combination of the sections' fragments
+
+    Combinations are numbered with the last section counting fastest, the
+    order sample_choices uses. Sizes come from fragment_sizes(), so nothing
+    is rendered. Paragraphs are joined by a blank line, which never merges
+    words, so a proposal's words are the sum of its paragraphs' words.
+    """
+    words, chars = name_size or (0, 0)
+    pieces = len(sections) + (1 if name_size else 0)
+    # Two characters of "\n\n" between paragraphs
+    all_words = [words]
+    all_chars = [chars + 2 * (pieces - 1)]
+    for section in sections:
+        all_words = [total + size[0] for total in all_words for size in section]
+        all_chars = [total + size[1] for total in all_chars for size in section]
+    return all_words, all_chars
+
+
+class VariantSet:
+    """Template choices for the versions of one post."""
+
+    __slots__ = ("templates", "job_type", "main_task", "choices")
+
+    def __init__(self, templates, job_type, main_task, choices=()):
+        self.templates = sys.intern(templates)
+        self.job_type = sys.intern(job_type)
+        self.main_task = sys.intern(main_task)
+        # Four indices per version, back to back
+        self.choices = array("H")
+        for choice in choices:
+            self.add(choice)
+
+    def add(self, choice):
+        if len(choice) != CHOICE_WIDTH:
+            raise ValueError(f"a choice has {CHOICE_WIDTH} indices")
+        self.choices.extend(choice)
+
+    def __len__(self):
+        return len(self.choices) // CHOICE_WIDTH
+
+    def __iter__(self):
+        """Each version's (opener, experience, question, closing) indices"""
+        choices = self.choices
+        for start in range(0, len(choices), CHOICE_WIDTH):
+            yield tuple(choices[start:start + CHOICE_WIDTH])
+
+    def __eq__(self, other):
+        if not isinstance(other, VariantSet):
+            return NotImplemented
+        return all(getattr(self, slot) == getattr(other, slot) for slot in self.__slots__)
+
+    def texts(self, templates, experience=None, name=None):
+        """Rendered text of every version. templates must have this set's version."""
+        if templates.version != self.templates:
+            raise ValueError(f"variants were made with templates {self.templates}, not {templates.version}")
+        return [
+            render_text(templates, self.job_type, self.main_task, choice, experience, name)
+            for choice in self
+        ]
+
+    def to_bytes(self):
+        """Encoding for storage or transport"""
+        parts = []
+        for value in (self.templates, self.job_type, self.main_task):
+            encoded = value.encode("utf-8")
+            parts.append(_LENGTH.pack(len(encoded)))
+            parts.append(encoded)
+        choices = self.choices
+        if sys.byteorder == "big":
+            choices = array("H", choices)
+            choices.byteswap()
+        parts.append(choices.tobytes())
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data):
+        values, position = _read_fields(data)
+        variants = cls(*values)
+        variants.choices.frombytes(memoryview(data)[position:])
+        if sys.byteorder == "big":
+            variants.choices.byteswap()
+        return variants
+
+
+def _read_fields(data):
+    """Template version, job type and main task of an encoded set, and where its choices begin"""
+    data = memoryview(data)
+    position = 0
+    values = []
+    try:
+        for _ in range(3):
+            (length,) = _LENGTH.unpack_from(data, position)
+            position += _LENGTH.size
+            if position + length > len(data):
+                raise ValueError("truncated")
+            values.append(str(data[position:position + length], "utf-8"))
+            position += length
+    except (struct.error, ValueError):
+        raise ValueError("not an encoded VariantSet") from None
+    if (len(data) - position) % (CHOICE_WIDTH * 2):
+        raise ValueError("not an encoded VariantSet")
+    return values, position
@@ -0,0 +1,294 @@
+"""
+Experience Index
+A local library of past work snippets ("built a list of 500 SaaS founders
+with verified emails") searched with BM25, so the generator can fill in
+past experience for a post on its own.
+
+Stored in SQLite: a plain table holds the snippets, an FTS5 inverted index
+holds the postings of their stemmed words and a term table counts how many
+snippets hold each word. A search reads at most MAX_POSTINGS postings for
+each of the post's words, adds up their IDF per snippet and scores the
+best candidates with BM25. Adding a snippet updates all three in place,
+and the file is memory mapped, so opening a library with tens of thousands
+of snippets is instant and a search takes milliseconds.
+
+Usage:
+python experience_index.py add library.db "Built a 2,000 row lead list for a SaaS startup"
+python experience_index.py import library.db snippets.txt
+python experience_index.py search library.db "Need B2B leads with verified emails"
+"""
+
+import argparse
+import math
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+
+from keyword_matcher import normalize
+
+# Bytes of the file SQLite may map into memory
+MMAP_SIZE = 256 * 1024 * 1024
+
+# Words from a post used in one search, rarest in the library first
+QUERY_TERMS = 12
+
+# Postings read per search word. A word held by more snippets only counts
+# for the oldest this many, which keeps a search a few milliseconds however
+# large the library grows; such common words weigh little in BM25 anyway.
+MAX_POSTINGS = 5000
+
+# Candidates with the highest summed IDF that are scored with full BM25
+RERANK = 50
+
+# BM25 parameters, the same as FTS5's bm25()
+K1 = 1.2
+B = 0.75
+
+# best() only suggests a snippet sharing this many words with the post and
+# scoring at least MIN_SCORE, so one common word is never enough
+MIN_SHARED_TERMS = 2
+MIN_SCORE = 3.0
+
+# Words that say nothing about the kind of work
+STOPWORDS = frozenset(
+    "a about above after again all also am an and any are as at be been being but by can "
+    "could did do does doing done for from get had has have having he her here him his how "
+    "i if in into is it its just let like looking me more most must my need needed needs "
+    "new no not now of on one only or other our out over please project re she should so "
+    "some someone such than that the their them then there these they this those through "
+    "to too up us very want was we well were what when where which while who will with "
+    "work would you your".split()
+)
+
+_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS experience ("
+    " id INTEGER PRIMARY KEY, text TEXT NOT NULL UNIQUE, tags TEXT NOT NULL DEFAULT '', added REAL NOT NULL)",
+    # Snippets per term, to pick the rare words of a post before searching
+    "CREATE TABLE IF NOT EXISTS experience_terms (term TEXT PRIMARY KEY, docs INTEGER NOT NULL) WITHOUT ROWID",
+    "CREATE TABLE IF NOT EXISTS experience_stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)",
+    # Contentless: only the inverted index is kept, the text lives in experience
+    "CREATE VIRTUAL TABLE IF NOT EXISTS experience_fts USING fts5("
+    " terms, content='', tokenize='unicode61 remove_diacritics 2')",
+]
+
+
+def stem(word):
+    """Strip one inflection so "labeling", "labeled" and "labels" become "label"
+
+    A suffix is only cut when at least three letters remain.
+    """
+    for suffix in ("ing", "ed", "es", "s"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)]
+    return word
+
+
+def terms(text):
+    """Stemmed meaningful words of text, in order"""
+    return [
+        stem(word) for word in normalize(text).decode("utf-8", "ignore").split()
+        if len(word) > 2 and word not in STOPWORDS and not word.isdigit()
+    ]
+
+
+class ExperienceIndex:
+    """Past work snippets with BM25 search. Safe to share between threads."""
+
+    def __init__(self, path, mmap_size=MMAP_SIZE):
+        self.path = path
+        self.mmap_size = mmap_size
+        self._lock = threading.Lock()
+        self._connection = None
+        self._connection_pid = None
+        # Create the file and tables up front so errors show at startup
+        self._db
+
+    @property
+    def _db(self):
+        """Connection for this process. Connections must not cross a fork."""
+        if self._connection_pid != os.getpid():
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+            # Several web workers may read while one adds a snippet
+            connection.execute("PRAGMA journal_mode = WAL")
+            for statement in _SCHEMA:
+                connection.execute(statement)
+            connection.commit()
+            self._connection = connection
+            self._connection_pid = os.getpid()
+        return self._connection
+
+    def __len__(self):
+        with self._lock:
+            row = self._db.execute("SELECT value FROM experience_stats WHERE name = 'snippets'").fetchone()
+        return row[0] if row else 0
+
+    def add(self, text, tags=""):
+        """Store a snippet and index it. Returns its id, or None for a repeat."""
+        return self.add_many([(text, tags)])[0]
+
+    def add_many(self, snippets):
+        """Store (text, tags) pairs or plain texts in one transaction"""
+        ids = []
+        now = time.time()
+        with self._lock:
+            db = self._db
+            with db:
+                for snippet in snippets:
+                    text, tags = (snippet, "") if isinstance(snippet, str) else snippet
+                    text = " ".join(text.split())
+                    tags = tags or ""
+                    if not text:
+                        ids.append(None)
+                        continue
+                    cursor = db.execute(
+                        "INSERT OR IGNORE INTO experience (text, tags, added) VALUES (?, ?, ?)",
+                        (text, tags, now)
+                    )
+                    if cursor.rowcount == 0:
+                        ids.append(None)
+                        continue
+                    self._index(db, cursor.lastrowid, text, tags, 1)
+                    ids.append(cursor.lastrowid)
+        return ids
+
+    def remove(self, snippet_id):
+        with self._lock:
+            db = self._db
+            with db:
+                row = db.execute("SELECT text, tags FROM experience WHERE id = ?", (snippet_id,)).fetchone()
+                if row is None:
+                    return False
+                self._index(db, snippet_id, row[0], row[1], -1)
+                db.execute("DELETE FROM experience WHERE id = ?", (snippet_id,))
+        return True
+
+    def _index(self, db, snippet_id, text, tags, change):
+        """Add (change=1) or drop (change=-1) a snippet from the index and counts"""
+        words = terms(text + " " + tags)
+        if change > 0:
+            db.execute("INSERT INTO experience_fts (rowid, terms) VALUES (?, ?)", (snippet_id, " ".join(words)))
+        else:
+            # A contentless index is told exactly what to take out
+            db.execute(
+                "INSERT INTO experience_fts (experience_fts, rowid, terms) VALUES ('delete', ?, ?)",
+                (snippet_id, " ".join(words))
+            )
+        db.executemany(
+            "INSERT INTO experience_terms (term, docs) VALUES (?, ?)"
+            " ON CONFLICT (term) DO UPDATE SET docs = docs + excluded.docs",
+            [(word, change) for word in set(words)]
+        )
+        db.executemany(
+            "INSERT INTO experience_stats (name, value) VALUES (?, ?)"
+            " ON CONFLICT (name) DO UPDATE SET value = value + excluded.value",
+            [("snippets", change), ("terms", change * len(words))]
+        )
+
+    def _query_terms(self, db, job_description):
+        """(word, snippets holding it) for the post's rarest words in the library"""
+        candidates = [word for word, _ in Counter(terms(job_description)).most_common(256)]
+        if not candidates:
+            return []
+        placeholders = ",".join("?" * len(candidates))
+        found = db.execute(
+            f"SELECT term, docs FROM experience_terms WHERE term IN ({placeholders}) AND docs > 0",
+            candidates
+        ).fetchall()
+        found.sort(key=lambda row: row[1])
+        return found[:QUERY_TERMS]
+
+    def _matches(self, job_description, limit):
+        """[(id, text, score, shared words)] best first"""
+        with self._lock:
+            db = self._db
+            words = self._query_terms(db, job_description)
+            if not words:
+                return []
+            stats = dict(db.execute("SELECT name, value FROM experience_stats").fetchall())
+            snippets = max(stats.get("snippets", 0), 1)
+            weights = {}
+            candidates = {}
+            for term, docs in words:
+                weight = weights[term] = math.log(1 + (snippets - docs + 0.5) / (docs + 0.5))
+                get = candidates.get
+                for (snippet_id,) in db.execute(
+                    "SELECT rowid FROM experience_fts WHERE experience_fts MATCH ? LIMIT ?",
+                    (f'"{term}"', MAX_POSTINGS)
+                ):
+                    candidates[snippet_id] = get(snippet_id, 0.0) + weight
+            best = sorted(candidates, key=candidates.get, reverse=True)[:max(RERANK, limit)]
+            placeholders = ",".join("?" * len(best))
+            rows = db.execute(
+                f"SELECT id, text, tags FROM experience WHERE id IN ({placeholders})", best
+            ).fetchall()
+        # Full BM25 over every search word for the candidates
+        average = stats.get("terms", 0) / snippets or 1.0
+        results = []
+        for snippet_id, text, tags in rows:
+            counts = Counter(terms(text + " " + tags))
+            length = sum(counts.values()) / average
+            score = 0.0
+            shared = 0
+            for term, weight in weights.items():
+                count = counts.get(term, 0)
+                if count:
+                    shared += 1
+                    score += weight * count * (K1 + 1) / (count + K1 * (1 - B + B * length))
+            results.append((snippet_id, text, score, shared))
+        results.sort(key=lambda row: (-row[2], row[0]))
+        return results[:limit]
+
+    def search(self, job_description, limit=5):
+        """[(id, text, score)] best first; a higher score is a better match"""
+        return [row[:3] for row in self._matches(job_description, limit)]
+
+    def best(self, job_description, min_score=MIN_SCORE, min_shared=MIN_SHARED_TERMS):
+        """Text of the most relevant snippet, or None when nothing fits"""
+        for snippet_id, text, score, shared in self._matches(job_description, RERANK):
+            if score < min_score:
+                break
+            if shared >= min_shared:
+                return text
+        return None
+
+    def optimize(self):
+        """Merge index segments after a large import"""
+        with self._lock:
+            db = self._db
+            with db:
+                db.execute("INSERT INTO experience_fts (experience_fts) VALUES ('optimize')")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the past experience library")
+    parser.add_argument("command", choices=["add", "import", "search"])
+    parser.add_argument("library", help="SQLite file holding the snippets")
+    parser.add_argument("text", help="snippet to add, file to import (one per line) or post to search for")
+    parser.add_argument("--limit", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    index = ExperienceIndex(args.library)
+    if args.command == "add":
+        snippet_id = index.add(args.text)
+        print(f"Added snippet {snippet_id}" if snippet_id else "Already in the library")
+    elif args.command == "import":
+        with open(args.text, encoding="utf-8") as f:
+            ids = index.add_many(line for line in f if line.strip())
+        index.optimize()
+        print(f"Added {sum(1 for i in ids if i)} snippets, {len(index)} in the library")
+    else:
+        start = time.perf_counter()
+        results = index.search(args.text, args.limit)
+        elapsed = (time.perf_counter() - start) * 1000
+        for snippet_id, text, score in results:
+            print(f"{score:7.2f}  [{snippet_id}] {text}")
+        print(f"{len(results)} results in {elapsed:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
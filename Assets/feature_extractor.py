@@ -0,0 +1,198 @@
+"""
+Feature Extractor
+Pulls the main task, quantity, deliverable, tools and urgency out of a job
+description in one left to right pass with precompiled patterns, stopping
+as soon as every field is settled or max_chars have been read. Tools are
+settled only by the first one in TOOLS, since any other could still be
+outranked later in the text.
+
+extract_task() finds just the main task and stops at its sentence end.
+"""
+
+import re
+
+TOOLS = ["excel", "google sheets", "airtable", "notion", "salesforce", "hubspot", "linkedin", "apollo", "zoominfo"]
+
+URGENCY_WORDS = ["asap", "urgent", "immediately", "quickly", "fast", "today"]
+
+QUANTITY_UNITS = ["leads?", "contacts?", "entries", "entry", "rows?", "records?", "items?", "emails?", "names?", "companies", "company", "data points?"]
+
+# Sentences this short are headings or fragments, not the main task
+MIN_TASK_LENGTH = 20
+
+# Text is scanned in blocks of about this many characters
+BLOCK_SIZE = 2048
+
+# Characters of a description analyzed at most. Real posts are a few
+# thousand characters; past this is a pasted document whose tail would
+# only cost time and memory without changing the proposal.
+MAX_CHARS = 20000
+
+_NUMBER = r"\d{1,6}(?:,\d{3})*"
+
+# A quantity may carry a range, a scale and one qualifier before its unit
+# ("500-1,000 leads", "5k leads", "1,000 b2b contacts")
+_QUANTITY = re.compile(
+    r"\b(?P<low>%s)(?:\s*(?:-|to)\s*(?P<high>%s))?(?:\s*(?P<scale>k|thousand)\b)?"
+    r"\s*(?:[a-z][a-z0-9]*\s+)?(?:%s)\b" % (_NUMBER, _NUMBER, "|".join(QUANTITY_UNITS))
+)
+
+_SENTENCE_END = re.compile(r"[.!?\n]")
+
+_URGENCY = re.compile(r"\b(?:%s)\b" % "|".join(URGENCY_WORDS))
+
+_TOOL_PATTERN = re.compile(
+    r"\b(?:%s)\b" % "|".join(re.escape(tool).replace(r"\ ", r"\s+") for tool in TOOLS)
+)
+
+# Cheap substring checks that rule a block out before any regex runs
+_TOOL_HINTS = sorted({tool.split()[0] for tool in TOOLS})
+
+_TOOL_RANK = {tool: rank for rank, tool in enumerate(TOOLS)}
+
+# Once this one is found no other tool can become tool_mentioned
+_TOP_TOOL = TOOLS[0]
+
+
+def _to_int(number):
+    return int(number.replace(",", ""))
+
+
+def clip(text, max_chars=MAX_CHARS):
+    """The first max_chars of text, cut at a space when one is close"""
+    if max_chars is None or len(text) <= max_chars:
+        return text
+    cut = max(text.rfind(" ", max_chars - 100, max_chars), text.rfind("\n", max_chars - 100, max_chars))
+    return text[:cut if cut > 0 else max_chars]
+
+
+class FeatureExtractor:
+    """Collects features from text fed in order, one block at a time."""
+
+    def __init__(self, max_chars=MAX_CHARS):
+        # Characters still to be read, None for no limit
+        self.remaining = max_chars
+        self.main_task = ""
+        self.quantity_range = None
+        self.deliverable = ""
+        self.tools = []
+        self.urgency = False
+        # Text after the last sentence end, held until the sentence completes
+        self._pending = ""
+        # Start of a sentence cut by a block boundary, while no main task is found
+        self._sentence = ""
+
+    @property
+    def settled(self):
+        """True once more text cannot change the result"""
+        return bool(self.main_task and self.quantity_range and _TOP_TOOL in self.tools and self.urgency)
+
+    @property
+    def done(self):
+        """True once more text will not be read"""
+        return self.settled or self.remaining == 0
+
+    def feed(self, text):
+        """Scan more text. Returns True once it is settled or the cap is reached."""
+        if self.remaining is not None:
+            text = text[:self.remaining]
+            self.remaining -= len(text)
+        text = self._pending + text
+        start = 0
+        while not self.settled and len(text) - start > BLOCK_SIZE:
+            end = start + BLOCK_SIZE
+            cut = max(text.rfind(mark, start, end) for mark in ".!?\n")
+            if cut < start:
+                # A sentence longer than a block is scanned whole, so no
+                # quantity or tool is cut in two
+                match = _SENTENCE_END.search(text, end)
+                if match is None:
+                    break
+                cut = match.start()
+            end = cut + 1
+            self._scan(text[start:end])
+            start = end
+        self._pending = "" if self.settled else text[start:]
+        return self.done
+
+    def close(self):
+        """Scan whatever is left and return the info dict"""
+        if self._pending and not self.settled:
+            self._scan(self._pending)
+        self._pending = ""
+        if not self.main_task:
+            # The text ended without a sentence end
+            sentence = self._sentence.strip()
+            if len(sentence) > MIN_TASK_LENGTH:
+                self.main_task = sentence
+        self._sentence = ""
+        return self.info()
+
+    def _scan(self, block):
+        lowered = block.lower()
+        # Lowercasing a few non ASCII characters changes the length, so only
+        # slice the original when offsets still line up
+        source = block if len(lowered) == len(block) else lowered
+
+        if not self.main_task:
+            sentence_start = 0
+            for match in _SENTENCE_END.finditer(block):
+                sentence = (self._sentence + block[sentence_start:match.start()]).strip()
+                self._sentence = ""
+                if len(sentence) > MIN_TASK_LENGTH:
+                    self.main_task = sentence
+                    break
+                sentence_start = match.end()
+            else:
+                # The sentence may go on in the next block; close() takes it if not
+                self._sentence += block[sentence_start:]
+
+        if self.quantity_range is None:
+            match = _QUANTITY.search(lowered)
+            if match:
+                scale = 1000 if match.group("scale") else 1
+                low = _to_int(match.group("low")) * scale
+                high = _to_int(match.group("high")) * scale if match.group("high") else low
+                self.quantity_range = (low, high)
+                self.deliverable = source[match.start():match.end()]
+
+        if any(hint in lowered for hint in _TOOL_HINTS):
+            for found in _TOOL_PATTERN.findall(lowered):
+                tool = " ".join(found.split())
+                if tool not in self.tools:
+                    self.tools.append(tool)
+
+        if not self.urgency and any(word in lowered for word in URGENCY_WORDS):
+            self.urgency = _URGENCY.search(lowered) is not None
+
+    def info(self):
+        """Return the fields in the shape extract_key_info always used"""
+        return {
+            "main_task": self.main_task,
+            "quantity": self.quantity_range[1] if self.quantity_range else None,
+            "quantity_range": self.quantity_range,
+            "deliverable": self.deliverable,
+            "tool_mentioned": min(self.tools, key=_TOOL_RANK.get).title() if self.tools else None,
+            "tools_mentioned": [tool.title() for tool in self.tools],
+            "urgency": self.urgency
+        }
+
+
+def extract_features(text, max_chars=MAX_CHARS):
+    """Return main task, quantity, deliverable, tools and urgency for text"""
+    extractor = FeatureExtractor(max_chars)
+    extractor.feed(text)
+    return extractor.close()
+
+
+def extract_task(text, max_chars=MAX_CHARS):
+    """The main_task extract_features would return, reading no further than its end"""
+    end = len(text) if max_chars is None else min(len(text), max_chars)
+    start = 0
+    for match in _SENTENCE_END.finditer(text, 0, end):
+        sentence = text[start:match.start()].strip()
+        if len(sentence) > MIN_TASK_LENGTH:
+            return sentence
+        start = match.end()
+    sentence = text[start:end].strip()
+    return sentence if len(sentence) > MIN_TASK_LENGTH else ""
@@ -0,0 +1,363 @@
+"""
+Feed Watcher
+Daemon mode: follows scraper output and writes proposals for new posts as
+they arrive, instead of pasting each one into the CLI or the web form.
+
+Two kinds of feed:
+- a JSONL file that gets appended to, one post object per line
+- a directory that gets files dropped into it: .jsonl, .json (an object or
+  a list of them) or .txt (the whole file is one post, its name the id).
+  Write files under another name and rename them in, or give them a .part
+  or .tmp suffix until they are complete. Files are read in the order they
+  arrived, the later of their modification and inode change times; a
+  rename updates the change time on POSIX systems, so a file renamed in is
+  read however old its contents are. .jsonl files are read a line at a
+  time and a .txt only as far as is analyzed; a .json file is loaded
+  whole, so drop big batches as .jsonl.
+
+Posts are read in chunks and handed to worker processes with a fixed
+number of chunks in flight. When the workers fall behind, reading stops
+until a chunk finishes, so a burst waits in the feed rather than in
+memory. After each chunk is written the feed position and output size go
+to the checkpoint file; on restart the output is cut back to that size
+and reading resumes from that position, so no post is written twice.
+
+A line that is not a JSON object and a post that cannot be processed (a
+description that is not text, say) get an error line in the output like
+an empty one, and the feed moves on past them.
+
+Usage:
+python feed_watcher.py scraped_posts.jsonl proposals.jsonl
+python feed_watcher.py incoming/ proposals.jsonl --workers 4 --checkpoint incoming.checkpoint
+python feed_watcher.py scraped_posts.jsonl proposals.jsonl --once
+"""
+
+import argparse
+import json
+import os
+import signal
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from batch_generate import Unreadable, _init_worker, _process_chunk, record_history
+from feature_extractor import MAX_CHARS
+
+# Seconds between looks at an idle feed
+POLL_INTERVAL = 1.0
+
+# Seconds between progress lines on stderr
+REPORT_INTERVAL = 30.0
+
+# Files in a watched directory that are still being written
+_PARTIAL_SUFFIXES = (".part", ".tmp", ".partial")
+
+
+class JsonlFeed:
+    """An appended JSONL file. Position: {"inode": ..., "offset": ...}."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def read(self, position, limit):
+        """Up to limit complete records after position, and the position after them"""
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return [], position
+        with f:
+            stat = os.fstat(f.fileno())
+            offset = position.get("offset", 0) if position else 0
+            # A replaced or truncated file is read from the start
+            if not position or position.get("inode") != stat.st_ino or offset > stat.st_size:
+                offset = 0
+            f.seek(offset)
+            records = []
+            while len(records) < limit:
+                line = f.readline()
+                if not line.endswith(b"\n"):
+                    # Nothing more, or a line the scraper is still writing
+                    break
+                record = _parse_line(line, f"{self.path} at byte {offset}")
+                offset += len(line)
+                if record is not None:
+                    records.append(record)
+        return records, {"inode": stat.st_ino, "offset": offset}
+
+
+class DirectoryFeed:
+    """A directory of dropped files, taken in the order they arrived.
+
+    Position: {"mark": [arrival_ns, name], "file": ..., "offset": ...}, the
+    last file read to the end and the file part read so far (a byte offset,
+    or an item count for a .json list). Files that arrived after the mark
+    are still to be read.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def _files(self):
+        """(arrival_ns, name) of the complete files, oldest first"""
+        files = []
+        with os.scandir(self.path) as entries:
+            for entry in entries:
+                if entry.name.startswith(".") or entry.name.endswith(_PARTIAL_SUFFIXES):
+                    continue
+                if not entry.is_file():
+                    continue
+                stat = entry.stat()
+                files.append((max(stat.st_mtime_ns, stat.st_ctime_ns), entry.name))
+        files.sort()
+        return files
+
+    def read(self, position, limit):
+        """Up to limit records from the files not read yet, and the position after them"""
+        files = self._files()
+        position = position or {}
+        mark = tuple(position.get("mark") or (-1, ""))
+        current, offset = position.get("file"), position.get("offset", 0)
+        if current not in {name for _, name in files}:
+            current, offset = None, 0
+
+        # A file read part way is finished first
+        keys = [key for key in files if key[1] == current] + [
+            key for key in files if key > mark and key[1] != current]
+        records = []
+        for key in keys:
+            if len(records) >= limit:
+                break
+            name = key[1]
+            offset, finished = _read_file(os.path.join(self.path, name), offset if name == current else 0,
+                                          limit - len(records), records)
+            if finished:
+                mark = max(mark, key)
+                current, offset = None, 0
+            else:
+                current = name
+                break
+        return records, {"mark": list(mark), "file": current, "offset": offset}
+
+
+def _parse_line(line, where):
+    """The post on one JSONL line, an Unreadable record or None for a blank line"""
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        record = json.loads(line)
+    except ValueError as e:
+        return Unreadable(id=None, error=f"{where} is not JSON: {e}")
+    if not isinstance(record, dict):
+        return Unreadable(id=None, error=f"{where} is not a JSON object")
+    return record
+
+
+def _read_file(path, offset, limit, records):
+    """Append up to limit records of one dropped file, from offset, to records
+
+    Returns the offset to go on from and whether the file was read to the end.
+    """
+    name = os.path.basename(path)
+    try:
+        if name.endswith(".jsonl"):
+            with open(path, "rb") as f:
+                f.seek(offset)
+                added = 0
+                while added < limit:
+                    line = f.readline()
+                    if not line:
+                        return offset, True
+                    record = _parse_line(line, f"{name} at byte {offset}")
+                    offset += len(line)
+                    if record is not None:
+                        records.append(record)
+                        added += 1
+                return offset, f.read(1) == b""
+
+        if name.endswith(".json"):
+            with open(path, "rb") as f:
+                loaded = json.load(f)
+            items = loaded if isinstance(loaded, list) else [loaded]
+            end = min(offset + limit, len(items))
+            records.extend(
+                item if isinstance(item, dict) else Unreadable(id=None, error=f"{name}[{index}] is not a JSON object")
+                for index, item in enumerate(items[offset:end], offset)
+            )
+            return end, end >= len(items)
+
+        # Only the start of a post is analyzed, so the rest of a huge file is never read
+        with open(path, encoding="utf-8", errors="replace") as f:
+            records.append({"id": name, "job_description": f.read(2 * MAX_CHARS)})
+        return 0, True
+    except OSError as e:
+        records.append(Unreadable(id=name, error=f"could not read {name}: {e}"))
+    except ValueError as e:
+        records.append(Unreadable(id=name, error=f"{name} is not JSON: {e}"))
+    return 0, True
+
+
+def _process_posts(records):
+    """_process_chunk, going post by post when one of them fails
+
+    A post that raises gets an error result instead of taking the chunk,
+    and the daemon with it, down on every restart.
+    """
+    try:
+        return _process_chunk(records)
+    except Exception as e:
+        if len(records) > 1:
+            return [result for record in records for result in _process_posts([record])]
+        return [{"id": records[0].get("id"), "error": f"could not process post: {e!r}"}]
+
+
+def open_feed(path):
+    return DirectoryFeed(path) if os.path.isdir(path) else JsonlFeed(path)
+
+
+def load_checkpoint(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_checkpoint(path, checkpoint):
+    """Replace the checkpoint in one rename so a crash never leaves half a file"""
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def open_output(path, size):
+    """Output file cut back to the checkpointed size, ready to append"""
+    f = open(path, "ab")
+    if size is not None and f.tell() > size:
+        # Results written after the last checkpoint are generated again
+        f.truncate(size)
+        f.seek(size)
+    return f
+
+
+def watch(feed_path, output_path, checkpoint_path, workers=1, chunk_size=64, max_pending=None,
+          poll_interval=POLL_INTERVAL, once=False, classifier_path=None, experience_path=None,
+          history=None):
+    """Process the feed until stopped (or until it is drained with once=True)"""
+    feed = open_feed(feed_path)
+    checkpoint = load_checkpoint(checkpoint_path)
+    if checkpoint.get("feed") not in (None, os.path.abspath(feed_path)):
+        raise ValueError(f"{checkpoint_path} belongs to {checkpoint['feed']}")
+    position = checkpoint.get("position")
+    out = open_output(output_path, checkpoint.get("output_size"))
+
+    stopping = []
+
+    def stop(signum, frame):
+        stopping.append(signum)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    pool = None
+    if workers > 1:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                   initargs=(classifier_path, experience_path))
+    else:
+        _init_worker(classifier_path, experience_path)
+    max_pending = max_pending or workers * 2
+
+    # (records, result future or results, feed position after them), oldest first
+    pending = deque()
+    processed = 0
+    started = time.monotonic()
+    next_report = started + REPORT_INTERVAL
+
+    def finish_oldest():
+        nonlocal processed
+        records, results, after = pending.popleft()
+        results = results.result() if pool else results
+        if history is not None:
+            results = list(record_history(records, results, history))
+        for result in results:
+            out.write(json.dumps(result, ensure_ascii=False).encode("utf-8") + b"\n")
+        out.flush()
+        os.fsync(out.fileno())
+        processed += len(results)
+        save_checkpoint(checkpoint_path, {
+            "feed": os.path.abspath(feed_path),
+            "position": after,
+            "output_size": out.tell(),
+        })
+
+    try:
+        while not stopping:
+            # Backpressure: no new reads while max_pending chunks are in flight
+            while len(pending) >= max_pending or (pending and pool and pending[0][1].done()):
+                finish_oldest()
+
+            records, position = feed.read(position, chunk_size)
+            if records:
+                results = pool.submit(_process_posts, records) if pool else _process_posts(records)
+                pending.append((records, results, position))
+                continue
+
+            while pending:
+                finish_oldest()
+            if once:
+                break
+            if time.monotonic() >= next_report:
+                rate = processed / (time.monotonic() - started)
+                print(f"{processed} posts processed, {rate:.1f}/s", file=sys.stderr)
+                next_report = time.monotonic() + REPORT_INTERVAL
+            time.sleep(poll_interval)
+
+        # Finish what was handed out so the checkpoint covers it
+        while pending:
+            finish_oldest()
+    finally:
+        if pool:
+            pool.shutdown(cancel_futures=True)
+        out.close()
+    return processed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write proposals for posts as they land in a feed")
+    parser.add_argument("feed", help="JSONL file that is appended to, or a directory files are dropped into")
+    parser.add_argument("output", help="JSONL file proposals are appended to")
+    parser.add_argument("--checkpoint", help="feed position file (default: OUTPUT.checkpoint)")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes")
+    parser.add_argument("--chunk-size", type=int, default=64, help="posts sent to a worker at a time")
+    parser.add_argument("--max-pending", type=int, default=None,
+                        help="chunks in flight before reading pauses (default: 2 per worker)")
+    parser.add_argument("--poll", type=float, default=POLL_INTERVAL, help="seconds between looks at an idle feed")
+    parser.add_argument("--once", action="store_true", help="process what is in the feed now and exit")
+    parser.add_argument("--classifier", metavar="MODEL",
+                        help="detect job types with a trained TF-IDF model (needs numpy)")
+    parser.add_argument("--experience-db", metavar="LIBRARY",
+                        help="fill in missing past_experience from this snippet library")
+    parser.add_argument("--history-db", metavar="HISTORY",
+                        help="keep every post and proposal in this SQLite file")
+    args = parser.parse_args(argv)
+
+    history = None
+    if args.history_db:
+        from history_store import HistoryStore
+        history = HistoryStore(args.history_db)
+
+    checkpoint = args.checkpoint or args.output + ".checkpoint"
+    print(f"Watching {args.feed}, writing to {args.output}", file=sys.stderr)
+    count = watch(args.feed, args.output, checkpoint, args.workers, args.chunk_size, args.max_pending,
+                  args.poll, args.once, args.classifier, args.experience_db, history)
+    if history is not None:
+        history.close()
+    print(f"Stopped after {count} posts", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
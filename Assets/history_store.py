@@ -0,0 +1,386 @@
+"""
+History Store
+Keeps every analyzed post and the proposals generated for it in a SQLite
+file, so wins can be traced back to the post, job type and version.
+
+Writes never block the caller: record() puts the row on a queue and a
+background thread commits whatever has piled up in one transaction. Under
+load that turns hundreds of small writes into a few large ones. The file
+uses WAL mode, so exports and queries read while the writer commits, and
+several web workers can write to the same file.
+
+Web versions are stored as a compact VariantSet next to one copy of each
+template file version, and rendered back to text when read with the
+experience and name kept in the post's info.
+
+Usage:
+python history_store.py stats history.db
+python history_store.py list history.db --job-type data_entry --since 2026-01-01
+python history_store.py export history.db history.jsonl --since 2026-01-01
+"""
+
+import argparse
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+from itertools import groupby
+
+from compact_variants import VariantSet
+from template_store import find_version, parse_templates
+
+# Records waiting for the writer. When full, new records are dropped and
+# counted rather than making a request wait for the disk.
+MAX_PENDING = 10000
+
+# Most records committed in one transaction
+BATCH_SIZE = 500
+
+# Seconds the writer waits for more records before committing. Each commit
+# costs about as much as writing a hundred records, so a short wait keeps
+# the writer thread from competing with requests for the GIL.
+COMMIT_DELAY = 0.05
+
+_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS posts ("
+    " id INTEGER PRIMARY KEY, created REAL NOT NULL, source TEXT NOT NULL,"
+    " job_type TEXT NOT NULL, description TEXT NOT NULL, info TEXT, variant_set BLOB)",
+    "CREATE TABLE IF NOT EXISTS variants ("
+    " post_id INTEGER NOT NULL REFERENCES posts (id), version INTEGER NOT NULL,"
+    " text TEXT NOT NULL, word_count INTEGER NOT NULL, PRIMARY KEY (post_id, version)) WITHOUT ROWID",
+    # Template files that stored VariantSets were made from
+    "CREATE TABLE IF NOT EXISTS template_sets ("
+    " version TEXT PRIMARY KEY, kind TEXT NOT NULL, source TEXT NOT NULL) WITHOUT ROWID",
+    "CREATE INDEX IF NOT EXISTS posts_by_type ON posts (job_type, created)",
+    "CREATE INDEX IF NOT EXISTS posts_by_date ON posts (created)",
+]
+
+_STOP = object()
+
+
+def _timestamp(value):
+    """Unix time from a number, a datetime or an ISO date string"""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.timestamp()
+
+
+def _variant_rows(post_id, variants):
+    """(post_id, version, text, word_count) for plain texts or generate_multiple dicts"""
+    for i, variant in enumerate(variants):
+        if isinstance(variant, str):
+            yield post_id, i + 1, variant, len(variant.split())
+        else:
+            text = variant["text"]
+            yield post_id, variant.get("version", i + 1), text, variant.get("word_count", len(text.split()))
+
+
+class HistoryStore:
+    """Proposal history with off-thread batched writes. Safe to share between threads."""
+
+    def __init__(self, path, max_pending=MAX_PENDING, batch_size=BATCH_SIZE, commit_delay=COMMIT_DELAY):
+        self.path = path
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.commit_delay = commit_delay
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self._lock = threading.Lock()
+        self._queue = None
+        self._writer = None
+        self._writer_pid = None
+        self._reader = None
+        self._reader_pid = None
+        # Template versions saved by the writer, and ones parsed for reading
+        self._saved_templates = set()
+        self._template_sets = {}
+        # Create the file and tables up front so errors show at startup
+        self._connect().close()
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode = WAL")
+        # With WAL a commit only waits for the log write, not a full sync
+        connection.execute("PRAGMA synchronous = NORMAL")
+        for statement in _SCHEMA:
+            connection.execute(statement)
+        connection.commit()
+        return connection
+
+    # --- writing ---
+
+    def record(self, description, job_type, info, variants, source="web"):
+        """Queue one post and its proposals. Never waits; returns False if dropped."""
+        self._start_writer()
+        try:
+            self._queue.put_nowait((time.time(), source, description, job_type, info, variants))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        return True
+
+    def _start_writer(self):
+        """Writer thread for this process. Threads do not survive a fork."""
+        if self._writer_pid == os.getpid():
+            return
+        with self._lock:
+            if self._writer_pid == os.getpid():
+                return
+            self._queue = queue.Queue(self.max_pending)
+            self._writer = threading.Thread(target=self._write_loop, name="history-writer", daemon=True)
+            self._writer.start()
+            self._writer_pid = os.getpid()
+        atexit.register(self.close)
+
+    def _write_loop(self):
+        connection = self._connect()
+        pending = self._queue
+        while True:
+            batch = [pending.get()]
+            # Collect what arrives shortly after, up to one batch
+            deadline = time.monotonic() + self.commit_delay
+            while len(batch) < self.batch_size and batch[-1] is not _STOP:
+                try:
+                    batch.append(pending.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+            stop = _STOP in batch
+            records = [item for item in batch if item is not _STOP]
+            try:
+                if records:
+                    self._write(connection, records)
+            except sqlite3.Error:
+                # A locked or full disk loses this batch, not the writer
+                with self._lock:
+                    self.dropped += len(records)
+            finally:
+                for _ in batch:
+                    pending.task_done()
+            if stop:
+                connection.close()
+                return
+
+    def _write(self, connection, records):
+        with connection:
+            for created, source, description, job_type, info, variants in records:
+                variant_set = None
+                if isinstance(variants, VariantSet):
+                    self._save_templates(connection, variants.templates)
+                    variant_set = variants.to_bytes()
+                cursor = connection.execute(
+                    "INSERT INTO posts (created, source, job_type, description, info, variant_set)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (created, source, job_type, description,
+                     json.dumps(info, ensure_ascii=False) if info is not None else None, variant_set)
+                )
+                if variant_set is None:
+                    connection.executemany(
+                        "INSERT INTO variants (post_id, version, text, word_count) VALUES (?, ?, ?, ?)",
+                        _variant_rows(cursor.lastrowid, variants)
+                    )
+        with self._lock:
+            self.written += len(records)
+            self.batches += 1
+
+    def _save_templates(self, connection, version):
+        """Store the template file a VariantSet needs, once per version"""
+        if version in self._saved_templates:
+            return
+        templates = find_version(version)
+        if templates is not None and templates.source is not None:
+            connection.execute(
+                "INSERT OR IGNORE INTO template_sets (version, kind, source) VALUES (?, ?, ?)",
+                (version, templates.kind, templates.source)
+            )
+        self._saved_templates.add(version)
+
+    def flush(self):
+        """Wait until everything recorded so far is on disk"""
+        if self._writer_pid == os.getpid():
+            self._queue.join()
+
+    def close(self):
+        """Write what is queued and stop the writer"""
+        if self._writer_pid != os.getpid() or not self._writer.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._writer.join()
+
+    def stats(self):
+        """Counters for monitoring"""
+        with self._lock:
+            pending = self._queue.qsize() if self._writer_pid == os.getpid() else 0
+            return {
+                "written": self.written,
+                "dropped": self.dropped,
+                "batches": self.batches,
+                "pending": pending,
+            }
+
+    # --- reading ---
+
+    @property
+    def _db(self):
+        """Read connection for this process"""
+        if self._reader_pid != os.getpid():
+            self._reader = self._connect()
+            self._reader_pid = os.getpid()
+        return self._reader
+
+    def _where(self, job_type, since, until):
+        clauses = []
+        params = []
+        if job_type is not None:
+            clauses.append("job_type = ?")
+            params.append(job_type)
+        if since is not None:
+            clauses.append("created >= ?")
+            params.append(_timestamp(since))
+        if until is not None:
+            clauses.append("created < ?")
+            params.append(_timestamp(until))
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def count(self, job_type=None, since=None, until=None):
+        where, params = self._where(job_type, since, until)
+        with self._lock:
+            return self._db.execute(f"SELECT COUNT(*) FROM posts{where}", params).fetchone()[0]
+
+    def counts_by_type(self, since=None, until=None):
+        """{job_type: posts} over a date range"""
+        where, params = self._where(None, since, until)
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT job_type, COUNT(*) FROM posts{where} GROUP BY job_type ORDER BY job_type", params
+            ).fetchall()
+        return dict(rows)
+
+    def posts(self, job_type=None, since=None, until=None, limit=100):
+        """Newest posts first, each with its variants"""
+        where, params = self._where(job_type, since, until)
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT id, created, source, job_type, description, info, variant_set FROM posts{where}"
+                " ORDER BY created DESC LIMIT ?", params + [limit]
+            ).fetchall()
+            posts = []
+            for row in rows:
+                post = self._post(row)
+                if row[6] is not None:
+                    post["variants"] = self._render(self._db, row[6], post["info"])
+                else:
+                    post["variants"] = [
+                        {"version": version, "text": text, "word_count": word_count}
+                        for version, text, word_count in self._db.execute(
+                            "SELECT version, text, word_count FROM variants WHERE post_id = ? ORDER BY version",
+                            (post["id"],)
+                        )
+                    ]
+                posts.append(post)
+        return posts
+
+    def _render(self, connection, variant_set, info):
+        """Version dicts from a stored VariantSet, empty if its templates are missing"""
+        variants = VariantSet.from_bytes(variant_set)
+        info = info or {}
+        experience, name = info.get("experience"), info.get("name")
+        templates = self._template_sets.get(variants.templates)
+        if templates is None:
+            row = connection.execute(
+                "SELECT kind, source FROM template_sets WHERE version = ?", (variants.templates,)
+            ).fetchone()
+            if row:
+                templates = parse_templates(row[1], variants.templates, row[0])
+            else:
+                templates = find_version(variants.templates)
+            if templates is None:
+                return []
+            self._template_sets[variants.templates] = templates
+        return [
+            {"version": i + 1, "text": text, "word_count": len(text.split())}
+            for i, text in enumerate(variants.texts(templates, experience, name))
+        ]
+
+    @staticmethod
+    def _post(row):
+        post_id, created, source, job_type, description, info = row[:6]
+        return {
+            "id": post_id,
+            "created": datetime.fromtimestamp(created).isoformat(timespec="seconds"),
+            "source": source,
+            "job_type": job_type,
+            "description": description,
+            "info": json.loads(info) if info else None,
+        }
+
+    def export(self, out, job_type=None, since=None, until=None):
+        """Write matching posts as JSONL to a file object and return how many"""
+        where, params = self._where(job_type, since, until)
+        # One pass over a join keeps memory flat however large the history is
+        query = (
+            "SELECT p.id, p.created, p.source, p.job_type, p.description, p.info, p.variant_set,"
+            " v.version, v.text, v.word_count"
+            f" FROM (SELECT * FROM posts{where}) AS p"
+            " LEFT JOIN variants AS v ON v.post_id = p.id ORDER BY p.id, v.version"
+        )
+        count = 0
+        connection = self._connect()
+        try:
+            for _, rows in groupby(connection.execute(query, params), key=lambda row: row[0]):
+                rows = list(rows)
+                post = self._post(rows[0])
+                if rows[0][6] is not None:
+                    post["variants"] = self._render(connection, rows[0][6], post["info"])
+                else:
+                    post["variants"] = [
+                        {"version": version, "text": text, "word_count": word_count}
+                        for *_, version, text, word_count in rows if text is not None
+                    ]
+                out.write(json.dumps(post, ensure_ascii=False) + "\n")
+                count += 1
+        finally:
+            connection.close()
+        return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query and export the proposal history")
+    parser.add_argument("command", choices=["stats", "list", "export"])
+    parser.add_argument("history", help="SQLite history file")
+    parser.add_argument("output", nargs="?", help="JSONL file for export (default: stdout)")
+    parser.add_argument("--job-type", help="only this job type, e.g. data_entry")
+    parser.add_argument("--since", help="from this date or time (ISO format)")
+    parser.add_argument("--until", help="before this date or time (ISO format)")
+    parser.add_argument("--limit", type=int, default=20, help="posts shown by list")
+    args = parser.parse_args(argv)
+
+    store = HistoryStore(args.history)
+    if args.command == "stats":
+        counts = store.counts_by_type(args.since, args.until)
+        for job_type, count in counts.items():
+            print(f"{job_type:<20} {count:>8}")
+        print(f"{'total':<20} {sum(counts.values()):>8}")
+    elif args.command == "list":
+        for post in store.posts(args.job_type, args.since, args.until, args.limit):
+            preview = " ".join(post["description"].split())[:70]
+            print(f"[{post['id']}] {post['created']} {post['job_type']:<18} {len(post['variants'])} versions  {preview}")
+    elif args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            count = store.export(f, args.job_type, args.since, args.until)
+        print(f"Exported {count} posts to {args.output}", file=sys.stderr)
+    else:
+        store.export(sys.stdout, args.job_type, args.since, args.until)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
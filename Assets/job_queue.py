@@ -0,0 +1,226 @@
+"""
+Job Queue
+Runs large API batches in the background of a web worker. Submitting
+returns a job id at once; worker threads generate the posts one at a time
+while the client polls or streams the results.
+
+Fairness: each client (X-Client-Id header, or its address) has its own
+queue of posts and may have at most per_client posts running at once.
+Idle worker threads take the next post from the clients in turn, so one
+client's thousand post batch does not hold up someone else's single post.
+
+Finished jobs are forgotten ttl seconds after they finish. Jobs live in
+the process that accepted them, so polling only works against that
+process. The web app only turns the job endpoints on when JOB_WORKERS is
+set, and serve.py then runs a single worker (with more --threads).
+"""
+
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict, deque
+
+# Worker threads per process
+WORKERS = 2
+
+# Posts one client may have running at once
+PER_CLIENT = 2
+
+# Unfinished jobs one client may have before submits are refused
+MAX_QUEUED_JOBS = 20
+
+# Seconds a finished job stays readable
+TTL = 600.0
+
+
+class QueueFull(Exception):
+    """The client already has as many unfinished jobs as it may."""
+
+
+class Job:
+    """One submitted batch and its results as they finish."""
+
+    __slots__ = ("id", "client", "items", "results", "finished_order", "running",
+                 "status", "created", "finished")
+
+    def __init__(self, job_id, client, items):
+        self.id = job_id
+        self.client = client
+        self.items = items
+        self.results = [None] * len(items)
+        # Indices in the order their results came in, for streaming
+        self.finished_order = []
+        self.running = 0
+        self.status = "queued"
+        self.created = time.time()
+        self.finished = None
+
+    @property
+    def done(self):
+        return len(self.finished_order)
+
+    def summary(self):
+        return {
+            "id": self.id,
+            "status": self.status,
+            "total": len(self.items),
+            "done": self.done,
+            "created": self.created,
+            "finished": self.finished,
+        }
+
+
+class JobQueue:
+    """Worker threads that run func(item) for every item of every job."""
+
+    def __init__(self, func, workers=WORKERS, per_client=PER_CLIENT, max_queued_jobs=MAX_QUEUED_JOBS, ttl=TTL):
+        self.func = func
+        self.workers = workers
+        self.per_client = per_client
+        self.max_queued_jobs = max_queued_jobs
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._work_ready = threading.Condition(self._lock)
+        self._progress = threading.Condition(self._lock)
+        self._jobs = {}
+        # client -> deque of (job, index) waiting to run; clients take turns
+        self._waiting = OrderedDict()
+        # client -> posts running now
+        self._running = {}
+        self._threads_pid = None
+        self.completed_items = 0
+
+    def _start_workers(self):
+        """Worker threads for this process. Threads do not survive a fork."""
+        if self._threads_pid == os.getpid():
+            return
+        with self._lock:
+            if self._threads_pid == os.getpid():
+                return
+            for n in range(self.workers):
+                threading.Thread(target=self._work, name=f"job-worker-{n}", daemon=True).start()
+            self._threads_pid = os.getpid()
+
+    # --- client side ---
+
+    def submit(self, client, items):
+        """Queue a job and return it. Raises QueueFull when the client is at its limit."""
+        self._start_workers()
+        items = list(items)
+        with self._lock:
+            self._expire()
+            unfinished = sum(1 for job in self._jobs.values() if job.client == client and job.finished is None)
+            if unfinished >= self.max_queued_jobs:
+                raise QueueFull(f"at most {self.max_queued_jobs} unfinished jobs per client")
+
+            job = Job(secrets.token_hex(8), client, items)
+            self._jobs[job.id] = job
+            if items:
+                self._waiting.setdefault(client, deque()).extend((job, i) for i in range(len(items)))
+                self._work_ready.notify(min(len(items), self.workers))
+            else:
+                self._finish(job, "done")
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            self._expire()
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """Drop the job's waiting posts. Posts already running still finish."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.finished is not None:
+                return job
+            waiting = self._waiting.get(job.client)
+            if waiting:
+                kept = deque(entry for entry in waiting if entry[0] is not job)
+                if kept:
+                    self._waiting[job.client] = kept
+                else:
+                    del self._waiting[job.client]
+            self._finish(job, "cancelled")
+            return job
+
+    def wait(self, job, seen, timeout=None):
+        """Block until the job has more than seen results or ends; return its result count"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            while job.done <= seen and job.finished is None:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._progress.wait(remaining)
+            return job.done
+
+    def stats(self):
+        with self._lock:
+            return {
+                "jobs": len(self._jobs),
+                "waiting": sum(len(waiting) for waiting in self._waiting.values()),
+                "running": sum(self._running.values()),
+                "clients": len(self._waiting),
+                "completed": self.completed_items,
+            }
+
+    # --- worker side ---
+
+    def _next(self):
+        """Next (job, index), rotating through clients under their limit"""
+        for client in list(self._waiting):
+            if self._running.get(client, 0) >= self.per_client:
+                continue
+            waiting = self._waiting[client]
+            entry = waiting.popleft()
+            if waiting:
+                # Back of the line until every other client has had a turn
+                self._waiting.move_to_end(client)
+            else:
+                del self._waiting[client]
+            return entry
+        return None
+
+    def _work(self):
+        while True:
+            with self._lock:
+                entry = self._next()
+                while entry is None:
+                    self._work_ready.wait()
+                    entry = self._next()
+                job, index = entry
+                self._running[job.client] = self._running.get(job.client, 0) + 1
+                job.running += 1
+                job.status = "running"
+
+            try:
+                result = self.func(job.items[index])
+            except Exception as e:
+                result = {"error": f"{type(e).__name__}: {e}"}
+
+            with self._lock:
+                self._running[job.client] -= 1
+                if not self._running[job.client]:
+                    del self._running[job.client]
+                job.running -= 1
+                self.completed_items += 1
+                if job.finished is None or job.status == "cancelled":
+                    job.results[index] = result
+                    job.finished_order.append(index)
+                if job.finished is None and job.done == len(job.items):
+                    self._finish(job, "done")
+                self._progress.notify_all()
+                # A slot for this client opened up
+                self._work_ready.notify()
+
+    def _finish(self, job, status):
+        job.status = status
+        job.finished = time.time()
+        self._progress.notify_all()
+
+    def _expire(self):
+        cutoff = time.time() - self.ttl
+        expired = [job_id for job_id, job in self._jobs.items() if job.finished is not None and job.finished < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
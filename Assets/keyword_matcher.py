@@ -0,0 +1,134 @@
+"""
+Keyword Matcher
+Compiles a {category: [keywords]} table once into a single trie shaped
+pattern, so a description is classified in one pass instead of one
+substring scan per keyword.
+
+The pass costs roughly the same per word however long the text is. Up to
+MAX_CHARS, all the generators hand it, that is 1.0-2.5x faster than the
+substring scans it replaced, the most on short posts. Past that, on text
+where every keyword turns up early, the scans catch up: each stops at its
+keyword's first substring hit, which a pass that checks word boundaries
+cannot do.
+"""
+
+import re
+
+import rule_snapshot
+
+# Endings accepted after the last word of a keyword ("lead" also hits "leads")
+INFLECTIONS = ("", "s", "es", "d", "ed", "ing")
+
+# Lowercases ASCII letters and turns every other ASCII non alphanumeric into
+# a space. Bytes above 127 are left alone so accented words stay whole.
+_NORMALIZE = bytes.maketrans(
+    bytes(range(128)),
+    bytes(
+        (c | 0x20) if chr(c).isalpha() else c if chr(c).isdigit() else 0x20
+        for c in range(128)
+    ),
+)
+
+
+def normalize(text):
+    """Lowercase text as bytes with every word surrounded by spaces"""
+    return b" " + text.encode("utf-8", "ignore").translate(_NORMALIZE) + b" "
+
+
+def _trie_pattern(phrases):
+    """Build a regex alternation shaped like a trie over the given phrases"""
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node):
+        branches = []
+        optional = False
+        for char, child in sorted(node.items()):
+            if char == "":
+                optional = True
+            elif char == " ":
+                branches.append(" +" + build(child))
+            else:
+                branches.append(re.escape(char) + build(child))
+        if not branches:
+            return ""
+        pattern = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return "(?:" + pattern + ")?" if optional else pattern
+
+    return build(trie)
+
+
+def _build(table):
+    """Categories, pattern categories, hits and scan pattern for a keyword table"""
+    categories = tuple(category for category, _ in table)
+    pattern_category = []
+    # Spelled out form ("lead", "leads", ...) -> pattern ids it stands for
+    variants = {}
+
+    for category_index, (category, keywords) in enumerate(table):
+        for keyword in keywords:
+            pattern_id = len(pattern_category)
+            pattern_category.append(category_index)
+            words = normalize(keyword).decode().split()
+            if not words:
+                continue
+            for ending in INFLECTIONS:
+                variants.setdefault(" ".join(words) + ending, set()).add(pattern_id)
+
+    # The scan only reports the longest form starting at each word, so a
+    # form also carries every shorter form found inside it. "lead
+    # generation" therefore still counts for "lead".
+    padded = {form: f" {form} " for form in variants}
+    hits = {}
+    for form in variants:
+        ids = set()
+        for other, other_ids in variants.items():
+            if padded[other] in padded[form]:
+                ids |= other_ids
+        hits[form.encode()] = frozenset(ids)
+
+    pattern = (r" (?=(%s) )" % _trie_pattern(variants)).encode()
+    return categories, tuple(pattern_category), hits, pattern
+
+
+class KeywordMatcher:
+    """Counts distinct keyword hits per category in one traversal."""
+
+    def __init__(self, table):
+        table = tuple((category, tuple(keywords)) for category, keywords in table.items())
+        # Plain tuples, dicts and frozensets so the build can go in the rule snapshot
+        categories, pattern_category, hits, pattern = rule_snapshot.cached(
+            ("keyword_matcher", table), lambda: _build(table)
+        )
+        self.categories = list(categories)
+        # Pattern id -> category index
+        self._pattern_category = list(pattern_category)
+        self._hits = hits
+        # Tried once at every word start, looking ahead so matches may overlap
+        self._pattern = re.compile(pattern)
+
+    def match(self, text):
+        """Return the set of pattern ids found in text"""
+        hits = self._hits
+        found = set()
+        for form in set(self._pattern.findall(normalize(text))):
+            # Only a form with several spaces between its words needs them collapsed
+            found |= hits.get(form) or hits[b" ".join(form.split())]
+        return found
+
+    def scores(self, text):
+        """Return {category: number of distinct keywords found}"""
+        counts = [0] * len(self.categories)
+        for pattern_id in self.match(text):
+            counts[self._pattern_category[pattern_id]] += 1
+        return dict(zip(self.categories, counts))
+
+    def best_match(self, text, default):
+        """Return the category with most hits, or default when nothing hits"""
+        scores = self.scores(text)
+        best = max(scores, key=scores.get)
+        return best if scores[best] > 0 else default
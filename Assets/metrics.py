@@ -0,0 +1,233 @@
+"""
+Metrics
+Counters and histograms for request and stage timing, exported in the
+Prometheus text format (web /metrics) or as a plain summary (CLI --stats).
+
+Stage hooks check one flag per call, so with metrics disabled
+(PROPOSAL_METRICS=0) they add only a function call. Every process keeps
+its own numbers, so with several web workers each scrape shows one worker.
+"""
+
+import functools
+import os
+import threading
+import time
+from bisect import bisect_left
+
+# Latency buckets in seconds, from 50 microseconds up to 5 seconds
+LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+                   0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Job description sizes in characters
+SIZE_BUCKETS = (100, 250, 500, 1000, 2000, 5000, 10000, 20000, 50000)
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic count, optionally split by labels."""
+
+    kind = "counter"
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for label_values, value in items:
+            yield self.name, _format_labels(self.labels, label_values), value
+
+    def summary(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for label_values, value in items:
+            yield f"{self.name}{_format_labels(self.labels, label_values)}", f"{value}"
+
+
+class Histogram:
+    """Observations counted into fixed buckets, optionally split by labels."""
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, buckets=LATENCY_BUCKETS, labels=()):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self.labels = tuple(labels)
+        # label values -> [bucket counts (last one is +Inf), sum, count]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(label_values)
+            if state is None:
+                state = self._values[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, ([*state[0]], state[1], state[2])) for key, state in self._values.items())
+        bounds = [_format_value(float(bound)) for bound in self.buckets] + ["+Inf"]
+        for label_values, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(bounds, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labels + ("le",), label_values + (bound,))
+                yield f"{self.name}_bucket", labels, cumulative
+            labels = _format_labels(self.labels, label_values)
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, count
+
+    def summary(self):
+        with self._lock:
+            items = sorted((key, (state[1], state[2])) for key, state in self._values.items())
+        for label_values, (total, count) in items:
+            mean = total / count if count else 0.0
+            yield f"{self.name}{_format_labels(self.labels, label_values)}", f"count={count} mean={mean:.6g}"
+
+
+class Registry:
+    """All metrics of one process plus callbacks that add gauges at export time."""
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, help_text, labels=()):
+        metric = Counter(name, help_text, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help_text, buckets=LATENCY_BUCKETS, labels=()):
+        metric = Histogram(name, help_text, buckets, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collect):
+        """collect() returns (name, help, kind, value) tuples read at export time"""
+        self._collectors.append(collect)
+
+    def export(self):
+        """Everything in the Prometheus text exposition format"""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {_format_value(value)}")
+        for collect in self._collectors:
+            for name, help_text, kind, value in collect():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        """Readable dump of every metric that has data"""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(f"{name:<60} {value}" for name, value in metric.summary())
+        for collect in self._collectors:
+            lines.extend(f"{name:<60} {_format_value(value)}" for name, _, _, value in collect())
+        return "\n".join(lines)
+
+
+REGISTRY = Registry(enabled=os.environ.get("PROPOSAL_METRICS", "1") != "0")
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "proposal_stage_seconds", "Time spent in each generation stage", labels=("stage",)
+)
+JOB_TYPES = REGISTRY.counter(
+    "proposal_job_types_total", "Analyzed job descriptions by detected job type", labels=("job_type",)
+)
+INPUT_CHARS = REGISTRY.histogram(
+    "proposal_input_chars", "Size of analyzed job descriptions in characters", buckets=SIZE_BUCKETS
+)
+
+
+def set_enabled(enabled):
+    REGISTRY.enabled = enabled
+
+
+def observe_stage(stage, seconds):
+    if REGISTRY.enabled:
+        STAGE_SECONDS.observe(seconds, stage)
+
+
+def observe_input(description, job_type):
+    """Count an analyzed description by job type and size"""
+    if REGISTRY.enabled:
+        JOB_TYPES.inc(job_type)
+        INPUT_CHARS.observe(len(description))
+
+
+def timed(stage):
+    """Decorator recording each call's duration under stage"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not REGISTRY.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                STAGE_SECONDS.observe(time.perf_counter() - start, stage)
+        return wrapper
+    return decorate
+
+
+def cache_collector(prefix, cache):
+    """Collector exporting an AnalysisCache's counters and hit rate"""
+    def collect():
+        stats = cache.stats()
+        return [
+            (f"{prefix}_hits_total", "Cache hits", "counter", stats["hits"]),
+            (f"{prefix}_misses_total", "Cache misses", "counter", stats["misses"]),
+            (f"{prefix}_evictions_total", "Entries evicted from memory", "counter", stats["evictions"]),
+            (f"{prefix}_disk_hits_total", "Hits served from the disk tier", "counter", stats["disk_hits"]),
+            (f"{prefix}_disk_evictions_total", "Rows deleted from the disk tier", "counter", stats["disk_evictions"]),
+            (f"{prefix}_entries", "Entries held in memory", "gauge", stats["size"]),
+            (f"{prefix}_hit_rate", "Hits divided by lookups", "gauge", stats["hit_rate"]),
+        ]
+    return collect
+
+
+def history_collector(prefix, store):
+    """Collector exporting a HistoryStore's writer counters"""
+    def collect():
+        stats = store.stats()
+        return [
+            (f"{prefix}_written_total", "Posts written to the history file", "counter", stats["written"]),
+            (f"{prefix}_dropped_total", "Posts dropped because the writer fell behind", "counter", stats["dropped"]),
+            (f"{prefix}_batches_total", "Transactions committed by the writer", "counter", stats["batches"]),
+            (f"{prefix}_pending", "Posts waiting for the writer", "gauge", stats["pending"]),
+        ]
+    return collect
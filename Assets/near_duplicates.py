@@ -0,0 +1,169 @@
+"""
+Near Duplicate Index
+Spots reposted jobs that differ by a sentence or a changed budget, using
+word shingles, MinHash signatures and LSH buckets.
+
+Signatures use one permutation hashing: every shingle is hashed once and
+dropped into one of num_perm bins, so building a signature costs one pass
+over the text no matter how many bins there are.
+"""
+
+import threading
+import zlib
+from array import array
+from collections import OrderedDict, namedtuple
+
+from keyword_matcher import normalize
+
+Match = namedtuple("Match", ["item_id", "similarity", "payload"])
+
+_EMPTY = 0xFFFFFFFF
+_MIX = 0x9E3779B1
+
+
+def choose_bands(num_perm, threshold):
+    """Pick (bands, rows) whose LSH S-curve turns up just below threshold"""
+    best = None
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        knee = (1.0 / bands) ** (1.0 / rows)
+        # Knee below threshold keeps misses rare, the exact check drops the rest
+        if knee <= threshold and (best is None or knee > best[0]):
+            best = (knee, bands, rows)
+    return (best[1], best[2]) if best else (num_perm, 1)
+
+
+class NearDuplicateIndex:
+    """Answers "have we seen a post at least threshold similar to this one".
+
+    Memory grows with max_items * (num_perm * 4 bytes + bands bucket
+    entries), about 1.2 KB per post at the defaults. Once max_items posts
+    are stored the oldest are dropped.
+    """
+
+    def __init__(self, threshold=0.8, num_perm=64, shingle_size=3, max_items=100000):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.max_items = max_items
+        self.bands, self.rows = choose_bands(num_perm, threshold)
+        self._buckets = [{} for _ in range(self.bands)]
+        # item id -> (signature, payload), oldest first
+        self._items = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def signature(self, text):
+        """MinHash signature of a text as an array of num_perm values"""
+        k = self.num_perm
+        words = normalize(text).split()
+        size = self.shingle_size
+        if len(words) <= size:
+            shingles = [b" ".join(words)]
+        else:
+            shingles = [b" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+
+        bins = [_EMPTY] * k
+        for shingle in shingles:
+            h = (zlib.crc32(shingle) * _MIX) & 0xFFFFFFFF
+            index = h % k
+            value = h // k
+            if value < bins[index]:
+                bins[index] = value
+
+        # Fill empty bins from the next filled one so short texts still compare
+        filled = [i for i in range(k) if bins[i] != _EMPTY]
+        if filled and len(filled) < k:
+            source = filled[0]
+            for i in range(k - 1, -1, -1):
+                if bins[i] != _EMPTY:
+                    source = i
+                else:
+                    distance = (source - i) % k
+                    bins[i] = (bins[source] + distance * 0x5BD1E995) & 0xFFFFFFFF
+
+        return array("I", bins)
+
+    def _band_keys(self, signature):
+        rows = self.rows
+        return [hash(tuple(signature[b * rows:(b + 1) * rows])) for b in range(self.bands)]
+
+    def similarity(self, first, second):
+        """Estimated Jaccard similarity of two signatures"""
+        same = sum(1 for a, b in zip(first, second) if a == b)
+        return same / self.num_perm
+
+    def query(self, text=None, signature=None):
+        """Return the most similar stored post at or above threshold, or None"""
+        if signature is None:
+            signature = self.signature(text)
+        keys = self._band_keys(signature)
+
+        with self._lock:
+            candidates = set()
+            for bucket, key in zip(self._buckets, keys):
+                members = bucket.get(key)
+                if members is None:
+                    continue
+                if isinstance(members, int):
+                    candidates.add(members)
+                else:
+                    candidates.update(members)
+            stored_items = [(item_id, self._items[item_id]) for item_id in candidates]
+
+        best = None
+        for item_id, (stored, payload) in stored_items:
+            score = self.similarity(signature, stored)
+            if score >= self.threshold and (best is None or score > best.similarity):
+                best = Match(item_id, score, payload)
+        return best
+
+    def add(self, text=None, payload=None, signature=None):
+        """Store a post and return its item id"""
+        if signature is None:
+            signature = self.signature(text)
+        keys = self._band_keys(signature)
+
+        with self._lock:
+            item_id = self._next_id
+            self._next_id += 1
+            self._items[item_id] = (signature, payload)
+            for bucket, key in zip(self._buckets, keys):
+                # Most buckets hold one post, so a bare id saves a list per entry
+                members = bucket.get(key)
+                if members is None:
+                    bucket[key] = item_id
+                elif isinstance(members, int):
+                    bucket[key] = [members, item_id]
+                else:
+                    members.append(item_id)
+
+            while len(self._items) > self.max_items:
+                self._remove_oldest()
+        return item_id
+
+    def _remove_oldest(self):
+        item_id, (signature, _) = self._items.popitem(last=False)
+        for bucket, key in zip(self._buckets, self._band_keys(signature)):
+            members = bucket.get(key)
+            if members == item_id:
+                del bucket[key]
+            elif isinstance(members, list):
+                members.remove(item_id)
+                if len(members) == 1:
+                    bucket[key] = members[0]
+
+    def stats(self):
+        return {
+            "items": len(self._items),
+            "max_items": self.max_items,
+            "num_perm": self.num_perm,
+            "bands": self.bands,
+            "rows": self.rows,
+            "threshold": self.threshold
+        }
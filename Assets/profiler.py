@@ -0,0 +1,181 @@
+"""
+Profiler
+Profiling mode for the CLI and batch runs. Records wall and CPU time for
+every generator method call, full call stacks for flame graphs and the
+slowest job descriptions.
+
+Writes two files:
+- PREFIX.txt: per method table, slowest inputs and hottest functions
+- PREFIX.collapsed: one "frame;frame;frame microseconds" line per stack,
+  readable by flamegraph.pl, speedscope and inferno
+"""
+
+import heapq
+import os
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+# Generator methods timed per call
+PROFILED_METHODS = ("analyze", "detect_job_type", "extract_key_info", "build_proposal", "generate_proposal")
+
+# Slowest inputs listed in the report
+SLOWEST_INPUTS = 10
+
+
+class Profiler:
+    """Collects method timings, call stacks and per input timings."""
+
+    def __init__(self, slowest=SLOWEST_INPUTS):
+        self.slowest = slowest
+        # method -> [calls, wall seconds, cpu seconds, slowest call]
+        self.methods = defaultdict(lambda: [0, 0.0, 0.0, 0.0])
+        # (wall seconds, chars, words, input id, preview), smallest first
+        self._inputs = []
+        self._input_count = 0
+        # stack tuple -> seconds spent in its top frame
+        self.stacks = defaultdict(float)
+        self._stack = []
+        self._last = 0.0
+        self._names = {}
+        # Profiler frames left out of the stacks
+        self._untraced = {Profiler.stop.__code__}
+        self.started = None
+        self.elapsed = 0.0
+
+    # --- method timing ---
+
+    def instrument(self, generator, methods=PROFILED_METHODS):
+        """Replace methods on this generator instance with timed wrappers"""
+        for name in methods:
+            setattr(generator, name, self._wrap(name, getattr(generator, name)))
+        return generator
+
+    def _wrap(self, name, method):
+        record = self.methods[name]
+
+        def timed(*args, **kwargs):
+            wall = time.perf_counter()
+            cpu = time.thread_time()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                cpu = time.thread_time() - cpu
+                wall = time.perf_counter() - wall
+                record[0] += 1
+                record[1] += wall
+                record[2] += cpu
+                if wall > record[3]:
+                    record[3] = wall
+        self._untraced.add(timed.__code__)
+        return timed
+
+    @contextmanager
+    def track_input(self, description, input_id=None):
+        """Time everything done for one job description"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - start
+            self._input_count += 1
+            entry = (wall, len(description), len(description.split()), input_id, description[:70])
+            if len(self._inputs) < self.slowest:
+                heapq.heappush(self._inputs, entry)
+            elif wall > self._inputs[0][0]:
+                heapq.heapreplace(self._inputs, entry)
+
+    def run(self, description, func, *args, input_id=None):
+        """Call func(*args) with call stacks traced, timed as one input"""
+        with self.track_input(description, input_id):
+            self.start()
+            try:
+                return func(*args)
+            finally:
+                self.stop()
+
+    # --- call stacks ---
+
+    def start(self):
+        self._stack = []
+        self.started = time.perf_counter()
+        self._last = self.started
+        sys.setprofile(self._trace)
+
+    def stop(self):
+        sys.setprofile(None)
+        self.elapsed += time.perf_counter() - self.started
+
+    def _frame_name(self, code):
+        name = self._names.get(code)
+        if name is None:
+            name = self._names[code] = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+        return name
+
+    def _trace(self, frame, event, arg):
+        if frame.f_code in self._untraced:
+            return
+        now = time.perf_counter()
+        stack = self._stack
+        if stack:
+            self.stacks[tuple(stack)] += now - self._last
+
+        if event == "call":
+            stack.append(self._frame_name(frame.f_code))
+        elif event == "c_call":
+            stack.append(getattr(arg, "__qualname__", None) or getattr(arg, "__name__", "?"))
+        elif stack:
+            # return, c_return, c_exception; frames entered before start()
+            # return with an empty stack and are ignored
+            stack.pop()
+        self._last = time.perf_counter()
+
+    # --- reports ---
+
+    def slowest_inputs(self):
+        return sorted(self._inputs, reverse=True)
+
+    def report(self):
+        lines = [f"Profiled {self._input_count} inputs in {self.elapsed:.3f}s", ""]
+
+        lines.append(f"{'method':<20} {'calls':>8} {'wall ms':>10} {'cpu ms':>10} {'mean us':>10} {'max us':>10}")
+        for name, (calls, wall, cpu, slowest) in sorted(self.methods.items(), key=lambda item: -item[1][1]):
+            if calls:
+                lines.append(
+                    f"{name:<20} {calls:>8} {wall * 1e3:>10.2f} {cpu * 1e3:>10.2f} "
+                    f"{wall / calls * 1e6:>10.1f} {slowest * 1e6:>10.1f}"
+                )
+
+        lines += ["", "Slowest inputs", f"{'ms':>9} {'chars':>8} {'words':>7}  id / start of text"]
+        for wall, chars, words, input_id, preview in self.slowest_inputs():
+            label = f"[{input_id}] " if input_id is not None else ""
+            preview = " ".join(preview.split())
+            lines.append(f"{wall * 1e3:>9.3f} {chars:>8} {words:>7}  {label}{preview}")
+
+        self_time = defaultdict(float)
+        for stack, seconds in self.stacks.items():
+            self_time[stack[-1]] += seconds
+        lines += ["", "Hottest functions (self time)", f"{'ms':>9}  function"]
+        for name, seconds in sorted(self_time.items(), key=lambda item: -item[1])[:25]:
+            lines.append(f"{seconds * 1e3:>9.2f}  {name}")
+        return "\n".join(lines) + "\n"
+
+    def collapsed(self):
+        """Stacks in the collapsed format, weighted by microseconds"""
+        lines = []
+        for stack, seconds in sorted(self.stacks.items()):
+            micros = round(seconds * 1e6)
+            if micros:
+                lines.append(";".join(name.replace(";", ",") for name in stack) + f" {micros}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, prefix):
+        """Write PREFIX.txt and PREFIX.collapsed and return their paths"""
+        report_path = prefix + ".txt"
+        stacks_path = prefix + ".collapsed"
+        with open(report_path, "w", encoding="utf-8") as f:
+            f.write(self.report())
+        with open(stacks_path, "w", encoding="utf-8") as f:
+            f.write(self.collapsed())
+        return report_path, stacks_path
@@ -6,87 +6,69 @@ Install required package first:
 pip install flask
 """
 
-from flask import Flask, render_template_string, request
+import json
+import os
 import re
 import random
-
-app = Flask(__name__)
+import time
+
+from compact_variants import VariantSet, clean_value, combination_sizes, experience_section, fragment_sizes, render_text
+from experience_index import ExperienceIndex
+from feature_extractor import MAX_CHARS, clip, extract_task
+from history_store import HistoryStore
+from job_queue import JobQueue, QueueFull
+from keyword_matcher import KeywordMatcher
+from metrics import REGISTRY, cache_collector, history_collector, observe_input, observe_stage, timed
+from near_duplicates import NearDuplicateIndex
+from result_cache import AnalysisCache, fingerprint
+from template_store import get_store
+from web_assets import IMMUTABLE_CACHE, StaticAssets, choose_encoding, compress_response
+
+# Request bodies above this are refused with 413 before they are parsed.
+# Parsing cost grows with the body, so this stays near what a form paste
+# and an API batch of ordinary posts need rather than a whole document
+MAX_REQUEST_BYTES = int(os.environ.get("MAX_REQUEST_BYTES", str(2 * 1024 * 1024)))
+
+# Characters of a post that are analyzed; the rest of a pasted document is
+# ignored so a huge paste costs the same as a long post
+MAX_DESCRIPTION_CHARS = int(os.environ.get("MAX_DESCRIPTION_CHARS", str(MAX_CHARS)))
+
+# Word budget for versions made from the form, matching the "Keep under
+# 200 words total" tip. 0 turns it off.
+FORM_MAX_WORDS = int(os.environ.get("FORM_MAX_WORDS", "200")) or None
 
 # ============================================
-# PROPOSAL TEMPLATES BASED ON RESEARCH
+# JOB TYPE KEYWORDS
 # ============================================
 
-TEMPLATES = {
-    "data_annotation": {
-        "openers": [
-            "I noticed you need help with {main_task}. I have annotated similar datasets before with 98%+ accuracy and understand how important clean labels are for your project.",
-            "{main_task} is exactly what I have been doing recently. I can start immediately and deliver quality work.",
-            "Your annotation project caught my attention. I have experience with similar labeling tasks and know what quality output looks like."
-        ],
-        "questions": [
-            "Quick question: do you have annotation guidelines ready or should I follow standard practices?",
-            "What format do you need for the final output?",
-            "Is there a specific tool or platform you prefer for this work?"
-        ]
-    },
-    "virtual_assistant": {
-        "openers": [
-            "You need someone reliable for {main_task}. That is exactly what I do. I respond fast, follow instructions carefully, and handle tasks without needing constant supervision.",
-            "I understand you are looking for help with {main_task}. I have supported similar clients and they appreciate that I just get things done.",
-            "{main_task} requires someone organized and responsive. I can manage these tasks efficiently while keeping you updated."
-        ],
-        "questions": [
-            "What timezone are you in? I want to make sure my availability aligns with yours.",
-            "Do you prefer email, chat, or calls for communication?",
-            "What tools or software are you currently using?"
-        ]
-    },
-    "web_research": {
-        "openers": [
-            "You need accurate {main_task}. I have built similar lists before and I verify every entry before delivering.",
-            "Finding quality {main_task} requires systematic research. I know the sources and methods that produce reliable results.",
-            "I have done this exact type of research work. Clean, verified data is what I deliver."
-        ],
-        "questions": [
-            "What specific fields do you need for each entry?",
-            "Do you have preferred sources or should I use my standard methods?",
-            "How should I handle entries where some information is unavailable?"
-        ]
-    },
-    "data_entry": {
-        "openers": [
-            "I can handle your {main_task} accurately and quickly. I type fast and double check everything before submitting.",
-            "{main_task} with zero errors is what I deliver. I have done similar projects and understand the importance of accuracy.",
-            "I have experience with exactly this type of data entry. Clean formatting, no mistakes, on time delivery."
-        ],
-        "questions": [
-            "What is the source format and where should the data be entered?",
-            "Are there specific formatting rules I should follow?",
-            "What is your expected daily or weekly volume?"
-        ]
-    }
+JOB_KEYWORDS = {
+    "data_annotation": ["annotation", "label", "tagging", "annotate", "ai training", "machine learning", "bounding box"],
+    "virtual_assistant": ["virtual assistant", "admin", "calendar", "email", "scheduling", "assistant", "administrative"],
+    "web_research": ["research", "lead", "list building", "scraping", "linkedin", "contact", "find email", "b2b"],
+    "data_entry": ["data entry", "typing", "excel", "spreadsheet", "copy", "transcription", "form"]
 }
 
-EXPERIENCE_TEMPLATES = {
-    "with": [
-        "I recently finished a similar project where I {experience}. The client was satisfied with my work.",
-        "In my previous project, I {experience}. I bring the same quality approach to every job.",
-        "I have {experience} before and know what good results look like."
-    ],
-    "without": [
-        "While I am building my experience in this specific area, I have strong attention to detail and learn quickly. I am ready to prove my quality with a test task.",
-        "I would love to take on this project and deliver great work. I am happy to do a small paid sample first so you can see my quality.",
-        "This is a great fit for my skills. I am committed to delivering quality and would welcome a trial task to demonstrate that."
-    ]
-}
+KEYWORD_MATCHER = KeywordMatcher(JOB_KEYWORDS)
 
-CLOSINGS = [
-    "Can we start with a small test batch? That way you can check my quality before committing to the full project.",
-    "I am available to start today. Would a sample task work as a first step?",
-    "Let me know if you have questions about my approach. Happy to jump on a quick call or discuss here.",
-    "I can begin within a few hours of hiring. A short sample works if you want to test first.",
-    "Ready to start when you are. I am also open to a brief call if that helps."
-]
+# Point JOB_CLASSIFIER_MODEL at a model trained with tfidf_classifier.py
+# (needs numpy) to detect job types with it instead of keyword counts
+JOB_MATCHER = KEYWORD_MATCHER
+if os.environ.get("JOB_CLASSIFIER_MODEL"):
+    from tfidf_classifier import TfidfClassifier
+    JOB_MATCHER = TfidfClassifier.load(os.environ["JOB_CLASSIFIER_MODEL"])
+
+# ============================================
+# PROPOSAL TEMPLATES BASED ON RESEARCH
+# ============================================
+
+# Openers, questions, experience lines and closings live in
+# web_templates.json so the team can edit them while the server runs.
+# Point TEMPLATE_STORE at proposal_templates_for_team.txt to use that instead.
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# A reload missing one of these sections for a job type is rejected
+TEMPLATE_SECTIONS = ("openers", "experience_with", "experience_without", "questions", "closings")
+TEMPLATE_STORE = get_store(os.path.join(BASE_DIR, "web_templates.json"), JOB_KEYWORDS, TEMPLATE_SECTIONS)
 
 # ============================================
 # HTML TEMPLATE
@@ -97,114 +79,7 @@ HTML_TEMPLATE = """
 <html>
 <head>
     <title>Upwork Proposal Generator</title>
-    <style>
-        * {
-            box-sizing: border-box;
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-        }
-        body {
-            max-width: 900px;
-            margin: 0 auto;
-            padding: 20px;
-            background: #f5f5f5;
-        }
-        h1 {
-            color: #14a800;
-            text-align: center;
-        }
-        .card {
-            background: white;
-            border-radius: 10px;
-            padding: 25px;
-            margin-bottom: 20px;
-            box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-        }
-        label {
-            display: block;
-            font-weight: bold;
-            margin-bottom: 8px;
-            color: #333;
-        }
-        textarea, input[type="text"] {
-            width: 100%;
-            padding: 12px;
-            border: 2px solid #ddd;
-            border-radius: 8px;
-            font-size: 14px;
-            margin-bottom: 15px;
-        }
-        textarea:focus, input:focus {
-            border-color: #14a800;
-            outline: none;
-        }
-        textarea {
-            min-height: 150px;
-            resize: vertical;
-        }
-        button {
-            background: #14a800;
-            color: white;
-            border: none;
-            padding: 15px 30px;
-            font-size: 16px;
-            border-radius: 8px;
-            cursor: pointer;
-            width: 100%;
-        }
-        button:hover {
-            background: #0e8a00;
-        }
-        .proposal-box {
-            background: #f9f9f9;
-            border: 1px solid #ddd;
-            border-radius: 8px;
-            padding: 20px;
-            margin-top: 15px;
-            white-space: pre-wrap;
-            line-height: 1.6;
-        }
-        .version-label {
-            background: #14a800;
-            color: white;
-            display: inline-block;
-            padding: 5px 15px;
-            border-radius: 20px;
-            font-size: 12px;
-            margin-bottom: 10px;
-        }
-        .job-type {
-            color: #666;
-            font-size: 12px;
-            margin-bottom: 10px;
-        }
-        .copy-btn {
-            background: #333;
-            padding: 8px 20px;
-            font-size: 13px;
-            width: auto;
-            margin-top: 10px;
-        }
-        .tips {
-            background: #fff3cd;
-            border: 1px solid #ffc107;
-            border-radius: 8px;
-            padding: 15px;
-            margin-top: 20px;
-        }
-        .tips h3 {
-            margin-top: 0;
-            color: #856404;
-        }
-        .tips ul {
-            margin-bottom: 0;
-            color: #856404;
-        }
-        .word-count {
-            font-size: 12px;
-            color: #666;
-            text-align: right;
-        }
-    </style>
+    <link rel="stylesheet" href="{{ css_url }}">
 </head>
 <body>
     <h1>Upwork Proposal Generator</h1>
@@ -229,6 +104,9 @@ HTML_TEMPLATE = """
     <div class="card">
         <h2>Your Proposals (3 Versions)</h2>
         <p style="color: #666;">Choose the one that feels most natural, then customize it further.</p>
+        {% if similar_to %}
+        <p class="duplicate-note">This post is {{ similar_to }}% similar to one you already generated proposals for, so those are shown again instead of new ones.</p>
+        {% endif %}
 
         {% for p in proposals %}
         <div style="margin-bottom: 30px;">
@@ -253,116 +131,254 @@ HTML_TEMPLATE = """
     </div>
     {% endif %}
 
-    <script>
-        function copyProposal(version) {
-            const text = document.getElementById('proposal' + version).innerText;
-            navigator.clipboard.writeText(text).then(() => {
-                alert('Proposal copied to clipboard!');
-            });
-        }
-    </script>
+    <script src="{{ js_url }}"></script>
 </body>
 </html>
 """
 
+STATIC_ASSETS = StaticAssets(os.path.join(BASE_DIR, "static"))
+
+# Routes and request hooks, registered on the Flask app by create_app()
+_ROUTES = []
+_HOOKS = []
+
+
+def route(rule, **options):
+    def register(view):
+        _ROUTES.append((rule, options, view))
+        return view
+    return register
+
+
+def hook(kind):
+    def register(function):
+        _HOOKS.append((kind, function))
+        return function
+    return register
+
 # ============================================
 # GENERATOR LOGIC
 # ============================================
 
+@timed("detect_job_type")
 def detect_job_type(description):
     """Detect job type from description"""
-    desc_lower = description.lower()
-
-    keywords = {
-        "data_annotation": ["annotation", "label", "tagging", "annotate", "ai training", "machine learning", "bounding box"],
-        "virtual_assistant": ["virtual assistant", "admin", "calendar", "email", "scheduling", "assistant", "administrative"],
-        "web_research": ["research", "lead", "list building", "scraping", "linkedin", "contact", "find email", "b2b"],
-        "data_entry": ["data entry", "typing", "excel", "spreadsheet", "copy", "transcription", "form"]
-    }
-
-    scores = {k: sum(1 for word in v if word in desc_lower) for k, v in keywords.items()}
-    best = max(scores, key=scores.get)
-
-    return best if scores[best] > 0 else "data_entry"
+    return JOB_MATCHER.best_match(description, default="data_entry")
 
 
+@timed("extract_main_task")
 def extract_main_task(description):
     """Extract the main task from first sentence or two"""
-    sentences = description.replace('\n', ' ').split('.')
-    if sentences:
-        main = sentences[0].strip()
+    # Only the main task is used here, so nothing past its sentence is read
+    main = extract_task(description, MAX_DESCRIPTION_CHARS)
+    if main:
         if len(main) > 120:
             main = main[:120] + "..."
         return main.lower()
     return "this work"
 
 
-def generate_proposal(job_description, experience=None, name=None):
-    """Generate a single proposal"""
+def analysis_fingerprint():
+    """What a cached analysis depends on: keywords, clipping, classifier and extraction code"""
+    model = os.environ.get("JOB_CLASSIFIER_MODEL")
+    model_stat = None
+    if model:
+        stat = os.stat(model)
+        model_stat = [stat.st_size, stat.st_mtime_ns]
+    here = os.path.dirname(os.path.abspath(__file__))
+    return fingerprint(
+        JOB_KEYWORDS, MAX_DESCRIPTION_CHARS, model, model_stat,
+        files=[os.path.join(here, name) for name in
+               ("proposal_generator_web.py", "feature_extractor.py", "keyword_matcher.py")]
+    )
 
-    job_type = detect_job_type(job_description)
-    main_task = extract_main_task(job_description)
 
-    templates = TEMPLATES[job_type]
+# Set PROPOSAL_CACHE_DB to a file path to keep analysis results across
+# restarts; it is emptied when analysis_fingerprint() changes
+CACHE_DB = os.environ.get("PROPOSAL_CACHE_DB")
+ANALYSIS_CACHE = AnalysisCache(disk_path=CACHE_DB, fingerprint=analysis_fingerprint() if CACHE_DB else None)
 
-    # Build proposal
-    parts = []
+# Posts at least this similar to an earlier one reuse its proposals
+NEAR_DUPLICATES = NearDuplicateIndex(
+    threshold=float(os.environ.get("NEAR_DUPLICATE_THRESHOLD", "0.8")),
+    max_items=int(os.environ.get("NEAR_DUPLICATE_MAX_POSTS", "100000"))
+)
 
-    # Opening
-    opener = random.choice(templates["openers"])
-    opener = opener.replace("{main_task}", main_task)
-    parts.append(opener)
+# Set PROPOSAL_EXPERIENCE_DB to a snippet library to fill in empty experience
+EXPERIENCE_DB = os.environ.get("PROPOSAL_EXPERIENCE_DB")
+EXPERIENCE_INDEX = ExperienceIndex(EXPERIENCE_DB) if EXPERIENCE_DB else None
 
-    # Experience section
-    if experience and experience.strip():
-        exp_template = random.choice(EXPERIENCE_TEMPLATES["with"])
-        exp_text = exp_template.replace("{experience}", experience.strip())
-    else:
-        exp_text = random.choice(EXPERIENCE_TEMPLATES["without"])
-    parts.append(exp_text)
+# Set PROPOSAL_EXPERIENCE_LEARN=1 to also add experience typed into the form
+# to the library. Each new snippet is a SQLite commit inside the request.
+EXPERIENCE_LEARN = os.environ.get("PROPOSAL_EXPERIENCE_LEARN", "0") == "1"
+
+# Set PROPOSAL_HISTORY_DB to keep every post and its versions. Writes happen
+# on a background thread, so requests never wait for the disk.
+HISTORY_DB = os.environ.get("PROPOSAL_HISTORY_DB")
+HISTORY = HistoryStore(HISTORY_DB) if HISTORY_DB else None
 
-    # Smart question
-    question = random.choice(templates["questions"])
-    parts.append(question)
 
-    # Closing
-    closing = random.choice(CLOSINGS)
-    parts.append(closing)
+def _analyze(description):
+    return detect_job_type(description), extract_main_task(description)
 
-    # Combine
-    proposal = "\n\n".join(parts)
 
-    if name and name.strip():
-        proposal += f"\n\n{name.strip()}"
+def analyze_description(description):
+    """Detect job type and main task once for any number of versions"""
+    description = clip(description, MAX_DESCRIPTION_CHARS)
+    job_type, main_task = ANALYSIS_CACHE.get_or_compute(description, _analyze)
+    observe_input(description, job_type)
+    return job_type, main_task
 
+
+@timed("suggest_experience")
+def suggest_experience(description, experience):
+    """Experience as given, or the best matching library snippet when empty"""
+    if EXPERIENCE_INDEX is None or (experience and experience.strip()):
+        return experience
+    return EXPERIENCE_INDEX.best(description) or experience
+
+
+def section_sizes(templates, job_type, experience=None):
+    """Number of choices for opener, experience, question and closing"""
+    return (
+        len(templates.get(job_type, "openers")),
+        len(templates.get(job_type, experience_section(experience))),
+        len(templates.get(job_type, "questions")),
+        len(templates.get(job_type, "closings"))
+    )
+
+
+@timed("render_proposal")
+def render_proposal(templates, job_type, main_task, choice, experience=None, name=None):
+    """Build proposal text from (opener, experience, question, closing) indices"""
+    return render_text(templates, job_type, main_task, choice, experience, name)
+
+
+def generate_proposal(job_description, experience=None, name=None):
+    """Generate a single proposal"""
+    templates = TEMPLATE_STORE.current()
+    job_type, main_task = analyze_description(job_description)
+    choice = tuple(random.randrange(size) for size in section_sizes(templates, job_type, experience))
+    proposal = render_proposal(templates, job_type, main_task, choice, experience, name)
+    if HISTORY is not None:
+        HISTORY.record(job_description, job_type, {"main_task": main_task}, [proposal])
     return proposal, job_type.replace("_", " ").title()
 
 
-def generate_multiple(job_description, experience=None, name=None, count=3):
-    """Generate multiple proposal versions"""
+def sample_choices(sizes, count, rng, among=None):
+    """Pick up to count distinct index tuples without replacement
+
+    among limits the picks to these combination numbers.
+    """
+    total = 1
+    for size in sizes:
+        total *= size
+    if among is None:
+        among = range(total)
+
+    choices = []
+    for combo in rng.sample(among, min(count, len(among))):
+        choice = []
+        for size in reversed(sizes):
+            combo, index = divmod(combo, size)
+            choice.append(index)
+        choices.append(tuple(reversed(choice)))
+    return choices
+
+
+@timed("fit_choices")
+def sample_fitting_choices(templates, job_type, main_task, experience, name, count, rng,
+                           max_words=None, max_chars=None):
+    """Pick up to count distinct index tuples among those within the limits
+
+    Lengths come from each template's precomputed word and character counts
+    plus those of the filled in values, so nothing is rendered to check.
+    When no combination fits, the shortest one is returned on its own.
+    """
+    sections, name_size = fragment_sizes(templates, job_type, main_task, experience, name)
+    sizes = [len(section) for section in sections]
+    max_words = float("inf") if max_words is None else max_words
+    max_chars = float("inf") if max_chars is None else max_chars
+
+    # When the longest fragments together fit, every combination does
+    longest = [[(max(size[0] for size in section), max(size[1] for size in section))] for section in sections]
+    (words,), (chars,) = combination_sizes(longest, name_size)
+    if words <= max_words and chars <= max_chars:
+        return sample_choices(sizes, count, rng)
+
+    words, chars = combination_sizes(sections, name_size)
+    fitting = [combo for combo in range(len(words)) if words[combo] <= max_words and chars[combo] <= max_chars]
+    if not fitting:
+        fitting = [min(range(len(words)), key=lambda combo: (words[combo], chars[combo]))]
+    return sample_choices(sizes, count, rng, fitting)
+
+
+def generate_variants(job_description, experience=None, name=None, count=3, seed=None,
+                      max_words=None, max_chars=None):
+    """Pick distinct template combinations for one post as a VariantSet
+
+    Versions never repeat a template combination, so fewer than count come
+    back when the job type has fewer combinations. Pass seed to get the
+    same versions again. With max_words or max_chars only combinations
+    within them are picked.
+    """
+    templates = TEMPLATE_STORE.current()
+    job_type, main_task = analyze_description(job_description)
+    rng = random.Random(seed)
+    if max_words is None and max_chars is None:
+        choices = sample_choices(section_sizes(templates, job_type, experience), count, rng)
+    else:
+        choices = sample_fitting_choices(templates, job_type, main_task, experience, name, count, rng,
+                                         max_words, max_chars)
+    variants = VariantSet(templates.version, job_type, main_task, choices)
+    if HISTORY is not None:
+        info = {"main_task": main_task, "experience": clean_value(experience), "name": clean_value(name)}
+        HISTORY.record(job_description, job_type, info, variants)
+    return variants
+
+
+def render_variants(variants, templates=None, experience=None, name=None):
+    """Version dicts for a VariantSet filled in with experience and name,
+    or None if its templates are gone"""
+    templates = templates or TEMPLATE_STORE.version(variants.templates)
+    if templates is None:
+        return None
+    label = variants.job_type.replace("_", " ").title()
+
     results = []
-    for i in range(count):
-        text, job_type = generate_proposal(job_description, experience, name)
+    for i, choice in enumerate(variants):
+        text = render_proposal(templates, variants.job_type, variants.main_task, choice, experience, name)
         word_count = len(text.split())
         results.append({
             "version": i + 1,
             "text": text,
-            "job_type": job_type,
+            "job_type": label,
             "word_count": word_count
         })
     return results
 
 
+def generate_multiple(job_description, experience=None, name=None, count=3, seed=None,
+                      max_words=None, max_chars=None):
+    """Generate multiple distinct proposal versions from one analysis"""
+    variants = generate_variants(job_description, experience, name, count, seed, max_words, max_chars)
+    return render_variants(variants, experience=experience, name=name)
+
+
 # ============================================
 # ROUTES
 # ============================================
 
-@app.route("/", methods=["GET", "POST"])
+@route("/", methods=["GET", "POST"])
 def home():
     proposals = None
+    similar_to = None
     job_description = ""
     experience = ""
     name = ""
+    # Stage durations in ms, sent as a Server-Timing header for load tests
+    # and browser dev tools
+    timings = []
 
     if request.method == "POST":
         job_description = request.form.get("job_description", "")
@@ -370,15 +386,439 @@ def home():
         name = request.form.get("name", "")
 
         if job_description.strip():
-            proposals = generate_multiple(job_description, experience, name)
-
-    return render_template_string(
-        HTML_TEMPLATE,
+            # Only the start of a paste is used, and only that is shown back
+            analyzed = clip(job_description, MAX_DESCRIPTION_CHARS)
+            job_description = analyzed
+            start = time.perf_counter()
+            signature = NEAR_DUPLICATES.signature(analyzed)
+            match = NEAR_DUPLICATES.query(signature=signature)
+            timings.append(("dedupe", time.perf_counter() - start))
+
+            if EXPERIENCE_INDEX is not None:
+                start = time.perf_counter()
+                if EXPERIENCE_LEARN and experience.strip():
+                    # Typed experience is kept for the next similar post
+                    EXPERIENCE_INDEX.add(experience)
+                used_experience = suggest_experience(analyzed, experience)
+                timings.append(("experience", time.perf_counter() - start))
+            else:
+                used_experience = experience
+
+            proposals = None
+            if match:
+                # A repost reuses the earlier analysis and template choices, filled
+                # in with this form's experience and name, unless the templates
+                # have changed too often since
+                start = time.perf_counter()
+                proposals = render_variants(match.payload, experience=used_experience, name=name)
+                timings.append(("generate", time.perf_counter() - start))
+            if proposals is not None:
+                NEAR_DUPLICATE_LOOKUPS.inc("hit")
+                similar_to = round(match.similarity * 100)
+            else:
+                NEAR_DUPLICATE_LOOKUPS.inc("miss")
+                start = time.perf_counter()
+                variants = generate_variants(analyzed, used_experience, name, max_words=FORM_MAX_WORDS)
+                proposals = render_variants(variants, experience=used_experience, name=name)
+                timings.append(("generate", time.perf_counter() - start))
+                NEAR_DUPLICATES.add(payload=variants, signature=signature)
+
+    start = time.perf_counter()
+    page = PAGE_TEMPLATE.render(
         proposals=proposals,
+        similar_to=similar_to,
         job_description=job_description,
         experience=experience,
         name=name
     )
+    timings.append(("render", time.perf_counter() - start))
+    for stage, seconds in timings:
+        observe_stage("page_" + stage, seconds)
+    return page, {"Server-Timing": server_timing(timings)}
+
+
+def server_timing(timings):
+    """Server-Timing header value from (stage, seconds) pairs"""
+    return ", ".join(f"{stage};dur={seconds * 1000:.3f}" for stage, seconds in timings)
+
+
+@route("/static/<path:filename>")
+def static_file(filename):
+    """Serve a preloaded static file with ETag, long caching and compression"""
+    asset = STATIC_ASSETS.get(filename)
+    if asset is None:
+        abort(404)
+
+    headers = {
+        "ETag": f'"{asset.etag}"',
+        "Cache-Control": IMMUTABLE_CACHE,
+        "Vary": "Accept-Encoding"
+    }
+    if asset.etag in request.if_none_match:
+        return app.response_class(status=304, headers=headers)
+
+    body, encoding = asset.body(choose_encoding(request.headers.get("Accept-Encoding", "")))
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return app.response_class(body, mimetype=asset.mimetype, headers=headers)
+
+
+@hook("after_request")
+def compress(response):
+    return compress_response(response, request.headers.get("Accept-Encoding", ""))
+
+
+# ============================================
+# METRICS
+# ============================================
+
+REQUESTS = REGISTRY.counter(
+    "proposal_http_requests_total", "HTTP requests by endpoint, method and status",
+    labels=("endpoint", "method", "status")
+)
+REQUEST_SECONDS = REGISTRY.histogram(
+    "proposal_http_request_seconds", "HTTP request latency by endpoint", labels=("endpoint",)
+)
+NEAR_DUPLICATE_LOOKUPS = REGISTRY.counter(
+    "proposal_near_duplicate_lookups_total", "Form posts checked against earlier posts", labels=("result",)
+)
+
+REGISTRY.add_collector(cache_collector("proposal_analysis_cache", ANALYSIS_CACHE))
+REGISTRY.add_collector(lambda: [
+    ("proposal_near_duplicate_posts", "Posts held in the near duplicate index", "gauge", len(NEAR_DUPLICATES))
+])
+if HISTORY is not None:
+    REGISTRY.add_collector(history_collector("proposal_history", HISTORY))
+
+
+@hook("before_request")
+def start_timer():
+    g.request_start = time.perf_counter()
+
+
+@hook("after_request")
+def record_request(response):
+    if REGISTRY.enabled:
+        endpoint = request.endpoint or "unknown"
+        REQUESTS.inc(endpoint, request.method, str(response.status_code))
+        REQUEST_SECONDS.observe(time.perf_counter() - g.request_start, endpoint)
+    return response
+
+
+@route("/metrics")
+def metrics():
+    """Prometheus scrape endpoint for this worker"""
+    if not REGISTRY.enabled:
+        abort(404)
+    return app.response_class(REGISTRY.export(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+# ============================================
+# JSON API
+# ============================================
+
+# Largest number of posts accepted in one batch call
+API_MAX_BATCH = int(os.environ.get("API_MAX_BATCH", "100"))
+
+# Largest number of versions per post
+API_MAX_VARIANTS = 50
+
+
+def json_response(data, status=200):
+    """Compact JSON response without the pretty printing overhead"""
+    return app.response_class(
+        json.dumps(data, separators=(",", ":")),
+        status=status,
+        mimetype="application/json"
+    )
+
+
+def _optional_text(item, key):
+    value = item.get(key)
+    if value is not None and not isinstance(value, str):
+        raise ValueError(f"{key} must be a string")
+    return value
+
+
+def api_generate(item):
+    """Generate versions for one API post, or return {"error": ...}"""
+    if not isinstance(item, dict):
+        return {"error": "each post must be a JSON object"}
+
+    try:
+        job_description = _optional_text(item, "job_description")
+        experience = _optional_text(item, "experience")
+        name = _optional_text(item, "name")
+    except ValueError as e:
+        return {"error": str(e)}
+
+    if not job_description or not job_description.strip():
+        return {"error": "job_description is required"}
+    job_description = clip(job_description, MAX_DESCRIPTION_CHARS)
+
+    count = item.get("count", 3)
+    if not isinstance(count, int) or isinstance(count, bool) or not 1 <= count <= API_MAX_VARIANTS:
+        return {"error": f"count must be a whole number from 1 to {API_MAX_VARIANTS}"}
+
+    seed = item.get("seed")
+    if seed is not None and not isinstance(seed, (int, str)):
+        return {"error": "seed must be a number or a string"}
+
+    # Optional length limits; versions are only picked among those within them
+    limits = {}
+    for key in ("max_words", "max_chars"):
+        value = item.get(key)
+        if value is not None and (not isinstance(value, int) or isinstance(value, bool) or value < 1):
+            return {"error": f"{key} must be a positive whole number"}
+        limits[key] = value
+
+    experience = suggest_experience(job_description, experience)
+    proposals = generate_multiple(job_description, experience, name, count, seed, **limits)
+    if not proposals:
+        # The template version was dropped between picking and rendering
+        return {"error": "templates changed while generating, try again"}
+    return {
+        "job_type": proposals[0]["job_type"],
+        "variants": [
+            {"version": p["version"], "text": p["text"], "word_count": p["word_count"]}
+            for p in proposals
+        ]
+    }
+
+
+def _wants_stream():
+    return (
+        request.args.get("stream") in ("1", "true")
+        or "application/x-ndjson" in request.headers.get("Accept", "")
+    )
+
+
+@route("/api/v1/proposals", methods=["POST"])
+def api_proposals():
+    """Proposals for one post ({"job_description": ...}) or a batch
+
+    A batch is a JSON array of posts or {"posts": [...]}. Add ?stream=1 or
+    Accept: application/x-ndjson to get one result per line as they finish.
+    """
+    payload = request.get_json(silent=True)
+    if payload is None:
+        return json_response({"error": "request body must be JSON"}, 400)
+
+    if isinstance(payload, dict) and "posts" not in payload:
+        result = api_generate(payload)
+        return json_response(result, 400 if "error" in result else 200)
+
+    posts = payload.get("posts") if isinstance(payload, dict) else payload
+    if not isinstance(posts, list):
+        return json_response({"error": "posts must be a JSON array"}, 400)
+    if len(posts) > API_MAX_BATCH:
+        return json_response({"error": f"at most {API_MAX_BATCH} posts per call"}, 413)
+
+    if _wants_stream():
+        def stream():
+            for index, item in enumerate(posts):
+                result = api_generate(item)
+                result["index"] = index
+                yield json.dumps(result, separators=(",", ":")) + "\n"
+
+        return app.response_class(stream(), mimetype="application/x-ndjson")
+
+    results = []
+    for index, item in enumerate(posts):
+        result = api_generate(item)
+        result["index"] = index
+        results.append(result)
+    return json_response({"results": results})
+
+
+@route("/healthz")
+def health():
+    """Liveness check for load balancers and serve.py"""
+    return json_response({
+        "status": "ok",
+        "pid": os.getpid(),
+        "templates": TEMPLATE_STORE.current().version
+    })
+
+
+# ============================================
+# BACKGROUND JOBS
+# ============================================
+
+# Largest number of posts in one job
+JOB_MAX_POSTS = int(os.environ.get("JOB_MAX_POSTS", "1000"))
+
+# Longest ?wait= a poll may ask for, in seconds
+JOB_MAX_WAIT = 30.0
+
+
+def _indexed_result(item):
+    index, post = item
+    result = api_generate(post)
+    result["index"] = index
+    return result
+
+
+# Job worker threads per process. The job endpoints are off unless this is
+# set, since jobs live in one process and serve.py then runs one worker.
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "0"))
+
+# Big batches run here instead of holding a request thread, so form posts
+# stay fast while they run
+JOBS = None
+if JOB_WORKERS > 0:
+    JOBS = JobQueue(
+        _indexed_result,
+        workers=JOB_WORKERS,
+        per_client=int(os.environ.get("JOB_PER_CLIENT", "2")),
+        ttl=float(os.environ.get("JOB_TTL", "600"))
+    )
+
+    REGISTRY.add_collector(lambda: [
+        (f"proposal_jobs_{name}", help_text, kind, JOBS.stats()[name])
+        for name, help_text, kind in [
+            ("jobs", "Jobs held, finished or not", "gauge"),
+            ("waiting", "Posts waiting for a job worker", "gauge"),
+            ("running", "Posts being generated by job workers", "gauge"),
+            ("completed", "Posts finished by job workers", "counter"),
+        ]
+    ])
+
+
+def _client_id():
+    return request.headers.get("X-Client-Id") or request.remote_addr or "unknown"
+
+
+def _jobs_or_404():
+    if JOBS is None:
+        abort(json_response({"error": "background jobs are turned off; set JOB_WORKERS to turn them on"}, 404))
+    return JOBS
+
+
+def _job_or_404(job_id):
+    job = _jobs_or_404().get(job_id)
+    if job is None:
+        abort(json_response({"error": "unknown or expired job"}, 404))
+    return job
+
+
+@route("/api/v1/jobs", methods=["POST"])
+def submit_job():
+    """Queue posts (same body as /api/v1/proposals) and return a job id at once"""
+    _jobs_or_404()
+    payload = request.get_json(silent=True)
+    if payload is None:
+        return json_response({"error": "request body must be JSON"}, 400)
+
+    if isinstance(payload, dict) and "posts" not in payload:
+        posts = [payload]
+    else:
+        posts = payload.get("posts") if isinstance(payload, dict) else payload
+    if not isinstance(posts, list):
+        return json_response({"error": "posts must be a JSON array"}, 400)
+    if len(posts) > JOB_MAX_POSTS:
+        return json_response({"error": f"at most {JOB_MAX_POSTS} posts per job"}, 413)
+
+    try:
+        job = JOBS.submit(_client_id(), enumerate(posts))
+    except QueueFull as e:
+        return json_response({"error": str(e)}, 429)
+
+    response = json_response(dict(job.summary(), results_url=f"/api/v1/jobs/{job.id}"), 202)
+    response.headers["Location"] = f"/api/v1/jobs/{job.id}"
+    return response
+
+
+@route("/api/v1/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    """Job progress and results
+
+    ?after=N returns only results after the first N, in finishing order;
+    ?wait=S holds the reply up to S seconds until there is something new.
+    ?stream=1 or Accept: application/x-ndjson streams each result as it
+    finishes and ends with the job summary.
+    """
+    job = _job_or_404(job_id)
+
+    if _wants_stream():
+        def stream():
+            seen = 0
+            while True:
+                done = JOBS.wait(job, seen, JOB_MAX_WAIT)
+                for index in job.finished_order[seen:done]:
+                    yield json.dumps(job.results[index], separators=(",", ":")) + "\n"
+                seen = done
+                if job.finished is not None and seen >= job.done:
+                    break
+            yield json.dumps(job.summary(), separators=(",", ":")) + "\n"
+
+        return app.response_class(stream(), mimetype="application/x-ndjson")
+
+    try:
+        after = max(int(request.args.get("after", 0)), 0)
+        wait = min(max(float(request.args.get("wait", 0)), 0.0), JOB_MAX_WAIT)
+    except ValueError:
+        return json_response({"error": "after and wait must be numbers"}, 400)
+    if wait:
+        JOBS.wait(job, after, wait)
+
+    finished = job.finished_order[after:]
+    return json_response(dict(
+        job.summary(),
+        results=[job.results[index] for index in finished],
+        next=after + len(finished)
+    ))
+
+
+@route("/api/v1/jobs/<job_id>", methods=["DELETE"])
+def cancel_job(job_id):
+    """Drop the job's waiting posts; results so far stay readable"""
+    _job_or_404(job_id)
+    return json_response(JOBS.cancel(job_id).summary())
+
+
+# ============================================
+# APP
+# ============================================
+
+def create_app():
+    """Import Flask and build the app with every route above
+
+    Flask is only imported here, so the CLI, batch runs and benchmarks that
+    import this module for its generator functions never load it.
+    """
+    global app, request, g, abort, PAGE_TEMPLATE
+    if "app" in globals():
+        return app
+    from flask import Flask, abort, g, request
+
+    # Static files are served from memory by static_file()
+    flask_app = Flask(__name__, static_folder=None)
+    flask_app.config["MAX_CONTENT_LENGTH"] = MAX_REQUEST_BYTES
+
+    # Compiled once at startup instead of on every request
+    PAGE_TEMPLATE = flask_app.jinja_env.from_string(
+        HTML_TEMPLATE,
+        globals={
+            "css_url": STATIC_ASSETS.url("style.css"),
+            "js_url": STATIC_ASSETS.url("app.js")
+        }
+    )
+
+    for rule, options, view in _ROUTES:
+        flask_app.add_url_rule(rule, view_func=view, **options)
+    for kind, function in _HOOKS:
+        getattr(flask_app, kind)(function)
+
+    app = flask_app
+    return app
+
+
+def __getattr__(name):
+    # "from proposal_generator_web import app" (serve.py, gunicorn) builds it
+    if name == "app":
+        return create_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 if __name__ == "__main__":
@@ -388,6 +828,7 @@ if __name__ == "__main__":
     print("\nStarting web server...")
     print("Open your browser and go to: http://localhost:5000")
     print("\nPress Ctrl+C to stop the server")
+    print("For a team or production setup run: python serve.py")
     print("="*50 + "\n")
 
-    app.run(debug=True, port=5000)
+    create_app().run(debug=True, port=5000)
@@ -0,0 +1,238 @@
+"""
+Result Cache
+Remembers the analysis of job descriptions (job type and extracted info) so
+reposted or re-pasted jobs skip detection and extraction. Only rendering
+runs again, which keeps different experience or name values working.
+
+Memory tier: bounded LRU. Optional disk tier: a SQLite file that survives
+restarts, holding results as JSON. It keeps the fingerprint of the rules
+and code that produced its rows (see fingerprint()) and starts empty when
+that changes, and drops its least recently used rows past disk_maxsize.
+New rows and use times are written in batches rather than one commit per
+request; flush() writes what is pending and runs at exit.
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_MAXSIZE = 2048
+
+# Rows kept in the disk tier
+DEFAULT_DISK_MAXSIZE = 100000
+
+# Rows allowed over disk_maxsize before the oldest are deleted, so trimming
+# runs once per this many inserts rather than on every one
+_DISK_SLACK = 0.1
+
+# Pending disk writes are flushed once there are this many, or once the
+# oldest has waited this many seconds
+_DISK_BATCH = 64
+_DISK_FLUSH_SECONDS = 2.0
+
+
+def cache_key(description):
+    """Hash of the description with case and whitespace differences removed"""
+    normalized = " ".join(description.lower().split())
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+def fingerprint(*settings, files=()):
+    """Hash of the settings (JSON-able) and source files an analysis depends on"""
+    digest = hashlib.sha1(json.dumps(settings, sort_keys=True, default=str).encode("utf-8"))
+    for path in files:
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+class AnalysisCache:
+    """LRU cache of analysis results with hit, miss and eviction counters.
+
+    Cached values are shared between callers, so treat them as read only.
+    With a disk tier they must be JSON-able; a top level list or tuple
+    comes back from disk as a tuple, nested ones as lists.
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, disk_path=None, fingerprint=None,
+                 disk_maxsize=DEFAULT_DISK_MAXSIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_hits = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.disk_path = disk_path
+        self.fingerprint = fingerprint or ""
+        self.disk_maxsize = disk_maxsize
+        self.disk_evictions = 0
+        self._disk_rows = 0
+        self._connection = None
+        self._connection_pid = None
+        # key -> (JSON to insert, or None to only update the use time, use time)
+        self._pending = {}
+        self._pending_since = 0.0
+        if disk_path:
+            atexit.register(self.flush)
+
+    def get_or_compute(self, description, compute):
+        """Return the cached result for description, calling compute on a miss"""
+        key = cache_key(description)
+
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                if self.disk_path:
+                    self._touch(key)
+                return value
+
+        value = self._disk_get(key)
+        if value is not None:
+            with self._lock:
+                self.hits += 1
+                self.disk_hits += 1
+                self._store(key, value)
+            return value
+
+        value = compute(description)
+        with self._lock:
+            self.misses += 1
+            self._store(key, value)
+        self._disk_put(key, value)
+        return value
+
+    def _store(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    @property
+    def _disk(self):
+        """SQLite connection for this process. Connections must not cross a fork."""
+        if not self.disk_path:
+            return None
+        if self._connection_pid != os.getpid():
+            # Imported here so memory only caches do not pay for sqlite3 at startup
+            import sqlite3
+            connection = sqlite3.connect(self.disk_path, check_same_thread=False)
+            with connection:
+                connection.execute("CREATE TABLE IF NOT EXISTS cache_info (name TEXT PRIMARY KEY, value TEXT)")
+                row = connection.execute("SELECT value FROM cache_info WHERE name = 'fingerprint'").fetchone()
+                if row is None or row[0] != self.fingerprint:
+                    # Rows from other rules or code (or pickled by older versions) would be wrong
+                    connection.execute("DROP TABLE IF EXISTS analysis")
+                    connection.execute(
+                        "INSERT OR REPLACE INTO cache_info (name, value) VALUES ('fingerprint', ?)",
+                        (self.fingerprint,)
+                    )
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS analysis (key TEXT PRIMARY KEY, value TEXT NOT NULL, used REAL NOT NULL)"
+                )
+                connection.execute("CREATE INDEX IF NOT EXISTS analysis_used ON analysis (used)")
+            self._disk_rows = connection.execute("SELECT COUNT(*) FROM analysis").fetchone()[0]
+            self._connection = connection
+            self._connection_pid = os.getpid()
+        return self._connection
+
+    def _disk_get(self, key):
+        if not self.disk_path:
+            return None
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending is not None and pending[0] is not None:
+                encoded = pending[0]
+            else:
+                row = self._disk.execute("SELECT value FROM analysis WHERE key = ?", (key,)).fetchone()
+                if not row:
+                    return None
+                encoded = row[0]
+            self._touch(key)
+        value = json.loads(encoded)
+        return tuple(value) if isinstance(value, list) else value
+
+    def _disk_put(self, key, value):
+        if not self.disk_path:
+            return
+        encoded = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            self._queue(key, encoded)
+
+    def _touch(self, key):
+        """Queue a use time update so disk eviction drops the least recently used rows"""
+        pending = self._pending.get(key)
+        self._queue(key, pending[0] if pending else None)
+
+    def _queue(self, key, encoded):
+        now = time.time()
+        if not self._pending:
+            self._pending_since = now
+        self._pending[key] = (encoded, now)
+        if len(self._pending) >= _DISK_BATCH or now - self._pending_since >= _DISK_FLUSH_SECONDS:
+            self._flush()
+
+    def flush(self):
+        """Write pending rows and use times to the disk tier"""
+        if not self.disk_path:
+            return
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        disk = self._disk
+        disk.executemany(
+            "INSERT OR REPLACE INTO analysis (key, value, used) VALUES (?, ?, ?)",
+            [(key, encoded, used) for key, (encoded, used) in pending.items() if encoded is not None]
+        )
+        disk.executemany(
+            "UPDATE analysis SET used = ? WHERE key = ?",
+            [(used, key) for key, (encoded, used) in pending.items() if encoded is None]
+        )
+        # Replacing a row counts too, so this only overestimates
+        self._disk_rows += sum(1 for encoded, _ in pending.values() if encoded is not None)
+        if self._disk_rows > self.disk_maxsize * (1 + _DISK_SLACK):
+            self._disk_rows = disk.execute("SELECT COUNT(*) FROM analysis").fetchone()[0]
+            extra = self._disk_rows - self.disk_maxsize
+            if extra > 0:
+                disk.execute(
+                    "DELETE FROM analysis WHERE key IN (SELECT key FROM analysis ORDER BY used LIMIT ?)",
+                    (extra,)
+                )
+                self.disk_evictions += extra
+                self._disk_rows -= extra
+        disk.commit()
+
+    def stats(self):
+        """Counters for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "disk_hits": self.disk_hits,
+                "disk_evictions": self.disk_evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._pending.clear()
+            if self.disk_path:
+                self._disk.execute("DELETE FROM analysis")
+                self._disk.commit()
+                self._disk_rows = 0
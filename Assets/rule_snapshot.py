@@ -0,0 +1,139 @@
+"""
+Rule Snapshot
+Keeps the built keyword tables of the keyword matchers in one marshal
+file, so a short run loads them with a single read instead of expanding
+every keyword into its inflections and nested forms again.
+
+The first run builds what it needs and saves it on exit; later runs reuse
+it. Entries are keyed by their full input (the keyword table), so editing
+a table simply builds a new entry. The file lives in the user's cache
+directory and is tied to the Python version like a .pyc; a file from
+another version is ignored and rebuilt.
+
+Set PROPOSAL_RULE_SNAPSHOT to another path, or to 0 to turn it off.
+
+Usage:
+python rule_snapshot.py build
+python rule_snapshot.py clear
+"""
+
+import atexit
+import marshal
+import os
+import sys
+import threading
+
+
+def _cache_dir():
+    """Per user cache directory for this platform"""
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser(os.path.join("~", "AppData", "Local"))
+    elif sys.platform == "darwin":
+        base = os.path.expanduser(os.path.join("~", "Library", "Caches"))
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser(os.path.join("~", ".cache"))
+    return os.path.join(base, "upwork-proposal-generator")
+
+
+_DEFAULT_PATH = os.path.join(_cache_dir(), f"rule_snapshot.{sys.implementation.cache_tag}.marshal")
+
+_setting = os.environ.get("PROPOSAL_RULE_SNAPSHOT", "")
+SNAPSHOT_PATH = None if _setting == "0" else _setting or _DEFAULT_PATH
+
+_HEADER = ("proposal-rules", 2, sys.implementation.cache_tag)
+
+_lock = threading.Lock()
+_entries = None
+_added = False
+
+
+def _load():
+    """Entries from the snapshot file, read once per process"""
+    global _entries
+    if _entries is None:
+        entries = {}
+        if SNAPSHOT_PATH:
+            try:
+                with open(SNAPSHOT_PATH, "rb") as f:
+                    header, stored = marshal.loads(f.read())
+                if header == _HEADER:
+                    entries = stored
+            except (OSError, ValueError, EOFError, TypeError):
+                pass
+        _entries = entries
+    return _entries
+
+
+def cached(key, build):
+    """build() once and keep its result in the snapshot. key and value must be marshal-able."""
+    global _added
+    entries = _load()
+    value = entries.get(key)
+    if value is None:
+        value = build()
+        with _lock:
+            entries[key] = value
+            _added = True
+    return value
+
+
+def save():
+    """Write the snapshot if this process added entries to it"""
+    if not (SNAPSHOT_PATH and _added):
+        return False
+    with _lock:
+        data = marshal.dumps((_HEADER, _entries))
+    temp_path = f"{SNAPSHOT_PATH}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(SNAPSHOT_PATH), exist_ok=True)
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, SNAPSHOT_PATH)
+    except OSError:
+        # Without a writable cache directory every run just builds the tables
+        return False
+    return True
+
+
+atexit.register(save)
+
+
+def clear():
+    global _entries, _added
+    with _lock:
+        _entries = {}
+        _added = False
+    if SNAPSHOT_PATH:
+        try:
+            os.remove(SNAPSHOT_PATH)
+        except FileNotFoundError:
+            pass
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Build or clear the keyword table snapshot")
+    parser.add_argument("command", choices=["build", "clear"])
+    args = parser.parse_args(argv)
+
+    # Run as a script this file is __main__; the generators use the imported module
+    import rule_snapshot
+    if not rule_snapshot.SNAPSHOT_PATH:
+        print("PROPOSAL_RULE_SNAPSHOT=0, nothing to do")
+        return 0
+    rule_snapshot.clear()
+    if args.command == "build":
+        # Building the generators builds every keyword table they use
+        import proposal_generator_web
+        from upwork_proposal_generator import UpworkProposalGenerator
+        UpworkProposalGenerator()
+        rule_snapshot.save()
+        size = os.path.getsize(rule_snapshot.SNAPSHOT_PATH)
+        print(f"Wrote {len(rule_snapshot._entries)} entries to {rule_snapshot.SNAPSHOT_PATH} ({size:,} bytes)")
+    else:
+        print(f"Removed {rule_snapshot.SNAPSHOT_PATH}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
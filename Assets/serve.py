@@ -0,0 +1,175 @@
+"""
+Upwork Proposal Generator - Production Server
+Runs the web app with several worker processes instead of the single
+development server.
+
+The app (keyword tables, templates, static files) is imported once in the
+parent before workers are forked, so every worker shares that memory.
+
+Uses gunicorn when it is installed (pip install gunicorn), otherwise a
+built in pre-fork server on top of Werkzeug. On systems without fork
+(Windows) the built in server runs one threaded process.
+
+Background jobs are off by default. They live in the worker that accepted
+them, so a poll sent to another worker would not find its job; turning
+them on with JOB_WORKERS=2 makes the server run one worker.
+
+Usage:
+python serve.py --workers 4 --threads 8 --port 5000
+JOB_WORKERS=2 python serve.py --threads 16 --port 5000
+"""
+
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+
+from werkzeug.serving import make_server
+
+import proposal_generator_web
+from proposal_generator_web import app
+
+
+def run_gunicorn(args):
+    from gunicorn.app.base import BaseApplication
+
+    class ProposalApplication(BaseApplication):
+        def load_config(self):
+            self.cfg.set("bind", f"{args.host}:{args.port}")
+            self.cfg.set("workers", args.workers)
+            self.cfg.set("threads", args.threads)
+            self.cfg.set("worker_class", "gthread")
+            self.cfg.set("preload_app", True)
+            self.cfg.set("graceful_timeout", args.graceful_timeout)
+            self.cfg.set("backlog", args.backlog)
+
+        def load(self):
+            return app
+
+    ProposalApplication().run()
+
+
+def _run_worker(sock, args):
+    """Serve requests from the shared socket until told to stop"""
+    server = make_server(args.host, args.port, app, threaded=True, fd=sock.fileno())
+    # Let in flight requests finish when the server closes
+    server.daemon_threads = False
+
+    def stop(signum, frame):
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    server.serve_forever()
+    server.server_close()
+
+
+def run_builtin(args):
+    sock = socket.socket(socket.AF_INET6 if ":" in args.host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(args.backlog)
+    sock.set_inheritable(True)
+
+    if not hasattr(os, "fork"):
+        _run_worker(sock, args)
+        return
+
+    # Objects built during import are never collected, so the garbage
+    # collector does not touch (and copy) their pages in every worker
+    gc.freeze()
+
+    workers = {}
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            try:
+                _run_worker(sock, args)
+            finally:
+                os._exit(0)
+        workers[pid] = time.monotonic()
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for _ in range(args.workers):
+        spawn()
+    print(f"Serving on http://{args.host}:{args.port} with {args.workers} workers (pid {os.getpid()})")
+
+    deadline = None
+    while workers:
+        if stopping and deadline is None:
+            deadline = time.monotonic() + args.graceful_timeout
+        try:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            break
+        if pid == 0:
+            if deadline and time.monotonic() > deadline:
+                for pid in workers:
+                    os.kill(pid, signal.SIGKILL)
+                deadline = None
+            time.sleep(0.1)
+            continue
+
+        started = workers.pop(pid, None)
+        if not stopping and started is not None:
+            # Back off a little if a worker keeps dying on startup
+            if time.monotonic() - started < 1:
+                time.sleep(1)
+            spawn()
+
+    sock.close()
+    print("Server stopped")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the proposal generator web app")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="worker processes (default: one per CPU; always one while background jobs are on)")
+    parser.add_argument("--threads", type=int, default=8,
+                        help="threads per worker (gunicorn only, the built in server starts one per request)")
+    parser.add_argument("--graceful-timeout", type=int, default=30,
+                        help="seconds to let requests finish on shutdown")
+    parser.add_argument("--backlog", type=int, default=2048)
+    parser.add_argument("--server", choices=["auto", "gunicorn", "builtin"], default="auto")
+    args = parser.parse_args(argv)
+
+    if proposal_generator_web.JOBS is not None and args.workers > 1:
+        print(f"Background jobs are on, so running 1 worker instead of {args.workers}: a job is only "
+              "known to the worker that accepted it. Unset JOB_WORKERS to turn them off.", file=sys.stderr)
+        args.workers = 1
+
+    server = args.server
+    if server == "auto":
+        try:
+            import gunicorn  # noqa: F401
+            server = "gunicorn" if hasattr(os, "fork") else "builtin"
+        except ImportError:
+            server = "builtin"
+
+    if server == "gunicorn":
+        run_gunicorn(args)
+    else:
+        run_builtin(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,6 @@
+function copyProposal(version) {
+    const text = document.getElementById('proposal' + version).innerText;
+    navigator.clipboard.writeText(text).then(() => {
+        alert('Proposal copied to clipboard!');
+    });
+}
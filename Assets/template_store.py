@@ -0,0 +1,341 @@
+"""
+Template Store
+Loads proposal templates from a file the team can edit, compiles each one
+into literal and placeholder segments, and reloads the file when it changes.
+
+Two formats are understood:
+- .json with {placeholder} fields:
+  {"job_types": {"data_entry": {"openers": ["..."]}}, "shared": {"closings": ["..."]}}
+- the team quick reference .txt with [BRACKETED] fields
+
+A store can be told which job types and sections its generator uses. A
+file missing any of them is rejected and the last good templates stay in
+use, so a bad edit shows up in the log instead of failing proposals.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Seconds between mtime checks, so a busy server does not stat on every call
+CHECK_INTERVAL = 1.0
+
+# Earlier template sets kept per store, so proposals saved as template
+# choices still render after the file is edited
+KEPT_VERSIONS = 8
+
+_FIELD = re.compile(r"\{([a-z_]+)\}|\[([^\[\]\n]+)\]")
+
+# Bracketed team placeholders that map onto generator fields. Anything else
+# stays in the text for the person sending the proposal to fill in.
+_BRACKET_FIELDS = [
+    ("YOUR NAME", "name"),
+    ("PAST WORK", "experience"),
+    ("SIMILAR WORK", "experience"),
+    ("TASK", "main_task"),
+]
+
+_TEAM_JOB_TYPES = {
+    "DATA ANNOTATION": "data_annotation",
+    "VIRTUAL ASSISTANT": "virtual_assistant",
+    "WEB RESEARCH": "web_research",
+    "DATA ENTRY": "data_entry",
+}
+
+# Paragraph order inside every TEMPLATE block of the team file
+_TEAM_SECTIONS = ["openers", "experience_with", "questions", "closings"]
+
+
+def text_size(text):
+    """(words, chars, starts inside a word, ends inside a word) of text"""
+    return len(text.split()), len(text), bool(text) and not text[0].isspace(), bool(text) and not text[-1].isspace()
+
+
+def joined_size(sizes):
+    """(words, chars) of text_size() pieces put together with nothing between them
+
+    A piece ending inside a word and the next one starting inside a word
+    make one word where they meet, as in "{main_task}." or "[TASK]s".
+    """
+    words = chars = 0
+    in_word = False
+    for piece_words, piece_chars, starts, ends in sizes:
+        if not piece_chars:
+            continue
+        words += piece_words - (in_word and starts)
+        chars += piece_chars
+        in_word = ends
+    return words, chars
+
+
+class Template:
+    """A template split into literal parts and the slots to fill."""
+
+    __slots__ = ("source", "parts", "slots", "part_sizes")
+
+    def __init__(self, source, bracket_fields=False):
+        self.source = source
+        self.parts = []
+        # (index into parts, field name, text to keep when the field is missing)
+        slots = []
+        position = 0
+        for match in _FIELD.finditer(source):
+            if match.group(1):
+                field = match.group(1)
+            elif bracket_fields:
+                field = _bracket_field(match.group(2))
+            else:
+                field = None
+            if field is None:
+                continue
+            self.parts.append(source[position:match.start()])
+            slots.append((len(self.parts), field, match.group(0)))
+            self.parts.append(match.group(0))
+            position = match.end()
+        self.parts.append(source[position:])
+        self.slots = tuple(slots)
+        # text_size() of every part, slots measured as their original text
+        # until values are known
+        self.part_sizes = tuple(text_size(part) for part in self.parts)
+
+    @property
+    def fields(self):
+        return {field for _, field, _ in self.slots}
+
+    def render(self, values):
+        """Fill every slot from values in one join"""
+        if not self.slots:
+            return self.parts[0]
+        parts = self.parts[:]
+        for index, field, original in self.slots:
+            value = values.get(field)
+            parts[index] = original if value is None else value
+        return "".join(parts)
+
+    def size(self, value_sizes):
+        """(words, chars) of render() output, from text_size() of each field's value"""
+        if not self.slots:
+            return self.part_sizes[0][:2]
+        sizes = list(self.part_sizes)
+        for index, field, _ in self.slots:
+            value_size = value_sizes.get(field)
+            if value_size is not None:
+                sizes[index] = value_size
+        return joined_size(sizes)
+
+
+def _bracket_field(label):
+    label = label.upper()
+    for marker, field in _BRACKET_FIELDS:
+        if marker in label:
+            return field
+    return None
+
+
+class TemplateSet:
+    """One loaded version of a template file. Never changes once built."""
+
+    def __init__(self, job_types, shared, version, kind="json", source=None):
+        self.job_types = job_types
+        self.shared = shared
+        self.version = version
+        # File format and text, enough to rebuild this set elsewhere
+        self.kind = kind
+        self.source = source
+
+    def get(self, job_type, section):
+        """Templates for a section, falling back to the shared ones"""
+        templates = self.job_types.get(job_type, {}).get(section)
+        if templates is None:
+            templates = self.shared.get(section, ())
+        return templates
+
+    def first(self, job_type, section):
+        return self.get(job_type, section)[0]
+
+
+def _compile_sections(sections, bracket_fields=False):
+    return {
+        name: tuple(Template(text, bracket_fields) for text in texts)
+        for name, texts in sections.items()
+    }
+
+
+def parse_json(text, version):
+    data = json.loads(text)
+    job_types = {
+        job_type: _compile_sections(sections)
+        for job_type, sections in data.get("job_types", {}).items()
+    }
+    return TemplateSet(job_types, _compile_sections(data.get("shared", {})), version, "json", text)
+
+
+def parse_team_text(text, version):
+    """Parse the team quick reference file into the same sections as JSON"""
+    job_types = {}
+    shared = {}
+    blocks = re.split(r"\n={10,}\n", "\n" + text.replace("\r\n", "\n") + "\n")
+
+    # Blocks alternate between a heading and its body
+    for heading, body in zip(blocks[1::2], blocks[2::2]):
+        heading = heading.strip().upper()
+
+        if heading.startswith("UNIVERSAL CLOSINGS"):
+            shared["closings"] = _bullets(body)
+        elif heading.startswith("SMART QUESTIONS"):
+            for label, items in re.findall(r"^([A-Z ]+):\n((?:- .*\n?)+)", body, re.M):
+                job_type = _TEAM_JOB_TYPES.get(label.strip())
+                if job_type:
+                    sections = job_types.setdefault(job_type, {})
+                    sections.setdefault("questions", []).extend(_bullets(items))
+        elif heading.endswith("JOBS"):
+            job_type = next(
+                (value for key, value in _TEAM_JOB_TYPES.items() if heading.startswith(key)),
+                None
+            )
+            if job_type is None:
+                continue
+            sections = job_types.setdefault(job_type, {})
+            for template in re.split(r"^TEMPLATE [A-Z]:\n-+\n", body, flags=re.M)[1:]:
+                paragraphs = [p.strip() for p in template.strip().split("\n\n") if p.strip()]
+                for name, paragraph in zip(_TEAM_SECTIONS, paragraphs):
+                    sections.setdefault(name, []).append(paragraph)
+
+    for sections in job_types.values():
+        # Team experience lines keep their [PAST WORK] slot when nothing is given
+        if "experience_with" in sections:
+            sections["experience_without"] = sections["experience_with"]
+        sections.setdefault("closings", []).extend(shared.get("closings", []))
+
+    return TemplateSet(
+        {job_type: _compile_sections(sections, True) for job_type, sections in job_types.items()},
+        _compile_sections(shared, True),
+        version,
+        "team",
+        text
+    )
+
+
+def parse_templates(text, version, kind):
+    """TemplateSet from file text in the "json" or "team" format"""
+    return parse_json(text, version) if kind == "json" else parse_team_text(text, version)
+
+
+def _bullets(text):
+    return [line[2:].strip() for line in text.splitlines() if line.startswith("- ")]
+
+
+class TemplateStore:
+    """Keeps the current TemplateSet for a file and reloads it by mtime.
+
+    job_types and sections name what every loaded set must have: each
+    section non-empty for each of those job types and any in the file.
+    """
+
+    def __init__(self, path, check_interval=CHECK_INTERVAL, job_types=(), sections=()):
+        self.path = path
+        self.check_interval = check_interval
+        self.job_types = tuple(job_types)
+        self.sections = tuple(sections)
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._next_check = 0.0
+        self._templates = None
+        # version -> TemplateSet, oldest first
+        self._versions = {}
+        self.reload()
+
+    def reload(self):
+        """Read and compile the file now"""
+        # Stat first so a save that lands mid read is picked up next check
+        mtime = os.stat(self.path).st_mtime_ns
+        with open(self.path, "rb") as f:
+            raw = f.read()
+        version = hashlib.sha1(raw).hexdigest()[:12]
+        text = raw.decode("utf-8")
+
+        templates = parse_templates(text, version, "json" if self.path.endswith(".json") else "team")
+        self._check(templates)
+
+        # Readers grab self._templates once per call, so a plain swap is safe
+        self._templates = templates
+        self._mtime = mtime
+        versions = dict(self._versions)
+        versions.pop(version, None)
+        versions[version] = templates
+        while len(versions) > KEPT_VERSIONS:
+            del versions[next(iter(versions))]
+        self._versions = versions
+        return templates
+
+    def _check(self, templates):
+        """Raise ValueError if templates lack a section the generator needs"""
+        job_types = list(self.job_types) + [name for name in templates.job_types if name not in self.job_types]
+        if not job_types:
+            raise ValueError(f"{self.path} has no job types")
+        missing = [
+            f"{job_type}/{section}"
+            for job_type in job_types for section in self.sections
+            if not templates.get(job_type, section)
+        ]
+        if missing:
+            shown = ", ".join(missing[:5]) + (f" and {len(missing) - 5} more" if len(missing) > 5 else "")
+            raise ValueError(f"{self.path} has no templates for {shown}")
+
+    def version(self, version):
+        """The TemplateSet with this version, or None if it is no longer kept"""
+        templates = self._templates
+        if templates.version == version:
+            return templates
+        return self._versions.get(version)
+
+    def current(self):
+        """Return the latest TemplateSet, reloading if the file changed"""
+        now = time.monotonic()
+        if now >= self._next_check and self._lock.acquire(blocking=False):
+            try:
+                self._next_check = now + self.check_interval
+                try:
+                    changed = os.stat(self.path).st_mtime_ns != self._mtime
+                except OSError:
+                    changed = False
+                if changed:
+                    try:
+                        self.reload()
+                    except (OSError, ValueError) as e:
+                        # Keep serving the last good templates while a save is half
+                        # written or an edit left a section empty
+                        logger.warning("Template reload failed for %s: %s", self.path, e)
+            finally:
+                self._lock.release()
+        return self._templates
+
+
+_stores = {}
+
+
+def get_store(path, job_types=(), sections=()):
+    """Return the shared TemplateStore for a file
+
+    job_types and sections are checked on every load, see TemplateStore.
+    """
+    path = os.path.abspath(path)
+    store = _stores.get(path)
+    if store is None:
+        store = _stores.setdefault(path, TemplateStore(path, job_types=job_types, sections=sections))
+    return store
+
+
+def find_version(version):
+    """A TemplateSet with this version from any loaded store, or None"""
+    for store in list(_stores.values()):
+        templates = store.version(version)
+        if templates is not None:
+            return templates
+    return None
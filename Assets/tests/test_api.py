@@ -0,0 +1,101 @@
+import json
+
+import pytest
+
+import proposal_generator_web as web
+
+POST = "Looking for a virtual assistant to manage my calendar and inbox, about 10 hours a week."
+
+
+@pytest.fixture
+def client():
+    return web.app.test_client()
+
+
+def post_json(client, payload, path="/api/v1/proposals", **kwargs):
+    return client.post(path, data=json.dumps(payload), content_type="application/json", **kwargs)
+
+
+def test_one_post(client):
+    response = post_json(client, {"job_description": POST, "count": 2, "seed": 1})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["job_type"] == "Virtual Assistant"
+    assert [variant["version"] for variant in body["variants"]] == [1, 2]
+    assert all(variant["word_count"] == len(variant["text"].split()) for variant in body["variants"])
+
+
+def test_body_must_be_json(client):
+    response = client.post("/api/v1/proposals", data="job_description=hi", content_type="text/plain")
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "request body must be JSON"}
+
+
+@pytest.mark.parametrize("payload, error", [
+    ({}, "job_description is required"),
+    ({"job_description": "   "}, "job_description is required"),
+    ({"job_description": 5}, "job_description must be a string"),
+    ({"job_description": POST, "experience": ["a"]}, "experience must be a string"),
+    ({"job_description": POST, "name": 1}, "name must be a string"),
+    ({"job_description": POST, "count": 0}, f"count must be a whole number from 1 to {web.API_MAX_VARIANTS}"),
+    ({"job_description": POST, "count": web.API_MAX_VARIANTS + 1},
+     f"count must be a whole number from 1 to {web.API_MAX_VARIANTS}"),
+    ({"job_description": POST, "count": True}, f"count must be a whole number from 1 to {web.API_MAX_VARIANTS}"),
+    ({"job_description": POST, "count": "3"}, f"count must be a whole number from 1 to {web.API_MAX_VARIANTS}"),
+    ({"job_description": POST, "seed": [1]}, "seed must be a number or a string"),
+    ({"job_description": POST, "max_words": 0}, "max_words must be a positive whole number"),
+    ({"job_description": POST, "max_chars": 1.5}, "max_chars must be a positive whole number"),
+])
+def test_invalid_post(client, payload, error):
+    response = post_json(client, payload)
+    assert response.status_code == 400
+    assert response.get_json() == {"error": error}
+
+
+def test_templates_gone_while_generating(client, monkeypatch):
+    monkeypatch.setattr(web, "render_variants", lambda *args, **kwargs: None)
+    response = post_json(client, {"job_description": POST})
+    assert response.status_code == 400
+    assert "templates changed" in response.get_json()["error"]
+
+
+def test_batch_reports_errors_per_post(client):
+    response = post_json(client, {"posts": [{"job_description": POST}, "not an object", {}]})
+    assert response.status_code == 200
+    results = response.get_json()["results"]
+    assert [result["index"] for result in results] == [0, 1, 2]
+    assert "variants" in results[0]
+    assert results[1]["error"] == "each post must be a JSON object"
+    assert results[2]["error"] == "job_description is required"
+
+
+def test_batch_must_be_a_list(client):
+    response = post_json(client, {"posts": {"job_description": POST}})
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "posts must be a JSON array"}
+
+
+def test_batch_size_is_limited(client):
+    response = post_json(client, [{"job_description": POST}] * (web.API_MAX_BATCH + 1))
+    assert response.status_code == 413
+    assert response.get_json() == {"error": f"at most {web.API_MAX_BATCH} posts per call"}
+
+
+def test_streamed_batch(client):
+    response = post_json(client, [{"job_description": POST}, {"count": 0}], query_string={"stream": "1"})
+    assert response.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [line["index"] for line in lines] == [0, 1]
+    assert "variants" in lines[0] and "error" in lines[1]
+
+
+def test_request_size_is_limited(client):
+    response = post_json(client, {"job_description": "x" * web.MAX_REQUEST_BYTES})
+    assert response.status_code == 413
+
+
+@pytest.mark.skipif(web.JOB_WORKERS, reason="JOB_WORKERS is set")
+def test_job_endpoints_off_by_default(client):
+    response = post_json(client, {"posts": [{"job_description": POST}]}, path="/api/v1/jobs")
+    assert response.status_code == 404
+    assert "JOB_WORKERS" in response.get_json()["error"]
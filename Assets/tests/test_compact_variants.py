@@ -0,0 +1,78 @@
+import itertools
+import json
+
+import pytest
+
+from compact_variants import VariantSet, combination_sizes, fragment_sizes, render_text
+from template_store import parse_json
+
+TEMPLATES = parse_json(json.dumps({
+    "job_types": {
+        "data_entry": {
+            "openers": ["Hi, I can handle {main_task}.", "Your {main_task} job caught my eye."],
+            "questions": ["What format do you need?"],
+        },
+    },
+    "shared": {
+        "experience_with": ["I have done this before: {experience}.", "Recently: {experience}"],
+        "experience_without": ["I type fast and check my work."],
+        "closings": ["Thanks!", "Looking forward to it,"],
+    },
+}), "v1")
+
+
+def make_set(main_task="entering 500 rows into excel", choices=((0, 0, 0, 0), (1, 1, 0, 1))):
+    return VariantSet(TEMPLATES.version, "data_entry", main_task, choices)
+
+
+@pytest.mark.parametrize("variants", [
+    make_set(),
+    make_set(main_task="données à saisir – 日本語"),
+    make_set(choices=()),
+    make_set(choices=[(65535, 0, 1, 2)]),
+])
+def test_bytes_round_trip(variants):
+    restored = VariantSet.from_bytes(variants.to_bytes())
+    assert restored == variants
+    assert list(restored) == list(variants)
+
+
+@pytest.mark.parametrize("experience, name", [(None, None), ("typed 2000 rows", "Sam"), ("  ", " ")])
+def test_round_trip_renders_the_same_text(experience, name):
+    variants = make_set()
+    restored = VariantSet.from_bytes(variants.to_bytes())
+    assert restored.texts(TEMPLATES, experience, name) == variants.texts(TEMPLATES, experience, name)
+
+
+def test_texts_need_the_same_template_version():
+    other = parse_json(json.dumps({"shared": {}}), "v2")
+    with pytest.raises(ValueError, match="v1"):
+        make_set().texts(other)
+
+
+@pytest.mark.parametrize("data", [b"", b"\x05\x00", make_set().to_bytes()[:-1], make_set().to_bytes()[:10]])
+def test_bad_bytes_are_rejected(data):
+    with pytest.raises(ValueError, match="not an encoded VariantSet"):
+        VariantSet.from_bytes(data)
+
+
+def test_choices_need_four_indices():
+    with pytest.raises(ValueError):
+        make_set(choices=[(0, 0, 0)])
+
+
+def test_experience_index_wraps():
+    # Chosen with experience (two templates), rendered without it (one)
+    text = render_text(TEMPLATES, "data_entry", "typing", (0, 1, 0, 0))
+    assert "I type fast and check my work." in text
+
+
+@pytest.mark.parametrize("experience, name", [(None, None), ("typed 2000 rows", "Sam Lee"), (None, "Sam")])
+def test_combination_sizes_match_rendered_text(experience, name):
+    main_task = "entering 500 rows into excel"
+    sections, name_size = fragment_sizes(TEMPLATES, "data_entry", main_task, experience, name)
+    words, chars = combination_sizes(sections, name_size)
+    ranges = [range(len(section)) for section in sections]
+    for i, choice in enumerate(itertools.product(*ranges)):
+        text = render_text(TEMPLATES, "data_entry", main_task, choice, experience, name)
+        assert (words[i], chars[i]) == (len(text.split()), len(text))
@@ -0,0 +1,83 @@
+import pytest
+
+from feature_extractor import BLOCK_SIZE, FeatureExtractor, extract_features, extract_task
+
+FILLER = "word " * (BLOCK_SIZE // 5)
+
+
+def feed_in_chunks(text, size):
+    extractor = FeatureExtractor()
+    for start in range(0, len(text), size):
+        extractor.feed(text[start:start + size])
+    return extractor.close()
+
+
+def test_fields_from_one_post():
+    info = extract_features(
+        "Looking for someone to research 500-1,000 b2b leads. "
+        "You will put them in Google Sheets. Needed ASAP."
+    )
+    assert info["main_task"] == "Looking for someone to research 500-1,000 b2b leads"
+    assert info["quantity"] == 1000
+    assert info["quantity_range"] == (500, 1000)
+    assert info["deliverable"] == "500-1,000 b2b leads"
+    assert info["tool_mentioned"] == "Google Sheets"
+    assert info["urgency"] is True
+
+
+def test_scaled_quantity():
+    assert extract_features("We need 5k leads collected this month.")["quantity_range"] == (5000, 5000)
+
+
+@pytest.mark.parametrize("offset", range(-6, 7))
+def test_quantity_across_a_block_boundary(offset):
+    # A sentence longer than a block, with the quantity near where a block would end
+    text = "Need help. " + "w" * (BLOCK_SIZE + offset - 11) + " 500 leads for our team " + FILLER + "."
+    assert extract_features(text)["quantity_range"] == (500, 500)
+
+
+def test_tool_across_a_block_boundary():
+    text = "Need help. " + "w" * (BLOCK_SIZE - 14) + " google sheets and more " + FILLER + "."
+    assert extract_features(text)["tools_mentioned"] == ["Google Sheets"]
+
+
+def test_main_task_longer_than_a_block():
+    sentence = "Please type " + FILLER.strip()
+    assert extract_features(sentence + ". Thanks.")["main_task"] == sentence
+
+
+@pytest.mark.parametrize("size", [1, 7, 100, BLOCK_SIZE + 1])
+def test_chunked_feed_matches_one_call(size):
+    text = (
+        "Hi. " + FILLER + "We use Airtable.\n" + FILLER
+        + "Enter 2,000 rows into Excel. " + FILLER + "Urgent please."
+    )
+    assert feed_in_chunks(text, size) == extract_features(text)
+
+
+def test_top_tool_wins_over_earlier_ones():
+    info = extract_features("We keep it in Airtable, then Google   Sheets, then Excel.")
+    assert info["tools_mentioned"] == ["Airtable", "Google Sheets", "Excel"]
+    assert info["tool_mentioned"] == "Excel"
+
+
+def test_first_tool_in_priority_order():
+    info = extract_features("Export contacts from HubSpot into Notion pages for the team.")
+    assert info["tool_mentioned"] == "Notion"
+
+
+def test_urgency_needs_a_whole_word():
+    assert extract_features("Type our breakfast menu into a document, twenty pages.")["urgency"] is False
+
+
+def test_nothing_read_past_max_chars():
+    text = "Enter product data into our store. " + FILLER + "Use Excel, urgent, 300 rows."
+    info = extract_features(text, max_chars=100)
+    assert info["tools_mentioned"] == []
+    assert info["urgency"] is False
+    assert info["quantity"] is None
+
+
+def test_extract_task_matches_extract_features():
+    for text in ["Short. Too short. This one is the main task here.", "No sentence end but long enough", ""]:
+        assert extract_task(text) == extract_features(text)["main_task"]
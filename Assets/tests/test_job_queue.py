@@ -0,0 +1,141 @@
+import threading
+import time
+
+import pytest
+
+from job_queue import JobQueue, QueueFull
+
+TIMEOUT = 5
+
+
+def wait_until_done(queue, job):
+    deadline = time.monotonic() + TIMEOUT
+    while job.finished is None:
+        assert time.monotonic() < deadline, "job did not finish"
+        queue.wait(job, job.done, timeout=0.1)
+    return job
+
+
+class Gate:
+    """func for a JobQueue that records calls and blocks until opened"""
+
+    def __init__(self):
+        self.opened = threading.Event()
+        self.calls = []
+        self.running = 0
+        self.most_running = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, item):
+        with self._lock:
+            self.calls.append(item)
+            self.running += 1
+            self.most_running = max(self.most_running, self.running)
+        assert self.opened.wait(TIMEOUT)
+        with self._lock:
+            self.running -= 1
+        return {"item": item}
+
+    def wait_for_calls(self, count):
+        deadline = time.monotonic() + TIMEOUT
+        while len(self.calls) < count:
+            assert time.monotonic() < deadline, "func was not called"
+            time.sleep(0.001)
+
+
+def test_runs_every_item_in_order():
+    queue = JobQueue(lambda item: item * 2, workers=3)
+    job = wait_until_done(queue, queue.submit("a", range(10)))
+    assert job.status == "done"
+    assert job.results == [i * 2 for i in range(10)]
+    assert sorted(job.finished_order) == list(range(10))
+    assert queue.stats()["completed"] == 10
+
+
+def test_empty_job_is_done_at_once():
+    job = JobQueue(lambda item: item).submit("a", [])
+    assert job.status == "done"
+    assert job.summary()["total"] == 0
+
+
+def test_exceptions_become_error_results():
+    def func(item):
+        raise KeyError(item)
+
+    queue = JobQueue(func)
+    job = wait_until_done(queue, queue.submit("a", ["x"]))
+    assert job.results == [{"error": "KeyError: 'x'"}]
+
+
+def test_unfinished_jobs_per_client_are_limited():
+    gate = Gate()
+    queue = JobQueue(gate, workers=1, max_queued_jobs=2)
+    queue.submit("a", [1])
+    queue.submit("a", [2])
+    with pytest.raises(QueueFull):
+        queue.submit("a", [3])
+    # Other clients are not affected
+    queue.submit("b", [4])
+    gate.opened.set()
+
+
+def test_posts_running_per_client_are_limited():
+    gate = Gate()
+    queue = JobQueue(gate, workers=4, per_client=2)
+    job = queue.submit("a", range(6))
+    gate.wait_for_calls(2)
+    time.sleep(0.05)
+    assert len(gate.calls) == 2
+    gate.opened.set()
+    wait_until_done(queue, job)
+    assert gate.most_running == 2
+
+
+def test_clients_take_turns():
+    gate = Gate()
+    queue = JobQueue(gate, workers=1, per_client=1)
+    big = queue.submit("a", ["a0", "a1", "a2", "a3", "a4"])
+    gate.wait_for_calls(1)
+    small = queue.submit("b", ["b0"])
+    gate.opened.set()
+    wait_until_done(queue, big)
+    wait_until_done(queue, small)
+    # b's only post does not wait for all of a's
+    assert gate.calls.index("b0") <= 2
+
+
+def test_cancel_drops_waiting_posts():
+    gate = Gate()
+    queue = JobQueue(gate, workers=1)
+    job = queue.submit("a", range(5))
+    gate.wait_for_calls(1)
+    queue.cancel(job.id)
+    assert job.status == "cancelled"
+    gate.opened.set()
+    deadline = time.monotonic() + TIMEOUT
+    while queue.stats()["running"]:
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+    # The post that was running still reports its result
+    assert gate.calls == [0]
+    assert job.results[0] == {"item": 0}
+    assert job.results[1:] == [None] * 4
+    assert queue.stats()["waiting"] == 0
+
+
+def test_wait_times_out():
+    gate = Gate()
+    queue = JobQueue(gate, workers=1)
+    job = queue.submit("a", [1])
+    start = time.monotonic()
+    assert queue.wait(job, 0, timeout=0.05) == 0
+    assert time.monotonic() - start >= 0.05
+    gate.opened.set()
+
+
+def test_finished_jobs_expire():
+    queue = JobQueue(lambda item: item, ttl=0.01)
+    job = wait_until_done(queue, queue.submit("a", [1]))
+    assert queue.get(job.id) is job
+    time.sleep(0.02)
+    assert queue.get(job.id) is None
@@ -0,0 +1,84 @@
+import pytest
+
+from near_duplicates import NearDuplicateIndex, choose_bands
+
+POST = (
+    "We are looking for a reliable virtual assistant to manage our calendar, answer customer "
+    "emails within a day, keep our CRM up to date and prepare a weekly report of open deals "
+    "for the sales team. You should be comfortable with Google Sheets and HubSpot. "
+    "The budget is $500 for the first month and we expect about ten hours a week."
+)
+
+REPOST = POST.replace("$500", "$650")
+
+OTHER = (
+    "Need someone to label 2,000 product images with bounding boxes for our computer vision "
+    "model. Each image has one to five items and the labels must follow our written guide."
+)
+
+
+@pytest.mark.parametrize("num_perm, threshold", [(64, 0.8), (64, 0.5), (128, 0.9), (7, 0.8)])
+def test_choose_bands(num_perm, threshold):
+    bands, rows = choose_bands(num_perm, threshold)
+    assert bands * rows == num_perm
+    assert (1.0 / bands) ** (1.0 / rows) <= threshold
+
+
+def test_repost_with_changed_budget_is_found():
+    index = NearDuplicateIndex()
+    item_id = index.add(POST, payload="first")
+    index.add(OTHER, payload="other")
+    match = index.query(REPOST)
+    assert match.item_id == item_id
+    assert match.payload == "first"
+    assert index.threshold <= match.similarity < 1.0
+
+
+def test_unrelated_post_is_not_found():
+    index = NearDuplicateIndex()
+    index.add(POST)
+    assert index.query(OTHER) is None
+
+
+def test_case_and_spacing_do_not_matter():
+    index = NearDuplicateIndex()
+    index.add(POST)
+    assert index.query("  " + POST.upper().replace(" ", "\n  ")).similarity == 1.0
+
+
+def test_short_texts_compare():
+    index = NearDuplicateIndex()
+    index.add("Data entry job")
+    assert index.query("data entry job").similarity == 1.0
+    assert index.query("") is None
+
+
+def test_signature_given_instead_of_text():
+    index = NearDuplicateIndex()
+    signature = index.signature(POST)
+    assert len(signature) == index.num_perm
+    index.add(payload=1, signature=signature)
+    assert index.query(signature=index.signature(REPOST)).payload == 1
+
+
+def test_oldest_posts_are_dropped():
+    index = NearDuplicateIndex(max_items=2)
+    index.add(POST, payload="post")
+    index.add(OTHER, payload="other")
+    index.add("Transcribe forty minutes of interview audio into a clean text document.")
+    assert len(index) == 2
+    assert index.query(REPOST) is None
+    assert index.query(OTHER).payload == "other"
+
+
+def test_dropping_one_of_several_copies_keeps_the_rest():
+    index = NearDuplicateIndex(max_items=2)
+    index.add(POST, payload="first")
+    index.add(POST, payload="second")
+    index.add(OTHER)
+    # Buckets shared by both copies now hold only the second
+    assert index.query(POST).payload == "second"
+    assert all(
+        not isinstance(members, list) or len(members) > 1
+        for bucket in index._buckets for members in bucket.values()
+    )
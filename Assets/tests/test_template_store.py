@@ -0,0 +1,106 @@
+import json
+import os
+
+import pytest
+
+from template_store import TemplateStore, parse_team_text
+
+SECTIONS = ("openers", "closings")
+
+
+def write_json(path, data, mtime=None):
+    path.write_text(json.dumps(data), encoding="utf-8")
+    if mtime is not None:
+        os.utime(path, ns=(mtime, mtime))
+
+
+def good_templates(opener="Hi, I can do {main_task}."):
+    return {
+        "job_types": {"data_entry": {"openers": [opener]}},
+        "shared": {"closings": ["Thanks, {name}"]},
+    }
+
+
+def test_loads_and_renders(tmp_path):
+    path = tmp_path / "templates.json"
+    write_json(path, good_templates())
+    store = TemplateStore(str(path), job_types=["data_entry"], sections=SECTIONS)
+    templates = store.current()
+    assert templates.first("data_entry", "openers").render({"main_task": "data entry"}) == "Hi, I can do data entry."
+    # Shared sections cover every job type, and a missing value keeps its placeholder
+    assert templates.first("data_entry", "closings").render({}) == "Thanks, {name}"
+
+
+def test_missing_section_is_rejected(tmp_path):
+    path = tmp_path / "templates.json"
+    write_json(path, {"job_types": {"data_entry": {"openers": ["Hi"]}}})
+    with pytest.raises(ValueError, match="data_entry/closings"):
+        TemplateStore(str(path), job_types=["data_entry"], sections=SECTIONS)
+
+
+def test_required_job_type_is_checked(tmp_path):
+    path = tmp_path / "templates.json"
+    write_json(path, good_templates())
+    with pytest.raises(ValueError, match="web_research/openers"):
+        TemplateStore(str(path), job_types=["data_entry", "web_research"], sections=SECTIONS)
+
+
+def test_extra_job_type_in_file_is_checked(tmp_path):
+    path = tmp_path / "templates.json"
+    data = good_templates()
+    data["job_types"]["web_research"] = {"openers": []}
+    write_json(path, data)
+    with pytest.raises(ValueError, match="web_research/openers"):
+        TemplateStore(str(path), job_types=["data_entry"], sections=SECTIONS)
+
+
+def test_no_job_types_is_rejected(tmp_path):
+    path = tmp_path / "templates.json"
+    write_json(path, {"shared": {"openers": ["Hi"], "closings": ["Bye"]}})
+    with pytest.raises(ValueError, match="no job types"):
+        TemplateStore(str(path), sections=SECTIONS)
+
+
+@pytest.mark.parametrize("bad_edit", [
+    lambda path: write_json(path, {"job_types": {"data_entry": {"openers": ["New"]}}}),
+    lambda path: path.write_text("{not json", encoding="utf-8"),
+])
+def test_bad_edit_keeps_the_last_good_templates(tmp_path, bad_edit):
+    path = tmp_path / "templates.json"
+    write_json(path, good_templates(), mtime=1_000_000_000)
+    store = TemplateStore(str(path), check_interval=0, job_types=["data_entry"], sections=SECTIONS)
+    before = store.current()
+
+    bad_edit(path)
+    os.utime(path, ns=(2_000_000_000, 2_000_000_000))
+    assert store.current() is before
+
+
+def test_good_edit_is_picked_up_and_old_version_kept(tmp_path):
+    path = tmp_path / "templates.json"
+    write_json(path, good_templates(), mtime=1_000_000_000)
+    store = TemplateStore(str(path), check_interval=0, job_types=["data_entry"], sections=SECTIONS)
+    before = store.current()
+
+    write_json(path, good_templates("Hello, {main_task} it is."), mtime=2_000_000_000)
+    after = store.current()
+    assert after.version != before.version
+    assert after.first("data_entry", "openers").render({"main_task": "typing"}) == "Hello, typing it is."
+    assert store.version(before.version) is before
+
+
+def test_team_text_bracket_fields():
+    text = (
+        "==========\nDATA ENTRY JOBS\n==========\n"
+        "TEMPLATE A:\n-----------\n"
+        "Hi, I can handle [TASK] today.\n\n"
+        "I did [DESCRIBE PAST WORK] before.\n\n"
+        "What format do you need?\n\n"
+        "Best, [YOUR NAME] ([RATE])\n"
+    )
+    templates = parse_team_text(text, "v1")
+    values = {"main_task": "typing", "experience": "2000 rows", "name": "Sam"}
+    assert templates.first("data_entry", "openers").render(values) == "Hi, I can handle typing today."
+    assert templates.first("data_entry", "experience_with").render(values) == "I did 2000 rows before."
+    # Unknown brackets are left for the sender to fill in
+    assert templates.first("data_entry", "closings").render(values) == "Best, Sam ([RATE])"
@@ -0,0 +1,353 @@
+"""
+TF-IDF Job Classifier
+Optional replacement for keyword counting in detect_job_type. Descriptions
+become rows of a sparse hashed TF-IDF matrix and a whole batch is scored
+against per category weight vectors in one sparse matrix multiply.
+
+The model starts from the skills/keywords tables and learns from labeled
+history offline. It is stored in one file whose arrays are memory mapped,
+so every process shares the same pages and loading is instant.
+
+Needs NumPy (pip install numpy). SciPy is used for the multiply when
+installed, otherwise an equivalent NumPy gather and reduce.
+
+Usage:
+python tfidf_classifier.py train history.jsonl job_classifier.bin
+python tfidf_classifier.py evaluate history.jsonl job_classifier.bin
+"""
+
+import argparse
+import json
+import os
+import struct
+import sys
+
+import numpy as np
+
+try:
+    from scipy import sparse
+except ImportError:
+    sparse = None
+
+from keyword_matcher import normalize
+
+# Hashed feature space (a power of two); collisions are rare next to a few
+# thousand real terms
+DEFAULT_FEATURES = 2 ** 16
+
+MAGIC = b"JOBTFIDF"
+FORMAT_VERSION = 1
+# Arrays start on this boundary so they can be mapped directly
+ALIGN = 64
+
+# Words are hashed from their first 16 and last 8 bytes plus their length,
+# read for the whole batch at once through unaligned 8 byte windows
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+_MIX2 = np.uint64(0xC2B2AE3D27D4EB4F)
+_MIX3 = np.uint64(0x165667B19E3779F9)
+_SPACE = ord(" ")
+# Keeps the first n bytes of an 8 byte window, for n from 0 to 8
+_MASKS = np.array([(1 << (8 * n)) - 1 for n in range(8)] + [2 ** 64 - 1], dtype=np.uint64)
+
+# Texts scored per vectorized pass, which bounds temporary arrays
+BATCH_SIZE = 1024
+
+_D, _E, _G, _I, _N, _S = b"degins"
+
+
+def _windows(buf):
+    """uint64 view of the 8 bytes starting at every offset of buf
+
+    Zero padded so reads up to 8 bytes past the end stay in bounds.
+    """
+    padded = np.zeros(len(buf) + 16, dtype=np.uint8)
+    padded[:len(buf)] = buf
+    return np.ndarray(shape=(len(buf) + 8,), dtype="<u8", buffer=padded, strides=(1,))
+
+
+def _stem(buf, starts, ends):
+    """Word ends with the same light stemming as the keyword inflections
+
+    "labeling", "labeled" and "labels" all end up as "label". A suffix is
+    only cut when at least three letters remain.
+    """
+    length = ends - starts
+    last = buf[ends - 1]
+    second = buf[ends - 2]
+    ends_s = last == _S
+    # "ing" never overlaps the other suffixes and "es" wins over "s"
+    two = (length >= 5) & (second == _E) & (ends_s | (last == _D))
+    cut = np.where(two, 2, (length >= 4) & ends_s)
+    cut += 3 * ((length >= 6) & (last == _G) & (second == _N) & (buf[ends - 3] == _I))
+    return ends - cut
+
+
+def _masked(windows, positions, count):
+    """The count (1 or more, at most 8 used) bytes at each position, zero padded"""
+    return windows[positions] & _MASKS[np.minimum(count, 8)]
+
+
+def hash_words(texts):
+    """(row, hash) arrays for every word of every text, in text order"""
+    normalized = [normalize(text) for text in texts]
+    offsets = np.cumsum([0] + [len(n) for n in normalized])
+    buf = np.frombuffer(b"".join(normalized), dtype=np.uint8)
+    windows = _windows(buf)
+
+    # Every normalized text starts and ends with a space, so word edges
+    # alternate start, end and never cross from one text into the next
+    is_word = buf != _SPACE
+    edges = np.flatnonzero(is_word[1:] != is_word[:-1]) + 1
+    starts = edges[0::2]
+    ends = _stem(buf, starts, edges[1::2])
+    length = ends - starts
+
+    hashes = _masked(windows, starts, length)
+    hashes *= _MIX
+    # Most words fit in 8 bytes, so the rest is only read for those that don't
+    longer = np.flatnonzero(length > 8)
+    if len(longer):
+        rest = length[longer] - 8
+        hashes[longer] ^= _masked(windows, starts[longer] + 8, rest) * _MIX2
+        longest = longer[rest > 8]
+        if len(longest):
+            hashes[longest] ^= windows[ends[longest] - 8] * _MIX3
+    hashes += length.astype(np.uint64)
+
+    # Each text's words are one run, found from where the texts start
+    bounds = np.searchsorted(starts, offsets)
+    rows = np.repeat(np.arange(len(texts)), np.diff(bounds))
+    return rows, hashes
+
+
+def featurize(texts, n_features):
+    """Term counts of unigrams and bigrams for a batch of texts
+
+    Returns (rows, cols, counts): one entry per distinct (text, feature)
+    pair, sorted by row.
+    """
+    rows, words = hash_words(texts)
+    # Bigrams of neighbouring words in the same text
+    same_text = np.flatnonzero(rows[1:] == rows[:-1])
+    bigrams = (words[same_text] * _MIX) ^ words[same_text + 1]
+    keys = np.concatenate([words, bigrams])
+    # Multiply and keep the high bits so short words spread out too
+    keys *= _MIX
+    keys >>= np.uint64(32)
+    keys &= np.uint64(n_features - 1)
+
+    # One unique() over (row, feature) keys counts terms for the whole batch.
+    # A batch of BATCH_SIZE texts fits them in 32 bits, which sort faster.
+    dtype = np.int32 if len(texts) * n_features < 2 ** 31 else np.int64
+    pairs = np.concatenate([rows, rows[same_text]]).astype(dtype)
+    pairs *= n_features
+    pairs += keys.astype(dtype)
+    unique, counts = np.unique(pairs, return_counts=True)
+    return (unique // n_features).astype(np.int64), (unique % n_features).astype(np.int64), counts
+
+
+def tfidf(rows, counts, cols, idf, n_rows):
+    """Sublinear TF-IDF values, each row scaled to unit length"""
+    values = (1.0 + np.log(counts)).astype(np.float32) * idf[cols]
+    norms = np.sqrt(np.bincount(rows, weights=values * values, minlength=n_rows))
+    norms[norms == 0] = 1.0
+    return (values / norms[rows]).astype(np.float32)
+
+
+def sparse_dot(rows, cols, values, weights, n_rows):
+    """(n_rows x features) sparse matrix times dense (features x classes)"""
+    if sparse is not None:
+        matrix = sparse.csr_matrix((values, (rows, cols)), shape=(n_rows, weights.shape[0]))
+        return np.asarray(matrix @ weights)
+    scores = np.zeros((n_rows, weights.shape[1]), dtype=np.float32)
+    if len(rows):
+        # Rows are sorted, so each row's contributions are one contiguous run
+        starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+        scores[rows[starts]] = np.add.reduceat(values[:, None] * weights[cols], starts, axis=0)
+    return scores
+
+
+def normalize_label(label):
+    return "_".join(str(label).lower().split())
+
+
+class TfidfClassifier:
+    """Hashed TF-IDF nearest centroid classifier over job categories."""
+
+    def __init__(self, categories, idf, weights):
+        self.categories = list(categories)
+        self.idf = idf
+        self.weights = weights
+        self.n_features = len(idf)
+
+    # --- scoring ---
+
+    def score_many(self, texts):
+        """Cosine score of every text against every category, as an array"""
+        texts = list(texts)
+        if len(texts) > BATCH_SIZE:
+            return np.concatenate([
+                self.score_many(texts[i:i + BATCH_SIZE]) for i in range(0, len(texts), BATCH_SIZE)
+            ])
+        rows, cols, counts = featurize(texts, self.n_features)
+        values = tfidf(rows, counts, cols, self.idf, len(texts))
+        return sparse_dot(rows, cols, values, self.weights, len(texts))
+
+    def detect_many(self, texts, default="data_entry"):
+        """Best category for every text, default where nothing matches"""
+        texts = list(texts)
+        if not texts:
+            return []
+        scores = self.score_many(texts)
+        best = scores.argmax(axis=1)
+        return [
+            self.categories[index] if score > 0 else default
+            for index, score in zip(best.tolist(), scores.max(axis=1).tolist())
+        ]
+
+    def scores(self, text):
+        return dict(zip(self.categories, self.score_many([text])[0].tolist()))
+
+    def best_match(self, text, default):
+        """Same interface as KeywordMatcher.best_match"""
+        return self.detect_many([text], default)[0]
+
+    # --- training ---
+
+    @classmethod
+    def train(cls, texts, labels, seed_table, n_features=DEFAULT_FEATURES, seed_weight=5.0):
+        """Fit class centroids from labeled texts plus the seed keyword tables
+
+        seed_table is {category: [keywords]}, as in the generators. Each
+        category's keywords count as seed_weight labeled examples, so the
+        model behaves like keyword matching until history outweighs it.
+
+        The categories are exactly the seed table's, since the generators
+        only have templates for those; texts labeled with anything else
+        are left out.
+        """
+        if n_features & (n_features - 1):
+            raise ValueError(f"n_features must be a power of two, got {n_features}")
+        categories = list(seed_table)
+        index = {category: i for i, category in enumerate(categories)}
+        known = [(text, label) for text, label in zip(texts, labels) if label in index]
+        texts = [text for text, _ in known]
+        labels = [label for _, label in known]
+
+        seed_texts = [" ".join(seed_table[category]) for category in seed_table]
+        all_texts = list(texts) + seed_texts
+        all_labels = np.array([index[label] for label in labels] + list(range(len(seed_texts))), dtype=np.int64)
+        example_weight = np.ones(len(all_texts), dtype=np.float32)
+        example_weight[len(texts):] = seed_weight
+
+        rows, cols, counts = featurize(all_texts, n_features)
+        document_frequency = np.bincount(cols, minlength=n_features)
+        idf = (np.log((1.0 + len(all_texts)) / (1.0 + document_frequency)) + 1.0).astype(np.float32)
+        values = tfidf(rows, counts, cols, idf, len(all_texts))
+
+        # Centroids: weighted sum of each category's rows, then unit length
+        weights = np.zeros((n_features, len(categories)), dtype=np.float32)
+        np.add.at(weights, (cols, all_labels[rows]), values * example_weight[rows])
+        norms = np.linalg.norm(weights, axis=0)
+        norms[norms == 0] = 1.0
+        weights /= norms
+        return cls(categories, idf, weights)
+
+    # --- storage ---
+
+    def save(self, path):
+        """Write the model as a header plus aligned float32 arrays"""
+        header = json.dumps({
+            "version": FORMAT_VERSION,
+            "categories": self.categories,
+            "n_features": self.n_features,
+        }).encode("utf-8")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(MAGIC + struct.pack("<I", len(header)) + header)
+            for array in (self.idf, self.weights):
+                f.write(b"\0" * (-f.tell() % ALIGN))
+                f.write(np.ascontiguousarray(array, dtype="<f4").tobytes())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Map a saved model; arrays are read from the file on demand"""
+        with open(path, "rb") as f:
+            prefix = f.read(len(MAGIC) + 4)
+            if prefix[:len(MAGIC)] != MAGIC:
+                raise ValueError(f"{path} is not a job classifier model")
+            header_size = struct.unpack("<I", prefix[len(MAGIC):])[0]
+            header = json.loads(f.read(header_size))
+        if header["version"] != FORMAT_VERSION:
+            raise ValueError(f"{path} has model format {header['version']}, expected {FORMAT_VERSION}")
+
+        n_features = header["n_features"]
+        n_categories = len(header["categories"])
+        offset = len(MAGIC) + 4 + header_size
+        offset += -offset % ALIGN
+        idf = np.memmap(path, dtype="<f4", mode="r", offset=offset, shape=(n_features,))
+        offset += n_features * 4
+        offset += -offset % ALIGN
+        weights = np.memmap(path, dtype="<f4", mode="r", offset=offset, shape=(n_features, n_categories))
+        return cls(header["categories"], idf, weights)
+
+
+def read_labeled(path):
+    """(texts, labels) from JSONL records with job_description and job_type"""
+    texts, labels = [], []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            text = record.get("job_description") or record.get("description")
+            if text and record.get("job_type"):
+                texts.append(text)
+                labels.append(normalize_label(record["job_type"]))
+    return texts, labels
+
+
+def seed_table(name):
+    if name == "web":
+        from proposal_generator_web import JOB_KEYWORDS
+        return JOB_KEYWORDS
+    from upwork_proposal_generator import UpworkProposalGenerator
+    return UpworkProposalGenerator().skills
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train or evaluate the TF-IDF job classifier")
+    parser.add_argument("command", choices=["train", "evaluate"])
+    parser.add_argument("history", help="JSONL with job_description and job_type per line")
+    parser.add_argument("model", help="model file to write (train) or read (evaluate)")
+    parser.add_argument("--seed-table", choices=["cli", "web"], default="cli",
+                        help="keyword table used as seed vocabulary")
+    parser.add_argument("--features", type=int, default=DEFAULT_FEATURES, help="size of the hashed feature space")
+    parser.add_argument("--seed-weight", type=float, default=5.0,
+                        help="how many labeled posts each category's keywords count as")
+    args = parser.parse_args(argv)
+
+    texts, labels = read_labeled(args.history)
+    if args.command == "train":
+        table = seed_table(args.seed_table)
+        unknown = sorted({label for label in labels if label not in table})
+        if unknown:
+            print(f"Skipping posts labeled {', '.join(unknown)}: no templates for those job types", file=sys.stderr)
+        model = TfidfClassifier.train(texts, labels, table, args.features, args.seed_weight)
+        model.save(args.model)
+        trained = sum(1 for label in labels if label in table)
+        print(f"Trained on {trained} posts, {len(model.categories)} categories -> "
+              f"{args.model} ({os.path.getsize(args.model) / 1e6:.1f} MB)")
+        return 0
+
+    model = TfidfClassifier.load(args.model)
+    predicted = model.detect_many(texts)
+    correct = sum(1 for p, label in zip(predicted, labels) if p == label)
+    print(f"Accuracy: {correct}/{len(texts)} ({correct / max(len(texts), 1):.1%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,170 +3,236 @@ Upwork Winning Proposal Generator v4.0
 Pain point focused. Solution driven. Natural language.
 """
 
-import re
+import argparse
+import atexit
+import os
+
+import metrics
+from feature_extractor import MAX_CHARS, clip, extract_features
+from keyword_matcher import KeywordMatcher
+from near_duplicates import NearDuplicateIndex
+from profiler import Profiler
+from result_cache import AnalysisCache
+from template_store import get_store
+
+CLI_TEMPLATES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cli_templates.json")
+
+# Sections build_proposal may use; a reload missing one for a job type is rejected
+CLI_TEMPLATE_SECTIONS = (
+    "greeting", "opener_quantity", "opener_task", "opener_default", "pain", "solution", "tools",
+    "tools_mentioned", "tools_default", "experience", "urgency", "question", "closing", "sign_off"
+)
 
 class UpworkProposalGenerator:
 
-    def __init__(self):
-        self.skills = {
-            "data_annotation": ["data annotation", "labeling", "tagging", "annotation", "ai training", "machine learning data", "classify", "categorize", "label"],
-            "virtual_assistant": ["virtual assistant", "va", "admin", "administrative", "calendar", "email management", "scheduling", "assistant", "support"],
-            "web_research": ["research", "lead generation", "list building", "data collection", "web scraping", "linkedin", "contact list", "find", "leads", "contacts", "emails"],
-            "data_entry": ["data entry", "typing", "excel", "spreadsheet", "copy paste", "transcription", "form filling", "input", "migrate", "transfer"]
-        }
-
-        # Tools you use for each job type
-        self.my_tools = {
-            "data_annotation": "Label Studio and Google Sheets",
-            "virtual_assistant": "Google Workspace and Notion",
-            "web_research": "Apollo, LinkedIn Sales Navigator and Google Sheets",
-            "data_entry": "Excel, Google Sheets and Airtable"
-        }
-
-        # Pain points clients usually have
-        self.pain_points = {
-            "data_annotation": {
-                "pain": "Most annotation work comes back inconsistent or full of errors. Then you waste time fixing it yourself.",
-                "solution": "I follow strict guidelines and double check every label before delivery. You get clean data the first time."
-            },
-            "virtual_assistant": {
-                "pain": "Most VAs need constant hand holding. You end up spending more time explaining than doing the work yourself.",
-                "solution": "I figure things out on my own. You give me the task and I handle it. No back and forth."
-            },
-            "web_research": {
-                "pain": "Bad lead lists are everywhere. Wrong emails. Outdated info. You pay for data you cannot even use.",
-                "solution": "I verify every contact before adding it. If the email bounces or the person left the company I remove it. You only get leads that actually work."
-            },
-            "data_entry": {
-                "pain": "Data entry mistakes create bigger problems down the line. One wrong entry can mess up reports and decisions.",
-                "solution": "I check my work twice. Every row. Every field. You get accurate data without surprises later."
-            }
-        }
+    SKILLS = {
+        "data_annotation": ["data annotation", "labeling", "tagging", "annotation", "ai training", "machine learning data", "classify", "categorize", "label"],
+        "virtual_assistant": ["virtual assistant", "va", "admin", "administrative", "calendar", "email management", "scheduling", "assistant", "support"],
+        "web_research": ["research", "lead generation", "list building", "data collection", "web scraping", "linkedin", "contact list", "find", "leads", "contacts", "emails"],
+        "data_entry": ["data entry", "typing", "excel", "spreadsheet", "copy paste", "transcription", "form filling", "input", "migrate", "transfer"]
+    }
 
+    # Built on first use and shared by every generator in the process
+    _skill_matcher = None
+
+    def __init__(self, classifier=None, experience_index=None, history=None, max_chars=MAX_CHARS):
+        self.skills = self.SKILLS
+        if UpworkProposalGenerator._skill_matcher is None:
+            UpworkProposalGenerator._skill_matcher = KeywordMatcher(self.SKILLS)
+        self.skill_matcher = UpworkProposalGenerator._skill_matcher
+
+        # Optional tfidf_classifier.TfidfClassifier used instead of keyword counts
+        self.classifier = classifier
+
+        # Optional experience_index.ExperienceIndex that fills in past
+        # experience when none is given
+        self.experience_index = experience_index
+
+        # Optional history_store.HistoryStore that keeps every proposal
+        self.history = history
+
+        # Pain points, tools and every other line of the proposal live in
+        # cli_templates.json so they can be edited without touching code
+        self.templates = get_store(CLI_TEMPLATES_PATH, self.SKILLS, CLI_TEMPLATE_SECTIONS)
+
+        # Reposted jobs skip detection and extraction
+        self.analysis_cache = AnalysisCache()
+
+        # Only this much of a description is analyzed, so a pasted document
+        # costs no more than a long post
+        self.max_chars = max_chars
+
+    @metrics.timed("detect_job_type")
     def detect_job_type(self, job_description):
-        job_lower = job_description.lower()
-        scores = {}
-        for job_type, keywords in self.skills.items():
-            score = sum(1 for keyword in keywords if keyword in job_lower)
-            scores[job_type] = score
-        best_match = max(scores, key=scores.get)
-        return best_match if scores[best_match] > 0 else "data_entry"
+        matcher = self.classifier or self.skill_matcher
+        return matcher.best_match(job_description, default="data_entry")
 
+    @metrics.timed("extract_key_info")
     def extract_key_info(self, job_description):
-        info = {
-            "main_task": "",
-            "quantity": None,
-            "deliverable": "",
-            "tool_mentioned": None,
-            "urgency": False
-        }
-
-        sentences = re.split(r'[.!?\n]', job_description)
-        clean_sentences = [s.strip() for s in sentences if len(s.strip()) > 20]
-        if clean_sentences:
-            info["main_task"] = clean_sentences[0]
-
-        qty_match = re.search(r'(\d{1,6}(?:,\d{3})*)\s*(?:leads?|contacts?|entries?|rows?|records?|items?|emails?|names?|companies?|data points?)', job_description, re.IGNORECASE)
-        if qty_match:
-            info["quantity"] = qty_match.group(1)
-            info["deliverable"] = qty_match.group(0)
-
-        tools = ["excel", "google sheets", "airtable", "notion", "salesforce", "hubspot", "linkedin", "apollo", "zoominfo"]
-        for tool in tools:
-            if tool in job_description.lower():
-                info["tool_mentioned"] = tool.title()
-                break
-
-        if any(word in job_description.lower() for word in ["asap", "urgent", "immediately", "quickly", "fast", "today"]):
-            info["urgency"] = True
-
-        return info
-
-    def generate_proposal(self, job_description, past_experience=None, your_name=None):
-        job_type = self.detect_job_type(job_description)
-        info = self.extract_key_info(job_description)
-        pain = self.pain_points[job_type]
-        tools = self.my_tools[job_type]
-
-        lines = []
+        return extract_features(job_description)
+
+    def analyze(self, job_description):
+        job_description = clip(job_description, self.max_chars)
+        job_type, info = self.analysis_cache.get_or_compute(job_description, self._analyze)
+        metrics.observe_input(job_description, job_type)
+        return job_type, info
+
+    def _analyze(self, job_description):
+        return self.detect_job_type(job_description), self.extract_key_info(job_description)
+
+    def analyze_many(self, job_descriptions):
+        """Analyze a batch, classifying all of it in one pass when a classifier is set
+
+        One pass is about 4x faster than a classifier call per post, but still
+        slower than keyword counts, so batches without a classifier keep those.
+        """
+        if self.classifier is None:
+            return [self.analyze(description) for description in job_descriptions]
+
+        job_descriptions = [clip(description, self.max_chars) for description in job_descriptions]
+        job_types = self.classifier.detect_many(job_descriptions, default="data_entry")
+        results = []
+        for description, job_type in zip(job_descriptions, job_types):
+            result = self.analysis_cache.get_or_compute(
+                description, lambda text, job_type=job_type: (job_type, self.extract_key_info(text))
+            )
+            metrics.observe_input(description, result[0])
+            results.append(result)
+        return results
+
+    def suggest_experience(self, job_description):
+        """Most relevant past work snippet from the library, or None"""
+        if self.experience_index is None:
+            return None
+        return self.experience_index.best(job_description)
+
+    def generate_proposal(self, job_description, past_experience=None, your_name=None, analysis=None):
+        """(proposal, job type). analysis is a (job type, info) pair from analyze()
+        to use instead of analyzing job_description, e.g. that of a repost."""
+        job_description = clip(job_description, self.max_chars)
+        job_type, info = analysis or self.analyze(job_description)
+        if past_experience is None:
+            past_experience = self.suggest_experience(job_description)
+        proposal = self.build_proposal(job_type, info, past_experience, your_name)
+        if self.history is not None:
+            self.history.record(job_description, job_type, info, [proposal], source="cli")
+        return proposal, job_type
+
+    @metrics.timed("build_proposal")
+    def build_proposal(self, job_type, info, past_experience=None, your_name=None):
+        templates = self.templates.current()
+        values = dict(info, tools=templates.first(job_type, "tools").render({}), past_experience=past_experience)
+
+        def section(name):
+            return templates.first(job_type, name).render(values)
+
+        paragraphs = [section("greeting")]
 
         # OPENING
         if info["quantity"] and info["deliverable"]:
-            lines.append("Hi,")
-            lines.append("")
-            lines.append(f"I can get you those {info['deliverable']}.")
+            paragraphs.append(section("opener_quantity"))
         elif info["main_task"]:
-            task_short = info["main_task"][:60].rstrip()
-            lines.append("Hi,")
-            lines.append("")
-            lines.append(f"Read your post. I can help with this.")
+            paragraphs.append(section("opener_task"))
         else:
-            lines.append("Hi,")
-            lines.append("")
-            lines.append("I can help with this.")
-
-        lines.append("")
+            paragraphs.append(section("opener_default"))
 
         # PAIN POINT - show you understand their problem
-        lines.append(pain["pain"])
-        lines.append("")
+        paragraphs.append(section("pain"))
 
         # SOLUTION - what you do differently
-        lines.append(pain["solution"])
-        lines.append("")
+        paragraphs.append(section("solution"))
 
         # TOOLS - always mention what you use
         if info["tool_mentioned"]:
-            lines.append(f"I work with {info['tool_mentioned']} daily. Also use {tools} depending on what the project needs.")
+            paragraphs.append(section("tools_mentioned"))
         else:
-            lines.append(f"I use {tools} for this type of work.")
-
-        lines.append("")
+            paragraphs.append(section("tools_default"))
 
         # EXPERIENCE - if provided
         if past_experience:
-            lines.append(f"Recently I {past_experience}.")
-            lines.append("")
+            paragraphs.append(section("experience"))
 
         # URGENCY
         if info["urgency"]:
-            lines.append("I see this is time sensitive. I can start today.")
-            lines.append("")
+            paragraphs.append(section("urgency"))
 
         # QUESTION
-        questions = {
-            "data_annotation": "Do you have guidelines ready or do you need me to set up a system?",
-            "virtual_assistant": "What tools are you already using? I can adapt to your setup.",
-            "web_research": "What info do you need for each contact? I want to make sure the list is actually useful for you.",
-            "data_entry": "Where is the source data and where should it go? I want to understand the workflow."
-        }
-        lines.append(questions[job_type])
-        lines.append("")
+        paragraphs.append(section("question"))
 
         # CLOSE
-        lines.append("Happy to do a test batch first so you can see the quality before committing.")
-        lines.append("")
-        lines.append("Let me know.")
+        paragraphs.append(section("closing"))
+        paragraphs.append(section("sign_off"))
 
         if your_name:
-            lines.append("")
-            lines.append(your_name)
+            paragraphs.append(your_name)
 
-        return "\n".join(lines), job_type
+        return "\n\n".join(paragraphs)
 
 
-def main():
+def print_stats():
+    print("\n" + "=" * 50)
+    print("SESSION STATS")
+    print("=" * 50)
+    print(metrics.REGISTRY.summary())
+
+
+def write_profile(profiler, prefix):
+    report_path, stacks_path = profiler.write(prefix)
+    print(f"\nProfile written to {report_path} and {stacks_path}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write Upwork proposals from pasted job posts")
+    parser.add_argument("--stats", action="store_true", help="time each stage and print the numbers on exit")
+    parser.add_argument("--profile", nargs="?", const="proposal_profile", metavar="PREFIX",
+                        help="profile every proposal and write PREFIX.txt and PREFIX.collapsed on exit")
+    parser.add_argument("--classifier", metavar="MODEL",
+                        help="detect job types with a trained TF-IDF model (needs numpy)")
+    parser.add_argument("--experience-db", metavar="LIBRARY",
+                        help="suggest past experience from this snippet library and add what you type to it")
+    parser.add_argument("--history-db", metavar="HISTORY",
+                        help="keep every post and proposal in this SQLite file")
+    parser.add_argument("--max-chars", type=int, default=MAX_CHARS,
+                        help=f"characters of a pasted post that are used (default: {MAX_CHARS})")
+    args = parser.parse_args(argv)
+
     print("=" * 50)
     print("UPWORK PROPOSAL GENERATOR v4")
     print("=" * 50)
 
-    generator = UpworkProposalGenerator()
+    classifier = None
+    if args.classifier:
+        from tfidf_classifier import TfidfClassifier
+        classifier = TfidfClassifier.load(args.classifier)
+    experience_index = None
+    if args.experience_db:
+        from experience_index import ExperienceIndex
+        experience_index = ExperienceIndex(args.experience_db)
+    history = None
+    if args.history_db:
+        from history_store import HistoryStore
+        history = HistoryStore(args.history_db)
+    generator = UpworkProposalGenerator(classifier, experience_index, history, args.max_chars)
+    seen_posts = NearDuplicateIndex()
+
+    # Stage hooks stay switched off unless asked for
+    metrics.set_enabled(args.stats)
+    if args.stats:
+        metrics.REGISTRY.add_collector(metrics.cache_collector("proposal_analysis_cache", generator.analysis_cache))
+        atexit.register(print_stats)
+
+    profiler = None
+    if args.profile:
+        profiler = Profiler()
+        profiler.instrument(generator)
+        atexit.register(write_profile, profiler, args.profile)
 
     while True:
         print("\nPaste job description (Enter twice when done):")
         print("-" * 40)
 
         lines = []
+        chars = 0
         empty_count = 0
         while True:
             line = input()
@@ -174,20 +240,47 @@ def main():
                 empty_count += 1
                 if empty_count >= 2:
                     break
-                lines.append(line)
             else:
                 empty_count = 0
+            # Keep reading to the end of the paste, but stop keeping lines
+            # once there is more than will be used
+            if chars <= args.max_chars:
                 lines.append(line)
+                chars += len(line) + 1
 
-        job_description = "\n".join(lines).strip()
+        job_description = clip("\n".join(lines).strip(), args.max_chars)
+        if chars > args.max_chars:
+            print(f"\nLong post: only the first {args.max_chars:,} characters are used.")
 
         if not job_description:
             print("No job description. Try again.")
             continue
 
-        print("\nSimilar work you did? (Enter to skip)")
-        print("Example: built a list of 500 SaaS founders with verified emails")
-        past_experience = input("> ").strip() or None
+        signature = seen_posts.signature(job_description)
+        match = seen_posts.query(signature=signature)
+        if match:
+            # A repost reuses the earlier post's (cached) analysis; experience
+            # and name are asked again, so the proposal is made for this one
+            analysis = generator.analyze(match.payload)
+            print(f"\nThis looks like a repost ({round(match.similarity * 100)}% similar to an earlier post).")
+            print("Reusing the analysis of that post.")
+        else:
+            analysis = None
+            seen_posts.add(payload=job_description, signature=signature)
+
+        suggestion = generator.suggest_experience(job_description)
+        if suggestion:
+            print("\nSimilar work you did? (Enter to use the suggestion, - to skip)")
+            print(f"Suggested: {suggestion}")
+            past_experience = input("> ").strip()
+            # An empty string keeps the generator from filling it in again
+            past_experience = "" if past_experience == "-" else past_experience or suggestion
+        else:
+            print("\nSimilar work you did? (Enter to skip)")
+            print("Example: built a list of 500 SaaS founders with verified emails")
+            past_experience = input("> ").strip() or None
+        if experience_index is not None and past_experience and past_experience != suggestion:
+            experience_index.add(past_experience)
 
         print("\nYour name? (Enter to skip)")
         your_name = input("> ").strip() or None
@@ -196,7 +289,12 @@ def main():
         print("YOUR PROPOSAL")
         print("=" * 50 + "\n")
 
-        proposal, job_type = generator.generate_proposal(job_description, past_experience, your_name)
+        if profiler:
+            proposal, job_type = profiler.run(
+                job_description, generator.generate_proposal, job_description, past_experience, your_name, analysis
+            )
+        else:
+            proposal, job_type = generator.generate_proposal(job_description, past_experience, your_name, analysis)
         print(proposal)
 
         print("\n" + "=" * 50)
@@ -0,0 +1,136 @@
+"""
+Web Assets
+Static files held in memory with their ETag and compressed copies, plus
+gzip/brotli compression for dynamic responses.
+
+Brotli is optional:
+pip install brotli
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Responses smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 500
+
+COMPRESSIBLE_TYPES = {
+    "text/html",
+    "text/css",
+    "text/plain",
+    "text/javascript",
+    "application/javascript",
+    "application/json",
+    "application/x-ndjson",
+    "image/svg+xml",
+}
+
+# Versioned asset URLs never change content, so browsers may keep them
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+
+
+def supported_encodings():
+    return ("br", "gzip") if brotli else ("gzip",)
+
+
+def choose_encoding(accept_encoding):
+    """Best encoding the client accepts, or None"""
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip()] = quality
+
+    for encoding in supported_encodings():
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+def compress(data, encoding):
+    if encoding == "br":
+        return brotli.compress(data, quality=5)
+    # mtime=0 keeps the output stable so ETags stay the same between runs
+    return gzip.compress(data, compresslevel=6, mtime=0)
+
+
+def compress_response(response, accept_encoding):
+    """Compress a finished Flask/Werkzeug response in place when it helps"""
+    if (
+        response.direct_passthrough
+        or response.is_streamed
+        or response.status_code < 200
+        or response.status_code in (204, 304)
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in COMPRESSIBLE_TYPES
+    ):
+        return response
+
+    encoding = choose_encoding(accept_encoding)
+    vary = response.headers.get("Vary")
+    if "accept-encoding" not in (vary or "").lower():
+        response.headers["Vary"] = f"{vary}, Accept-Encoding" if vary else "Accept-Encoding"
+    if encoding is None:
+        return response
+
+    data = response.get_data()
+    if len(data) < MIN_COMPRESS_SIZE:
+        return response
+
+    response.set_data(compress(data, encoding))
+    response.headers["Content-Encoding"] = encoding
+    return response
+
+
+class StaticAsset:
+    """One static file with its raw and precompressed bodies."""
+
+    __slots__ = ("name", "mimetype", "etag", "bodies")
+
+    def __init__(self, name, data):
+        self.name = name
+        self.mimetype = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        self.etag = hashlib.sha1(data).hexdigest()[:16]
+        self.bodies = {None: data}
+        if self.mimetype in COMPRESSIBLE_TYPES and len(data) >= MIN_COMPRESS_SIZE:
+            for encoding in supported_encodings():
+                self.bodies[encoding] = compress(data, encoding)
+
+    def body(self, encoding):
+        """Body for an encoding, and the encoding actually used"""
+        if encoding in self.bodies:
+            return self.bodies[encoding], encoding
+        return self.bodies[None], None
+
+
+class StaticAssets:
+    """Every file in a folder, loaded once at startup."""
+
+    def __init__(self, folder):
+        self.folder = folder
+        self._assets = {}
+        for root, _, files in os.walk(folder):
+            for filename in files:
+                path = os.path.join(root, filename)
+                name = os.path.relpath(path, folder).replace(os.sep, "/")
+                with open(path, "rb") as f:
+                    self._assets[name] = StaticAsset(name, f.read())
+
+    def get(self, name):
+        return self._assets.get(name)
+
+    def url(self, name):
+        """URL with a content version so it can be cached forever"""
+        return f"/static/{name}?v={self._assets[name].etag[:8]}"